@@ -0,0 +1,146 @@
+"""Measures the per-request overhead of the clients against the local mock server.
+
+Every method is run in every mode and its throughput and latency percentiles are
+written as one JSON document, so runs can be stored and compared::
+
+    python -m benchmarks.bench_client --requests 2000 --concurrency 8 --output bench.json
+
+Modes:
+    * sync - one :py:class:`~pyshock.tshock.TShock`, one request at a time
+    * threaded - one :py:class:`~pyshock.tshock.TShock` shared by ``--concurrency`` threads
+    * cached - like sync, with a :py:class:`~pyshock.cache.ResponseCache`
+    * async - one :py:class:`~pyshock.async_tshock.AsyncTShock` with ``--concurrency`` tasks,
+      skipped when aiohttp is not installed
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.mock_server import MockTShockServer
+from pyshock import ResponseCache, TShock
+from pyshock.async_tshock import aiohttp, AsyncTShock
+
+METHODS = {
+    "get_status": ((), {}),
+    "get_server_status_v2": ((), {"players": True}),
+    "get_ban_list": ((), {}),
+    "get_group_list": ((), {}),
+}
+
+def percentile(samples : list, fraction : float) -> float:
+    """Returns the nearest-rank percentile of sorted samples."""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+def summarize(mode : str, method : str, latencies : list, elapsed : float) -> dict:
+    latencies.sort()
+    return {
+        "mode": mode,
+        "method": method,
+        "requests": len(latencies),
+        "seconds": round(elapsed, 6),
+        "throughput": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(1000 * sum(latencies) / len(latencies), 4) if latencies else 0.0,
+        "p50_ms": round(1000 * percentile(latencies, 0.50), 4),
+        "p99_ms": round(1000 * percentile(latencies, 0.99), 4),
+        "max_ms": round(1000 * latencies[-1], 4) if latencies else 0.0,
+    }
+
+def timed_calls(function, args, kwargs, count):
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        function(*args, **kwargs)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def run_sync(port, method, requests, concurrency, cache=None):
+    with TShock("127.0.0.1", port, pool_size=max(1, concurrency), cache=cache) as tshock:
+        tshock.get_token("bench", "bench")
+        args, kwargs = METHODS[method]
+        function = getattr(tshock, method)
+        function(*args, **kwargs)
+        start = time.perf_counter()
+        if concurrency <= 1:
+            latencies = timed_calls(function, args, kwargs, requests)
+        else:
+            shares = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                latencies = [latency for part in pool.map(lambda count: timed_calls(function, args, kwargs, count), shares)
+                             for latency in part]
+        return latencies, time.perf_counter() - start
+
+async def run_async(port, method, requests, concurrency):
+    async with AsyncTShock("127.0.0.1", port, pool_size=concurrency) as tshock:
+        await tshock.get_token("bench", "bench")
+        args, kwargs = METHODS[method]
+        function = getattr(tshock, method)
+        await function(*args, **kwargs)
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def call():
+            async with semaphore:
+                begin = time.perf_counter()
+                await function(*args, **kwargs)
+                latencies.append(time.perf_counter() - begin)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[call() for _ in range(requests)])
+        return latencies, time.perf_counter() - start
+
+def run(args) -> dict:
+    modes = args.modes or ["sync", "threaded", "cached", "async"]
+    if aiohttp is None and "async" in modes:
+        modes.remove("async")
+    results = []
+    with MockTShockServer(latency=args.latency, players=args.players, bans=args.bans) as server:
+        for mode in modes:
+            for method in args.methods or METHODS:
+                if mode == "sync":
+                    latencies, elapsed = run_sync(server.port, method, args.requests, 1)
+                elif mode == "threaded":
+                    latencies, elapsed = run_sync(server.port, method, args.requests, args.concurrency)
+                elif mode == "cached":
+                    latencies, elapsed = run_sync(server.port, method, args.requests, 1, cache=ResponseCache())
+                else:
+                    latencies, elapsed = asyncio.run(run_async(server.port, method, args.requests, args.concurrency))
+                results.append(summarize(mode, method, latencies, elapsed))
+                print("{mode:>9} {method:<22} {throughput:>10.1f} req/s  p50 {p50_ms:.3f} ms  p99 {p99_ms:.3f} ms".format(
+                    **results[-1]), file=sys.stderr)
+    return {
+        "label": args.label,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"requests": args.requests, "concurrency": args.concurrency, "latency": args.latency,
+                   "players": args.players, "bans": args.bans},
+        "results": results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pyshock clients against a local mock server.")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per mode and method")
+    parser.add_argument("--concurrency", type=int, default=8, help="threads or tasks in the threaded and async modes")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the mock server delays every reply")
+    parser.add_argument("--players", type=int, default=16)
+    parser.add_argument("--bans", type=int, default=100)
+    parser.add_argument("--mode", dest="modes", action="append", choices=["sync", "threaded", "cached", "async"])
+    parser.add_argument("--method", dest="methods", action="append", choices=list(METHODS))
+    parser.add_argument("--label", default="", help="free text stored with the results")
+    parser.add_argument("--output", help="file to write the JSON results to instead of stdout")
+    args = parser.parse_args()
+    report = run(args)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""Generates REST load against a TShock server to find how much it sustains.
+
+A mix of endpoints is requested through one shared :py:class:`~pyshock.tshock.TShock` in
+stages of increasing load, and the throughput and latency percentiles of every endpoint in
+every stage are written as one JSON document::
+
+    python -m benchmarks.loadgen --stage 50:10 --stage 100:10 --stage 200:10
+    python -m benchmarks.loadgen --server 10.0.0.1:7878 --user admin --password secret \\
+        --mix get_server_status_v2=3 --mix get_ban_list=1 --stage c4:30 --stage c16:30
+
+Without ``--server`` the load goes to a local :py:class:`~benchmarks.mock_server.MockTShockServer`.
+A real server needs ``--token``, or ``--user`` and ``--password``.
+
+Stages:
+    * ``RATE:SECONDS`` - open loop: requests are started at ``RATE`` per second on a fixed
+      schedule, whether or not earlier ones have been answered. Latency is measured from the
+      time a request was due, not from when a worker got to send it, so a server that falls
+      behind shows its queueing in the percentiles instead of hiding it by slowing the load
+      down (coordinated omission).
+    * ``cCLIENTS:SECONDS`` - closed loop: ``CLIENTS`` threads each send a request as soon as
+      their previous one is answered, which finds the throughput at a given concurrency.
+
+Every stage is drained, its last requests answered, before the next one starts, so each
+reply is counted in the stage that sent it.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.bench_client import percentile
+from benchmarks.mock_server import MockTShockServer
+from pyshock import TShock
+
+CALLS = {
+    "get_status": ((), {}),
+    "get_server_status_v2": ((), {"players": True}),
+    "get_player_list": ((), {}),
+    "get_ban_list": ((), {}),
+    "get_group_list": ((), {}),
+    "get_world_info": ((), {}),
+    "get_server_motd": ((), {}),
+}
+
+DEFAULT_MIX = {"get_server_status_v2": 4, "get_player_list": 3, "get_world_info": 2, "get_ban_list": 1}
+
+def summarize(stage : dict, endpoint : str, samples : list) -> dict:
+    """Summarizes the ``(latency, failed, finished)`` samples of one endpoint in one stage.
+    The throughput counts the replies over the time from the start of the stage to the last one."""
+    latencies = sorted(latency for latency, _, _ in samples)
+    elapsed = max((finished for _, _, finished in samples), default=stage["started"]) - stage["started"]
+    return {
+        "stage": stage["index"],
+        "load": stage["spec"],
+        "endpoint": endpoint,
+        "requests": len(samples),
+        "errors": sum(failed for _, failed, _ in samples),
+        "throughput": round(len(samples) / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": round(1000 * sum(latencies) / len(latencies), 4) if latencies else 0.0,
+        "p50_ms": round(1000 * percentile(latencies, 0.50), 4),
+        "p95_ms": round(1000 * percentile(latencies, 0.95), 4),
+        "p99_ms": round(1000 * percentile(latencies, 0.99), 4),
+        "max_ms": round(1000 * latencies[-1], 4) if latencies else 0.0,
+    }
+
+def parse_stage(spec : str) -> dict:
+    """Parses ``RATE:SECONDS`` or ``cCLIENTS:SECONDS``."""
+    load, _, seconds = spec.partition(":")
+    try:
+        if load.startswith("c"):
+            stage = {"clients": int(load[1:]), "rate": None}
+        else:
+            stage = {"clients": None, "rate": float(load)}
+        stage["seconds"] = float(seconds)
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected RATE:SECONDS or cCLIENTS:SECONDS, got {0!r}".format(spec))
+    stage["spec"] = spec
+    return stage
+
+def parse_mix(specs : list) -> dict:
+    mix = {}
+    for spec in specs:
+        name, _, weight = spec.partition("=")
+        if name not in CALLS:
+            raise SystemExit("loadgen: unknown endpoint {0!r}, expected one of {1}".format(name, ", ".join(CALLS)))
+        mix[name] = float(weight or 1)
+    return mix
+
+def call(tshock, endpoint : str, due : float) -> tuple:
+    """Requests an endpoint and returns its latency since ``due``, whether it failed and
+    when it finished."""
+    args, kwargs = CALLS[endpoint]
+    failed = False
+    try:
+        getattr(tshock, endpoint)(*args, **kwargs)
+    except Exception:
+        failed = True
+    finished = time.perf_counter()
+    return finished - due, failed, finished
+
+def run_open(tshock, pool, stage, choose) -> list:
+    """Starts requests on a fixed schedule and returns ``(endpoint, future)`` pairs."""
+    interval = 1.0 / stage["rate"]
+    count = int(stage["rate"] * stage["seconds"])
+    start = stage["started"] = time.perf_counter()
+    started = []
+    for index in range(count):
+        due = start + index * interval
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        endpoint = choose()
+        started.append((endpoint, pool.submit(call, tshock, endpoint, due)))
+    return started
+
+def run_closed(tshock, stage, choose) -> list:
+    """Runs ``clients`` threads back to back for the stage and returns ``(endpoint, sample)`` pairs."""
+    stage["started"] = time.perf_counter()
+    end = stage["started"] + stage["seconds"]
+    samples = []
+    lock = threading.Lock()
+
+    def client():
+        own = []
+        while time.perf_counter() < end:
+            with lock:
+                endpoint = choose()
+            own.append((endpoint, call(tshock, endpoint, time.perf_counter())))
+        with lock:
+            samples.extend(own)
+
+    threads = [threading.Thread(target=client) for _ in range(stage["clients"])]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+def run_stages(tshock, stages, mix, workers, seed) -> list:
+    chooser = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    choose = lambda: chooser.choices(names, weights)[0]
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for index, stage in enumerate(stages):
+            stage["index"] = index
+            if stage["rate"] is not None:
+                # Waits for the stage's requests, so that none is still answered during the next stage.
+                started = [(endpoint, future.result()) for endpoint, future in run_open(tshock, pool, stage, choose)]
+            else:
+                started = run_closed(tshock, stage, choose)
+            by_endpoint = {}
+            for endpoint, sample in started:
+                by_endpoint.setdefault(endpoint, []).append(sample)
+            for endpoint in sorted(by_endpoint):
+                results.append(summarize(stage, endpoint, by_endpoint[endpoint]))
+            results.append(summarize(stage, "all", [sample for samples in by_endpoint.values() for sample in samples]))
+            total = results[-1]
+            print("stage {stage} {load:>10} {requests:>7} req {throughput:>9.1f} req/s  p50 {p50_ms:.2f} ms  "
+                  "p95 {p95_ms:.2f} ms  p99 {p99_ms:.2f} ms  max {max_ms:.2f} ms  errors {errors}".format(**total),
+                  file=sys.stderr)
+    return results
+
+def run(args) -> dict:
+    stages = args.stages or [parse_stage("50:5"), parse_stage("100:5"), parse_stage("200:5")]
+    mix = parse_mix(args.mix) if args.mix else dict(DEFAULT_MIX)
+    server = None
+    if args.server:
+        host, _, port = args.server.rpartition(":")
+        port = int(port)
+    else:
+        server = MockTShockServer(latency=args.latency, players=args.players)
+        server.start()
+        host, port = "127.0.0.1", server.port
+    try:
+        with TShock(host, port, pool_size=args.workers, timeout=args.timeout,
+                    user=args.user, password=args.password) as tshock:
+            if args.token:
+                tshock.token = args.token
+            elif server is not None and args.user is None:
+                # The mock server accepts any credentials.
+                tshock.get_token("loadgen", "loadgen")
+            results = run_stages(tshock, stages, mix, args.workers, args.seed)
+    finally:
+        if server is not None:
+            server.stop()
+    return {
+        "label": args.label,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"server": args.server or "mock", "stages": [stage["spec"] for stage in stages], "mix": mix,
+                   "workers": args.workers, "timeout": args.timeout, "latency": args.latency, "seed": args.seed},
+        "results": results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate REST load against a TShock server in stages.")
+    parser.add_argument("--server", metavar="HOST:PORT", help="the server to load (default: a local mock server)")
+    parser.add_argument("--token", help="the token to use")
+    parser.add_argument("--user", help="the user to obtain a token for")
+    parser.add_argument("--password", help="the user's password")
+    parser.add_argument("--stage", dest="stages", action="append", type=parse_stage, metavar="RATE:SECONDS",
+                        help="a load stage, RATE requests per second or cCLIENTS closed loop clients (repeatable)")
+    parser.add_argument("--mix", action="append", metavar="ENDPOINT=WEIGHT",
+                        help="an endpoint and its share of the requests (repeatable)")
+    parser.add_argument("--workers", type=int, default=64, help="the most open loop requests in flight at once")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait for a reply")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the endpoint mix")
+    parser.add_argument("--latency", type=float, default=0.002, help="seconds the mock server delays every reply")
+    parser.add_argument("--players", type=int, default=16, help="players online on the mock server")
+    parser.add_argument("--label", default="", help="free text stored with the results")
+    parser.add_argument("--output", help="file to write the JSON results to instead of stdout")
+    args = parser.parse_args()
+    if args.server and not args.token and (args.user is None or args.password is None):
+        parser.error("--server needs --token, or --user and --password")
+    report = run(args)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+if __name__ == "__main__":
+    main()
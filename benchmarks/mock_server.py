@@ -0,0 +1,169 @@
+"""A local stand-in for the TShock REST API, for benchmarks and load tests.
+
+Every endpoint answers with a canned reply of a configurable size after a configurable
+delay, and any token is accepted. Run it on its own with::
+
+    python -m benchmarks.mock_server --port 7878 --players 64 --bans 10000 --latency 0.002
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+TOKEN = "mock-token"
+
+def build_payloads(players : int = 16, bans : int = 100, groups : int = 8) -> dict:
+    """Builds the encoded reply of every canned endpoint.
+
+    :param int players:
+        The number of players online.
+
+    :param int bans:
+        The number of entries in the ban list.
+
+    :param int groups:
+        The number of groups, each inheriting from the previous one.
+    """
+    player_list = [{"nickname": "player{0}".format(i), "username": "user{0}".format(i) if i % 2 else "",
+                    "ip": "10.0.{0}.{1}".format(i // 256, i % 256), "group": "group{0}".format(i % groups),
+                    "active": True, "state": 10, "team": i % 4} for i in range(players)]
+    names = ", ".join(player["nickname"] for player in player_list)
+    status = {"status": "200", "name": "Mock", "port": 7777, "playercount": players, "maxplayers": 255, "world": "Mock World"}
+    payloads = {
+        "/status": dict(status, players=names),
+        "/tokentest": {"status": "200", "response": "Token is valid and was passed through correctly."},
+        "/v2/server/status": status,
+        "/v2/server/status?players": dict(status, players=player_list),
+        "/v2/users/activelist": {"status": "200", "activeusers": names},
+        "/v2/users/list": {"status": "200", "users": [{"name": "user{0}".format(i), "id": i, "group": "group{0}".format(i % groups)}
+                                                       for i in range(players)]},
+        "/v2/players/list": {"status": "200", "players": names},
+        "/v2/players/read": {"status": "200", "nickname": "player0", "username": "", "ip": "10.0.0.0", "group": "group0",
+                             "position": "4200,1200", "inventory": "Copper Shortsword:1, Copper Pickaxe:1, Dirt Block:250",
+                             "buffs": "1, 5, 11"},
+        "/v2/bans/list": {"status": "200", "bans": [{"name": "banned{0}".format(i),
+                                                      "ip": "172.{0}.{1}.{2}".format(i // 65536 % 256, i // 256 % 256, i % 256),
+                                                      "reason": "Benchmark ban"} for i in range(bans)]},
+        "/v2/groups/list": {"status": "200", "groups": [{"name": "group{0}".format(i),
+                                                          "parent": "group{0}".format(i - 1) if i else "",
+                                                          "chatcolor": "255,255,255"} for i in range(groups)]},
+        "/v2/groups/read": {"status": "200", "name": "group0", "parent": "", "chatcolor": "255,255,255",
+                            "permissions": ["tshock.account.*"], "negatedpermissions": [],
+                            "totalpermissions": ["tshock.account.*"]},
+        "/world/read": {"status": "200", "name": "Mock World", "size": "4200*1200", "time": 27000.0,
+                        "daytime": True, "bloodmoon": False, "invasionsize": 0},
+        "/v3/server/motd": {"status": "200", "motd": ["Welcome to the mock server."]},
+        "/v3/server/rules": {"status": "200", "rules": ["Be nice."]},
+        "/v2/token/create": {"status": "200", "token": TOKEN},
+    }
+    return {path: json.dumps(reply).encode() for path, reply in payloads.items()}
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, Nagle's algorithm
+    # and delayed ACKs add ~40 ms to every keep-alive reply.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        path = parts.path.rstrip("/")
+        params = dict(parse_qsl(parts.query))
+        if path.startswith("/v2/token/create"):
+            path = "/v2/token/create"
+        elif path == "/v2/server/status" and params.get("players", "").lower() == "true":
+            path = "/v2/server/status?players"
+        body = self.server.payloads.get(path)
+        if body is None:
+            if path.endswith("rawcmd"):
+                body = json.dumps({"status": "200", "response": ["Executed " + params.get("cmd", "")]}).encode()
+            else:
+                body = self.server.default_payload
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.server.count()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class MockTShockServer(ThreadingHTTPServer):
+    """Serves canned TShock replies on a background thread.
+
+    >>> with MockTShockServer(players=64) as server:
+    ...     tshock = TShock("127.0.0.1", server.port)
+
+    :param int port:
+        The port to listen on. 0 picks a free one, see :py:attr:`port`.
+
+    :param float latency:
+        Seconds every request is delayed by before it is answered.
+
+    :param int players:
+        The number of players online.
+
+    :param int bans:
+        The number of entries in the ban list.
+
+    :param int groups:
+        The number of groups.
+    """
+    daemon_threads = True
+
+    def __init__(self, port : int = 0, latency : float = 0.0, players : int = 16, bans : int = 100, groups : int = 8):
+        super().__init__(("127.0.0.1", port), MockHandler)
+        self.latency = latency
+        self.payloads = build_payloads(players, bans, groups)
+        self.default_payload = json.dumps({"status": "200", "response": "ok"}).encode()
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def count(self):
+        with self._lock:
+            self.requests += 1
+
+    def start(self):
+        """Starts serving on a daemon thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops serving and closes the socket."""
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve canned TShock REST replies.")
+    parser.add_argument("--port", type=int, default=7878)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to delay every reply")
+    parser.add_argument("--players", type=int, default=16)
+    parser.add_argument("--bans", type=int, default=100)
+    parser.add_argument("--groups", type=int, default=8)
+    args = parser.parse_args()
+    server = MockTShockServer(args.port, args.latency, args.players, args.bans, args.groups)
+    print("Mock TShock REST API listening on 127.0.0.1:{0}".format(server.port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,43 @@
-from .tshock import TShock
\ No newline at end of file
+from importlib import import_module
+
+# The classes are imported on first use, so that importing pyshock does not import
+# requests or aiohttp until a client is created.
+_EXPORTS = {
+    "TShock": ".tshock",
+    "AsyncTShock": ".async_tshock",
+    "BanIndex": ".bans",
+    "BroadcastQueue": ".broadcast",
+    "ResponseCache": ".cache",
+    "TShockFleet": ".fleet",
+    "GroupIndex": ".groups",
+    "RequestHook": ".instrumentation",
+    "RequestMetrics": ".instrumentation",
+    "MaintenanceScheduler": ".maintenance",
+    "Ban": ".models",
+    "Group": ".models",
+    "Player": ".models",
+    "ServerStatus": ".models",
+    "User": ".models",
+    "Recorder": ".recorder",
+    "CircuitBreaker": ".resilience",
+    "RetryPolicy": ".resilience",
+    "RequestScheduler": ".scheduler",
+    "Script": ".script",
+    "SingleFlight": ".singleflight",
+    "RecordingTransport": ".transport",
+    "ReplayTransport": ".transport",
+    "Transport": ".transport",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,4 @@
+import sys
+from pyshock.cli import main
+
+sys.exit(main())
@@ -0,0 +1,347 @@
+import asyncio
+from contextlib import nullcontext
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+from pyshock.batch import BatchResult, run_batch_async
+from pyshock.cache import ResponseCache
+from pyshock.endpoints import ENDPOINTS, Endpoint
+from pyshock.enums import RequestPriority
+from pyshock.exceptions import ApiException, ConnectionException, ResponseException, TimeoutException
+from pyshock.resilience import CircuitBreaker, RetryPolicy
+from pyshock.scheduler import RequestScheduler, current_priority, priority
+from pyshock.singleflight import SingleFlight
+from pyshock.snapshot import ItemVocabulary, PlayerSnapshot
+from pyshock.streaming import ArrayParser
+from pyshock.tshock import _TOKEN_ENDPOINTS, TShock, check_response, is_token_error, player_names, server_error
+from pyshock.transport import Transport
+from pyshock.watch import PollInterval, diff_players, index_players
+
+def client_error(exception : Exception) -> ApiException:
+    """Translates an exception raised by :py:mod:`aiohttp` to the ApiException to raise instead."""
+    if isinstance(exception, asyncio.TimeoutError):
+        return TimeoutException("The server did not answer in time.")
+    if isinstance(exception, aiohttp.ClientConnectionError):
+        return ConnectionException("Could not connect to the server.")
+    return ApiException("An error occurred in making the request to the server.")
+
+class AsyncTShock(TShock):
+    """The asyncio flavour of :py:class:`~pyshock.tshock.TShock`.
+
+    Every ``get_``, ``set_`` and ``do_`` function of :py:class:`~pyshock.tshock.TShock` is
+    available with the same parameters, but returns a coroutine that must be awaited.
+    The ``iter_`` functions return asynchronous generators, used with ``async for``.
+    URLs are built by the same :py:class:`~pyshock.tshock.RequestBuilder` and replies are
+    checked the same way, so the same ApiExceptions are raised.
+
+    Requests share a single :py:class:`aiohttp.ClientSession` whose connector keeps at
+    most ``pool_size`` connections open. Any number of requests may be awaited concurrently;
+    the ones over the limit wait for a free connection. Requires the ``aiohttp`` package.
+
+    Example usage of the API:
+
+    >>> async with pyshock.AsyncTShock("127.0.0.1", 7878) as tshock:
+    ...     await tshock.get_token("Ijwu", "test")
+    ...     await tshock.get_active_user_list()
+    {'status': '200', 'activeusers': 'Ijwu'}
+
+    :param str ip:
+        the ip address of the TShock server
+
+    :param int port:
+        the port that the REST API is opened on
+
+    :param int pool_size:
+        the maximum number of connections open to the server at once
+
+    :param float timeout:
+        (Optional) the default number of seconds to wait for a response, or a
+        ``(connect, read)`` tuple of seconds. ``None`` waits forever.
+
+    :param ResponseCache cache:
+        (Optional) a :py:class:`~pyshock.cache.ResponseCache` that answers repeated ``get_`` requests.
+
+    :param RetryPolicy retry:
+        (Optional) a :py:class:`~pyshock.resilience.RetryPolicy` for ``get_`` requests.
+
+    :param CircuitBreaker breaker:
+        (Optional) a :py:class:`~pyshock.resilience.CircuitBreaker` for the server.
+
+    :param str user:
+        (Optional) the user to obtain tokens under, see :py:class:`~pyshock.tshock.TShock`.
+
+    :param str password:
+        (Optional) the user's password.
+
+    :param SingleFlight single_flight:
+        (Optional) a :py:class:`~pyshock.singleflight.SingleFlight` shared by concurrent identical ``get_`` requests.
+
+    :param RequestScheduler scheduler:
+        (Optional) a :py:class:`~pyshock.scheduler.RequestScheduler` for the server.
+
+    :param bool typed:
+        (Optional) return :py:mod:`~pyshock.models` instead of dicts, see :py:class:`~pyshock.tshock.TShock`.
+
+    :param Transport transport:
+        (Optional) a :py:class:`~pyshock.transport.Transport` that answers the requests instead of the server.
+    """
+    def __init__(self, ip, port, pool_size : int = 100, timeout : float = None, cache : ResponseCache = None,
+                 retry : RetryPolicy = None, breaker : CircuitBreaker = None, user : str = None, password : str = None,
+                 single_flight : SingleFlight = None, scheduler : RequestScheduler = None, typed : bool = False,
+                 transport : Transport = None):
+        if aiohttp is None:
+            raise ImportError("AsyncTShock requires the aiohttp package.")
+        super().__init__(ip, port, pool_size=pool_size, timeout=timeout, cache=cache, retry=retry, breaker=breaker,
+                         user=user, password=password,
+                         single_flight=single_flight, scheduler=scheduler, typed=typed, transport=transport)
+
+    def __enter__(self):
+        raise TypeError("Use 'async with' on an AsyncTShock, 'with' cannot await close().")
+
+    def __exit__(self, *exc_info):
+        raise TypeError("Use 'async with' on an AsyncTShock, 'with' cannot await close().")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Destroys the token obtained by :py:meth:`get_token`, if any, and closes all
+        pooled connections to the server."""
+        if self._owns_token:
+            try:
+                await self.do_destroy_token()
+            except ApiException:
+                pass
+            self.token = ""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    def _create_session(self, pool_size : int):
+        # aiohttp sessions must be created inside a running event loop,
+        # so the session is only opened by the first request.
+        self.pool_size = pool_size
+        return None
+
+    def _get_session(self):
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.pool_size))
+        return self.session
+
+    def _create_lock(self):
+        return asyncio.Lock()
+
+    async def _request(self, endpoint : Endpoint, values : tuple = ()) -> dict:
+        results = await self._authorized_request(endpoint, values)
+        if self.typed and endpoint.model is not None:
+            return endpoint.model(results)
+        return results
+
+    async def _authorized_request(self, endpoint : Endpoint, values : tuple) -> dict:
+        if self.credentials is None or endpoint.name in _TOKEN_ENDPOINTS:
+            return await self._make_request(self.urls.build(endpoint, values), endpoint=endpoint)
+        if not self.token:
+            await self._authenticate("")
+        token = self.token
+        try:
+            return await self._make_request(self.urls.build(endpoint, values), endpoint=endpoint)
+        except ResponseException as e:
+            if not is_token_error(e):
+                raise
+        await self._authenticate(token)
+        return await self._make_request(self.urls.build(endpoint, values), endpoint=endpoint)
+
+    async def _authenticate(self, rejected : str):
+        async with self._auth_lock:
+            if self.token == rejected:
+                await self.get_token(*self.credentials)
+
+    async def _run_batch(self, function, items, max_in_flight : int, rate) -> BatchResult:
+        return await run_batch_async(function, items, max_in_flight, rate)
+
+    async def _make_request(self, url : str, timeout : float = None, endpoint : Endpoint = None) -> dict:
+        """Makes a GET request to the specified url without blocking the event loop.
+        Behaves exactly like :py:meth:`TShock._make_request <pyshock.tshock.TShock._make_request>`.
+
+        :raises ApiException:
+            The same subclasses as :py:meth:`TShock._make_request <pyshock.tshock.TShock._make_request>`.
+        """
+        results = self._cached(url)
+        if results is not None:
+            return results
+        if self._shared(endpoint):
+            return await self.single_flight.do_async(url, lambda: self._fetch(url, timeout, endpoint))
+        return await self._fetch(url, timeout, endpoint)
+
+    async def _fetch(self, url : str, timeout : float, endpoint : Endpoint) -> dict:
+        generation = self._generation(url)
+        try:
+            if not self.hooks:
+                return self._decode(url, await self._send(url, timeout, endpoint), None, generation)
+            with self._measure(url, endpoint) as info:
+                return self._decode(url, await self._send(url, timeout, endpoint), info, generation)
+        except BaseException:
+            self._failed(url)
+            raise
+
+    async def _send(self, url : str, timeout : float, endpoint : Endpoint = None) -> bytes:
+        attempt = 0
+        while True:
+            try:
+                if self.scheduler is None:
+                    return await self._send_once(url, timeout)
+                async with self.scheduler.slot_async(current_priority(endpoint)):
+                    return await self._send_once(url, timeout)
+            except ApiException as e:
+                delay = self._retry_delay(e, attempt, endpoint)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _send_once(self, url : str, timeout : float) -> bytes:
+        with self._circuit():
+            if self.transport is None:
+                return await self._get(url, timeout)
+            return await self.transport.send_async(url, timeout, self._get)
+
+    async def _get(self, url : str, timeout : float) -> bytes:
+        try:
+            async with self._get_session().get(url, timeout=self._client_timeout(timeout)) as res:
+                body = await res.read()
+        except Exception as e:
+            raise client_error(e)
+        if res.status >= 500:
+            raise server_error(res.status, body)
+        return body
+
+    def _client_timeout(self, timeout):
+        if timeout is None:
+            timeout = self.timeout
+        if isinstance(timeout, tuple):
+            return aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+        return aiohttp.ClientTimeout(total=timeout)
+
+    async def _chunks(self, url : str, chunk_size : int, endpoint : Endpoint = None):
+        stream = self._stream(url, chunk_size)
+        try:
+            if self.scheduler is None:
+                async for chunk in stream:
+                    yield chunk
+                return
+            async with self.scheduler.slot_async(current_priority(endpoint)):
+                async for chunk in stream:
+                    yield chunk
+        finally:
+            await stream.aclose()
+
+    async def _stream(self, url : str, chunk_size : int):
+        if self.transport is not None:
+            yield await self._send_once(url, None)
+            return
+        with self._circuit():
+            try:
+                res = await self._get_session().get(url, timeout=self._client_timeout(None))
+                if res.status >= 500:
+                    body = await res.read()
+                    res.release()
+            except Exception as e:
+                raise client_error(e)
+            if res.status >= 500:
+                raise server_error(res.status, body)
+        try:
+            async for chunk in res.content.iter_chunked(chunk_size):
+                yield chunk
+            res.release()
+        except Exception as e:
+            self._record_failure()
+            raise client_error(e)
+        finally:
+            # Closes the connection if the reply was not read to the end.
+            res.close()
+
+    async def _iter_items(self, endpoint : Endpoint, key : str, model : type, chunk_size : int):
+        if self.credentials is not None and not self.token:
+            await self._authenticate("")
+        with (self._measure(self.urls.build(endpoint), endpoint) if self.hooks else nullcontext()) as info:
+            items = self._stream_items(endpoint, key, model, chunk_size, info)
+            try:
+                async for item in items:
+                    yield item
+            finally:
+                await items.aclose()
+
+    async def _stream_items(self, endpoint, key, model, chunk_size, info):
+        reauthenticate = self.credentials is not None
+        attempt = 0
+        while True:
+            token = self.token
+            parser = ArrayParser(key)
+            yielded = False
+            chunks = self._chunks(self.urls.build(endpoint), chunk_size, endpoint)
+            try:
+                async for chunk in chunks:
+                    if info is not None:
+                        info.size = (info.size or 0) + len(chunk)
+                    for item in parser.feed(chunk):
+                        yielded = True
+                        yield model.from_reply(item) if self.typed else item
+                results = check_response(parser.close())
+                if info is not None:
+                    info.status = results.get("status")
+                return
+            except ApiException as e:
+                if yielded:
+                    raise
+                if reauthenticate and is_token_error(e):
+                    reauthenticate = False
+                    await self._authenticate(token)
+                    continue
+                delay = self._retry_delay(e, attempt, endpoint)
+                if delay is None:
+                    raise
+            finally:
+                await chunks.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def get_token(self, user : str, password : str, remember : bool = False):
+        self.token = (await self._request(ENDPOINTS["get_token"], (user, password)))["token"]
+        self._owns_token = True
+        if remember:
+            self.credentials = (user, password)
+
+    async def get_token_status(self) -> bool:
+        try:
+            await self._request(ENDPOINTS["get_token_status"])
+        except ApiException:
+            return False
+        return True
+
+    async def watch(self, min_interval : float = 1.0, max_interval : float = 30.0, filters : dict = None, initial : bool = False):
+        interval = PollInterval(min_interval, max_interval)
+        previous = {} if initial else None
+        while True:
+            with priority(RequestPriority.Background):
+                current = index_players((await self.get_server_status_v2(players=True, filters=filters)).get("players", []))
+            events = diff_players(previous, current) if previous is not None else []
+            previous = current
+            for event in events:
+                yield event
+            await asyncio.sleep(interval.next(bool(events)))
+
+    async def snapshot_players(self, max_in_flight : int = 8, vocabulary : ItemVocabulary = None) -> PlayerSnapshot:
+        names = player_names(await self._authorized_request(ENDPOINTS["get_player_list"], ()))
+        batch = await self._run_batch(lambda name: self._authorized_request(ENDPOINTS["get_player_info"], (name,)),
+                                      names, max_in_flight, None)
+        return PlayerSnapshot.from_replies([item.reply for item in batch.succeeded],
+                                           "{0}:{1}".format(self.ip, self.port), vocabulary)
+
+    get_token.__doc__ = TShock.get_token.__doc__
+    get_token_status.__doc__ = TShock.get_token_status.__doc__
+    watch.__doc__ = TShock.watch.__doc__
+    snapshot_players.__doc__ = TShock.snapshot_players.__doc__
@@ -0,0 +1,330 @@
+import ipaddress
+import socket
+import threading
+import time
+from collections import namedtuple
+from pyshock.endpoints import ENDPOINTS
+from pyshock.enums import BanLookupType, RequestPriority
+from pyshock.exceptions import ApiException
+from pyshock.scheduler import priority
+
+# Readers take no lock. A resync builds new tables and swaps them in as one snapshot, so a
+# check never sees a half-built index. Single bans are added and removed in place under the
+# lock: every dict operation is atomic for readers, and a snapshot is only rebuilt, sharing
+# the tables, when the set of range prefixes changes.
+_Snapshot = namedtuple("_Snapshot", ["ips", "names", "ranges", "prefixes"])
+
+class BanIndex():
+    """A local copy of the ban list of a TShock server that answers ban checks without any requests.
+
+    Bans are hashed by IP and by name. Banned IPs may also be ranges, written either in CIDR
+    notation (``10.0.0.0/8``) or with a trailing wildcard (``10.0.*``); an address is matched
+    against the most specific range containing it.
+
+    Build the index with :py:meth:`build`. The client it is built from keeps it up to date:
+    bans created or deleted through that client are applied locally straight away, and
+    :py:meth:`start` resyncs the whole list in the background to pick up bans made elsewhere.
+    A player ban also bans the player's IP; when it is not known from a cached
+    :py:meth:`~pyshock.tshock.TShock.get_player_info`, the index sets :py:attr:`stale` and resyncs.
+
+    Example usage of the API:
+
+    >>> bans = pyshock.BanIndex.build(tshock)
+    >>> bans.start(300)
+    >>> bans.check_many(["10.1.2.3", "192.168.0.7"])
+    {'10.1.2.3': {'name': '', 'ip': '10.0.0.0/8', 'reason': 'proxy range'}}
+
+    :param list bans:
+        (Optional) The ``bans`` array of :py:meth:`~pyshock.tshock.TShock.get_ban_list`.
+    """
+    def __init__(self, bans : list = None):
+        self.tshock = None
+        self.last_sync = None
+        self.last_error = None
+        # True while the index may be missing a ban, until a sync started after it was noticed.
+        self.stale = False
+        self._marked = 0
+        self._resyncing = False
+        self._bans = _Snapshot({}, {}, {}, [])
+        self._lock = threading.Lock()
+        # The changes made while each running sync fetches the list, replayed onto what it fetched.
+        self._logs = []
+        self._stop = threading.Event()
+        self._thread = None
+        if bans is not None:
+            self.load(bans)
+
+    @classmethod
+    def build(cls, tshock, follow : bool = True) -> "BanIndex":
+        """Builds an index from a server.
+
+        :param TShock tshock:
+            The client to read the bans with, also used by :py:meth:`sync`.
+
+        :param bool follow:
+            Whether to apply ban changes made through ``tshock`` to the index.
+
+        **endpoint:** /v2/bans/list
+        """
+        index = cls()
+        index.tshock = tshock
+        index.sync()
+        if follow:
+            tshock.add_listener(index.on_reply)
+        return index
+
+    def sync(self):
+        """Replaces the index with the current ban list of the server.
+
+        Bans added or removed while the list is fetched are applied again on top of it.
+
+        **endpoint:** /v2/bans/list
+        """
+        log = []
+        with self._lock:
+            self._logs.append(log)
+            marked = self._marked
+        try:
+            bans = self.tshock.get_ban_list()["bans"]
+        except BaseException:
+            with self._lock:
+                self._logs.remove(log)
+            raise
+        self._load(bans, log, marked)
+
+    def load(self, bans : list):
+        """Replaces the whole index.
+
+        :param list bans:
+            Dicts with the ``name``, ``ip`` and ``reason`` of each ban.
+        """
+        self._load(bans, None)
+
+    def _load(self, bans, log, marked = None):
+        ips, names, ranges = {}, {}, {}
+        for ban in bans:
+            _add(ips, names, ranges, ban)
+        with self._lock:
+            if log is not None:
+                self._logs.remove(log)
+                for change, args in log:
+                    change(ips, names, ranges, *args)
+            if marked == self._marked:
+                self.stale = False
+            self._bans = _Snapshot(ips, names, ranges, _prefixes(ranges))
+            self.last_sync = time.time()
+
+    def add_ban(self, ip : str, name : str = "", reason : str = ""):
+        """Adds a ban to the index.
+
+        :param str ip:
+            The banned IP, range or an empty string.
+
+        :param str name:
+            The banned player name or an empty string.
+
+        :param str reason:
+            The reason of the ban.
+        """
+        self._change(_add, {"name": name, "ip": ip, "reason": reason})
+
+    def remove_ban(self, lookup : BanLookupType, ban : str):
+        """Removes a ban from the index.
+
+        :param BanLookupType lookup:
+            Whether ``ban`` is an IP or a name.
+
+        :param str ban:
+            The IP, range or name of the ban.
+        """
+        self._change(_remove, lookup, ban)
+
+    def _change(self, change, *args):
+        with self._lock:
+            for log in self._logs:
+                log.append((change, args))
+            bans = self._bans
+            if change(bans.ips, bans.names, bans.ranges, *args):
+                self._bans = bans._replace(prefixes=_prefixes(bans.ranges))
+
+    def find_name(self, name : str) -> dict:
+        """Returns the ban of a player name, or None if it is not banned."""
+        return self._bans.names.get(name)
+
+    def find_ip(self, ip : str) -> dict:
+        """Returns the ban covering an IP address, or None if it is not banned."""
+        bans = self._bans
+        ban = bans.ips.get(ip)
+        if ban is None and bans.prefixes:
+            ban = _find_range(bans, ip)
+        return ban
+
+    def check_many(self, ips) -> dict:
+        """Checks many IP addresses in a single pass.
+
+        :param ips:
+            An iterable of IP addresses.
+
+        :returns:
+            A dict mapping every banned address to its ban. Addresses that are not banned are left out.
+        """
+        bans = self._bans
+        exact = bans.ips
+        banned = {}
+        for ip in ips:
+            ban = exact.get(ip)
+            if ban is None and bans.prefixes:
+                ban = _find_range(bans, ip)
+            if ban is not None:
+                banned[ip] = ban
+        return banned
+
+    def start(self, interval : float):
+        """Resyncs the index every ``interval`` seconds on a daemon thread.
+        A failed resync keeps the current index and is stored in :py:attr:`last_error`.
+
+        :param float interval:
+            Seconds between two resyncs.
+        """
+        self.stop()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the resyncs started by :py:meth:`start`."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def on_reply(self, endpoint : str, params : dict, results : dict):
+        """Listener applying ban changes; see :py:meth:`~pyshock.tshock.TShock.add_listener`."""
+        if endpoint == "/bans/create":
+            self.add_ban(params["ip"], params.get("name", ""), params.get("reason", ""))
+        elif endpoint == "/v2/players/ban":
+            # The server bans the player's IP along with the name, but does not send it back.
+            ip = self._player_ip(params["player"], results)
+            self.add_ban(ip, params["player"], params.get("reason", ""))
+            if not ip:
+                self._mark_stale()
+        elif endpoint == "/v2/bans/destroy":
+            self.remove_ban(BanLookupType(params["type"]), params["ban"])
+
+    def _player_ip(self, player, results):
+        """Returns the IP of a banned player from the reply or a cached player info, or an empty string."""
+        ip = results.get("ip")
+        if not ip and self.tshock is not None:
+            info = self.tshock._cached(self.tshock.urls.build(ENDPOINTS["get_player_info"], (player,)))
+            ip = info.get("ip") if info is not None else None
+        return ip or ""
+
+    def _mark_stale(self):
+        """Flags the index as missing a ban and resyncs it on a daemon thread."""
+        with self._lock:
+            self.stale = True
+            self._marked += 1
+            if self.tshock is None or self._resyncing:
+                return
+            self._resyncing = True
+        threading.Thread(target=self._resync, daemon=True).start()
+
+    def _resync(self):
+        while True:
+            try:
+                with priority(RequestPriority.Background):
+                    self.sync()
+                self.last_error = None
+            except ApiException as e:
+                self.last_error = e
+                with self._lock:
+                    self._resyncing = False
+                return
+            with self._lock:
+                if not self.stale:
+                    self._resyncing = False
+                    return
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                with priority(RequestPriority.Background):
+                    self.sync()
+                self.last_error = None
+            except ApiException as e:
+                self.last_error = e
+
+def _add(ips, names, ranges, ban):
+    """Adds a ban to the tables and returns whether it added a range prefix."""
+    if ban["name"]:
+        names[ban["name"]] = ban
+    if not ban["ip"]:
+        return False
+    key = _parse_range(ban["ip"])
+    if key is None:
+        ips[ban["ip"]] = ban
+        return False
+    table = ranges.get(key[0])
+    if table is None:
+        ranges[key[0]] = {key[1]: ban}
+        return True
+    table[key[1]] = ban
+    return False
+
+def _remove(ips, names, ranges, lookup, ban):
+    """Removes a ban from the tables and returns whether it removed a range prefix."""
+    if lookup == BanLookupType.Name:
+        removed = names.pop(ban, None)
+        return _remove_ip(ips, ranges, removed["ip"])[1] if removed is not None and removed["ip"] else False
+    removed, emptied = _remove_ip(ips, ranges, ban)
+    if removed is not None and removed["name"] and names.get(removed["name"]) is removed:
+        del names[removed["name"]]
+    return emptied
+
+def _remove_ip(ips, ranges, ip):
+    """Removes the ban of an IP or range and returns it, and whether its range prefix is now unused."""
+    removed = ips.pop(ip, None)
+    key = _parse_range(ip)
+    table = ranges.get(key[0]) if key is not None else None
+    if table is None:
+        return removed, False
+    removed = table.pop(key[1], None)
+    if table:
+        return removed, False
+    del ranges[key[0]]
+    return removed, True
+
+_EMPTY = {}
+
+def _prefixes(ranges):
+    return sorted(ranges, key=lambda key: key[1], reverse=True)
+
+def _find_range(bans, ip):
+    try:
+        if ":" in ip:
+            version, bits, value = 6, 128, int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), "big")
+        else:
+            version, bits, value = 4, 32, int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+    except OSError:
+        return None
+    for key in bans.prefixes:
+        if key[0] == version:
+            # A prefix may have been removed since the snapshot's prefixes were listed.
+            ban = bans.ranges.get(key, _EMPTY).get(value >> (bits - key[1]))
+            if ban is not None:
+                return ban
+    return None
+
+def _parse_range(ip):
+    """Returns ``((version, prefixlen), network)`` for a ranged ban IP, or None for a single address."""
+    if ip.endswith("*"):
+        octets = [octet for octet in ip.rstrip("*").split(".") if octet]
+        ip = "{0}/{1}".format(".".join(octets + ["0"] * (4 - len(octets))), 8 * len(octets))
+    if "/" not in ip:
+        return None
+    try:
+        network = ipaddress.ip_network(ip, strict=False)
+    except ValueError:
+        return None
+    bits = network.max_prefixlen
+    return (network.version, network.prefixlen), int(network.network_address) >> (bits - network.prefixlen)
@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pyshock.exceptions import ApiException
+from pyshock.scheduler import submit
+
+BatchItem = namedtuple("BatchItem", ["item", "reply", "exception"])
+BatchItem.__doc__ = """The outcome of one item of a batch.
+``reply`` is the reply dict, or None if the request raised ``exception``."""
+
+class RateLimiter():
+    """A thread-safe token bucket.
+
+    Tokens are added at ``rate`` per second up to ``burst``. Each request takes one token;
+    when the bucket is empty the request waits until its token has been added.
+
+    :param float rate:
+        The sustained number of requests per second.
+
+    :param int burst:
+        (Optional) The number of requests allowed back to back. Defaults to one.
+    """
+    def __init__(self, rate : float, burst : int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token.
+
+        :returns:
+            The number of seconds to wait before using it.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self):
+        """Takes a token, sleeping until it may be used."""
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        """Takes a token, awaiting until it may be used."""
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+class BatchResult():
+    """The outcome of a batch, one :py:class:`BatchItem` per item in the order they were given.
+    A batch never raises ApiExceptions; they are collected here instead.
+    """
+    def __init__(self, items : list):
+        self.items = items
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __repr__(self):
+        return "<BatchResult {0} succeeded, {1} failed>".format(len(self.succeeded), len(self.failed))
+
+    @property
+    def succeeded(self) -> list:
+        """The items whose request succeeded."""
+        return [item for item in self.items if item.exception is None]
+
+    @property
+    def failed(self) -> list:
+        """The items whose request raised an ApiException."""
+        return [item for item in self.items if item.exception is not None]
+
+    @property
+    def ok(self) -> bool:
+        """True if every request succeeded."""
+        return all(item.exception is None for item in self.items)
+
+def _limiter(rate):
+    if rate is None or isinstance(rate, RateLimiter):
+        return rate
+    return RateLimiter(rate)
+
+def run_batch(function, items, max_in_flight : int = 4, rate = None) -> BatchResult:
+    """Calls ``function`` once per item on a thread pool.
+
+    :param function:
+        Called with each item.
+
+    :param items:
+        An iterable of items.
+
+    :param int max_in_flight:
+        The maximum number of calls running at once.
+
+    :param rate:
+        (Optional) The maximum number of calls started per second, or a
+        :py:class:`RateLimiter` shared with other batches.
+    """
+    limiter = _limiter(rate)
+
+    def call(item):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return BatchItem(item, function(item), None)
+        except ApiException as e:
+            return BatchItem(item, None, e)
+
+    items = list(items)
+    if not items:
+        return BatchResult([])
+    with ThreadPoolExecutor(max_workers=min(max_in_flight, len(items))) as pool:
+        futures = [submit(pool, call, item) for item in items]
+        return BatchResult([future.result() for future in futures])
+
+async def run_batch_async(function, items, max_in_flight : int = 4, rate = None) -> BatchResult:
+    """Same as :py:func:`run_batch` for a coroutine function, running on the event loop."""
+    limiter = _limiter(rate)
+    semaphore = asyncio.Semaphore(max_in_flight)
+
+    async def call(item):
+        async with semaphore:
+            if limiter is not None:
+                await limiter.acquire_async()
+            try:
+                return BatchItem(item, await function(item), None)
+            except ApiException as e:
+                return BatchItem(item, None, e)
+
+    return BatchResult(list(await asyncio.gather(*[call(item) for item in items])))
@@ -0,0 +1,196 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pyshock.batch import RateLimiter
+from pyshock.exceptions import ApiException
+
+class BroadcastQueue():
+    """Merges bursts of :py:meth:`~pyshock.tshock.TShock.do_server_broadcast` calls into
+    fewer, multi-line broadcasts.
+
+    Messages are queued per server with :py:meth:`send`, which returns at once. The first
+    message queued for a server opens a window of ``window`` seconds; every message arriving
+    in it joins the same broadcast, one per line, and identical messages are only sent once.
+    Each server has its own :py:class:`~pyshock.batch.RateLimiter`, so a server never gets
+    more than ``rate`` broadcasts per second; messages arriving while it waits are merged
+    into its next broadcast. Broadcasts to different servers are sent concurrently on up to
+    ``max_workers`` threads, and a slow server does not hold up the others.
+
+    A failed broadcast is dropped and stored in :py:attr:`last_error`. Call :py:meth:`close`
+    (or use the queue as a context manager) to send what is still queued before exiting.
+
+    Example usage of the API:
+
+    >>> with pyshock.BroadcastQueue(fleet, window=1.0, rate=0.5) as broadcasts:
+    ...     for seconds in (5, 4, 3, 2, 1):
+    ...         broadcasts.send("Restart in {0}...".format(seconds))
+    ...         time.sleep(1)
+
+    :param servers:
+        A :py:class:`~pyshock.tshock.TShock`, a :py:class:`~pyshock.fleet.TShockFleet`
+        (servers added to it later are included) or a dict mapping names to TShock instances.
+
+    :param float window:
+        Seconds to wait for more messages after the first one of a broadcast.
+
+    :param float rate:
+        The maximum number of broadcasts per second to each server.
+
+    :param int burst:
+        (Optional) The number of broadcasts a server may get back to back. Defaults to one.
+
+    :param int max_lines:
+        The most messages merged into one broadcast. The rest go into the next one.
+
+    :param str separator:
+        What merged messages are joined with.
+
+    :param int max_workers:
+        The maximum number of broadcasts in flight at once.
+    """
+    def __init__(self, servers, window : float = 0.5, rate : float = 1.0, burst : int = 1, max_lines : int = 8,
+                 separator : str = "\n", max_workers : int = 16):
+        if hasattr(servers, "do_server_broadcast"):
+            servers = {"{0}:{1}".format(servers.ip, servers.port): servers}
+        elif not isinstance(servers, dict):
+            servers = servers.servers
+        self.servers = servers
+        self.window = window
+        self.rate = rate
+        self.burst = burst
+        self.max_lines = max_lines
+        self.separator = separator
+        self.last_error = None
+        self.messages = 0
+        self.duplicates = 0
+        self.broadcasts = 0
+        self.failures = 0
+        self._channels = {}
+        self._closed = False
+        self._condition = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def send(self, message : str, servers = None):
+        """Queues a message for broadcasting.
+
+        :param str message:
+            The message to broadcast.
+
+        :param servers:
+            (Optional) The names of the servers to broadcast to. Defaults to every server.
+        """
+        now = time.monotonic()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The broadcast queue is closed.")
+            for name in self.servers if servers is None else servers:
+                if name not in self.servers:
+                    raise KeyError("Unknown server {0!r}.".format(name))
+                channel = self._channels.get(name)
+                if channel is None:
+                    channel = self._channels[name] = _Channel(RateLimiter(self.rate, self.burst))
+                self.messages += 1
+                if message in channel.messages:
+                    self.duplicates += 1
+                    continue
+                if not channel.messages:
+                    channel.due = now + self.window
+                channel.messages[message] = None
+            self._condition.notify_all()
+
+    def flush(self):
+        """Sends every queued message without waiting for the end of its window,
+        and returns once they have all been sent or have failed."""
+        with self._condition:
+            for channel in self._channels.values():
+                channel.due = 0.0
+            self._condition.notify_all()
+            while any(channel.messages or channel.busy for channel in self._channels.values()):
+                self._condition.wait()
+
+    def close(self):
+        """Sends every queued message and stops the queue. Further messages are refused."""
+        with self._condition:
+            self._closed = True
+        self.flush()
+        with self._condition:
+            self._condition.notify_all()
+        self._thread.join()
+        self._pool.shutdown()
+
+    def stats(self) -> dict:
+        """Returns the queue statistics.
+
+        :returns:
+            A dict with these items:
+                * messages - Messages queued, counted once per server
+                * duplicates - Messages dropped as identical to one already queued
+                * broadcasts - Broadcasts sent
+                * failures - Broadcasts that raised an ApiException
+                * queued - Messages waiting to be sent
+        """
+        with self._condition:
+            return {"messages": self.messages, "duplicates": self.duplicates, "broadcasts": self.broadcasts,
+                    "failures": self.failures,
+                    "queued": sum(len(channel.messages) for channel in self._channels.values())}
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    ready = [(name, channel) for name, channel in self._channels.items()
+                             if channel.messages and not channel.busy and channel.due <= now]
+                    if ready:
+                        break
+                    if self._closed and not any(channel.messages or channel.busy for channel in self._channels.values()):
+                        return
+                    waiting = [channel.due for channel in self._channels.values() if channel.messages and not channel.busy]
+                    self._condition.wait(max(0.0, min(waiting) - now) if waiting else None)
+                batches = []
+                for name, channel in ready:
+                    lines = list(channel.messages)[:self.max_lines]
+                    for line in lines:
+                        del channel.messages[line]
+                    channel.busy = True
+                    batches.append((name, channel, self.separator.join(lines)))
+            for name, channel, text in batches:
+                self._pool.submit(self._deliver, name, channel, text)
+
+    def _deliver(self, name, channel, text):
+        failed = True
+        try:
+            channel.limiter.acquire()
+            # The server may have been removed from the fleet since the message was queued.
+            tshock = self.servers.get(name)
+            if tshock is not None:
+                tshock.do_server_broadcast(text)
+                failed = False
+        except ApiException as e:
+            self.last_error = e
+        finally:
+            with self._condition:
+                channel.busy = False
+                if failed:
+                    self.failures += 1
+                else:
+                    self.broadcasts += 1
+                self._condition.notify_all()
+
+class _Channel():
+    """The messages queued for one server, in the order they were sent."""
+    __slots__ = ("messages", "due", "busy", "limiter")
+
+    def __init__(self, limiter):
+        self.messages = {}
+        self.due = 0.0
+        self.busy = False
+        self.limiter = limiter
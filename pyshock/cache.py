@@ -0,0 +1,164 @@
+import threading
+import time
+from collections import OrderedDict
+
+class ResponseCache():
+    """A bounded LRU cache of REST replies for the read-only ``get_`` endpoints.
+
+    Pass an instance to :py:class:`~pyshock.tshock.TShock` to enable it. Replies are kept
+    per url, so different parameters or tokens never share an entry. Every endpoint has its
+    own time to live in seconds; endpoints without one are never cached. Requests to a write
+    endpoint evict every endpoint it changes, listed in :py:attr:`INVALIDATIONS`, whether they
+    succeed or fail. A reply fetched while its endpoint was being evicted is not stored.
+
+    Cached dicts are shared between callers and must not be modified.
+
+    Example usage of the API:
+
+    >>> cache = pyshock.ResponseCache({"/v2/groups/list": 120})
+    >>> tshock = pyshock.TShock("127.0.0.1", 7878, cache=cache)
+    >>> tshock.get_group_list()
+    >>> tshock.get_group_list()
+    >>> cache.stats()
+    {'hits': 1, 'misses': 1, 'evictions': 0, 'size': 1}
+
+    :param dict ttls:
+        (Optional) Mapping of endpoint path to time to live in seconds.
+        Defaults to :py:attr:`DEFAULT_TTLS`.
+
+    :param int max_entries:
+        The maximum number of replies held before the least recently used is dropped.
+    """
+    DEFAULT_TTLS = {
+        "/v2/groups/list": 60,
+        "/v2/groups/read": 60,
+        "/v2/bans/list": 30,
+        "/v2/bans/read": 30,
+        "/v3/server/rules": 300,
+        "/world/read": 5,
+    }
+
+    INVALIDATIONS = {
+        "/v2/groups/create": ("/v2/groups/list", "/v2/groups/read"),
+        "/v2/groups/destroy": ("/v2/groups/list", "/v2/groups/read"),
+        "/v2/groups/update": ("/v2/groups/list", "/v2/groups/read"),
+        "/bans/create": ("/v2/bans/list", "/v2/bans/read"),
+        "/v2/bans/destroy": ("/v2/bans/list", "/v2/bans/read"),
+        "/v2/players/ban": ("/v2/bans/list", "/v2/bans/read"),
+    }
+
+    def __init__(self, ttls : dict = None, max_entries : int = 1024):
+        self.ttls = dict(self.DEFAULT_TTLS if ttls is None else ttls)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        # Bumped by every eviction of an endpoint, to drop replies fetched before it.
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, endpoint : str, url : str):
+        """Looks up the cached reply for a url.
+
+        :param str endpoint:
+            The path of the url, e.g. ``"/v2/groups/list"``.
+
+        :param str url:
+            The full url of the request.
+
+        :returns:
+            The cached dict, or None if the endpoint is not cached or the entry is missing or expired.
+        """
+        if endpoint not in self.ttls:
+            return None
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(url)
+            self.hits += 1
+            return entry[2]
+
+    def generation(self, endpoint : str) -> int:
+        """Returns the number of times an endpoint was evicted, to pass to :py:meth:`store`.
+
+        :param str endpoint:
+            The path of the url.
+        """
+        return self._generations.get(endpoint, 0)
+
+    def store(self, endpoint : str, url : str, results : dict, generation : int = None):
+        """Stores a reply if its endpoint is cached, and evicts the endpoints a write endpoint changes.
+
+        :param str endpoint:
+            The path of the url.
+
+        :param str url:
+            The full url of the request.
+
+        :param dict results:
+            The reply, already checked by :py:func:`~pyshock.tshock.check_response`.
+
+        :param int generation:
+            (Optional) The :py:meth:`generation` of the endpoint before the request was sent.
+            The reply is dropped if the endpoint was evicted since.
+        """
+        if endpoint in self.INVALIDATIONS:
+            self.invalidate(*self.INVALIDATIONS[endpoint])
+            return
+        ttl = self.ttls.get(endpoint)
+        if not ttl or results["status"] != "200":
+            return
+        with self._lock:
+            if generation is not None and generation != self._generations.get(endpoint, 0):
+                return
+            self._entries[url] = (time.monotonic() + ttl, endpoint, results)
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *endpoints : str):
+        """Drops every cached reply of the given endpoints.
+
+        :param str endpoints:
+            The paths to drop, e.g. ``"/v2/bans/list"``.
+        """
+        with self._lock:
+            for endpoint in endpoints:
+                self._generations[endpoint] = self._generations.get(endpoint, 0) + 1
+            for url in [url for url, entry in self._entries.items() if entry[1] in endpoints]:
+                del self._entries[url]
+
+    def failed(self, endpoint : str):
+        """Evicts the endpoints a write endpoint changes after a request to it failed,
+        since the server may have applied it before the failure.
+
+        :param str endpoint:
+            The path of the url.
+        """
+        if endpoint in self.INVALIDATIONS:
+            self.invalidate(*self.INVALIDATIONS[endpoint])
+
+    def clear(self):
+        """Drops every cached reply. Statistics are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Returns the hit and miss statistics.
+
+        :returns:
+            A dict with these items:
+                * hits - Lookups answered from the cache
+                * misses - Lookups of cached endpoints that went to the server
+                * evictions - Entries dropped to stay under ``max_entries``
+                * size - Entries currently held
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": len(self._entries)}
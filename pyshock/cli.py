@@ -0,0 +1,256 @@
+"""The ``pyshock`` command line interface.
+
+Every function of :py:class:`~pyshock.tshock.TShock` is a subcommand taking the same arguments.
+Required arguments are positional, optional ones are options::
+
+    pyshock --server 127.0.0.1:7878 --user admin --password secret get_player_list
+    pyshock -s eu=10.0.0.1:7878 -s us=10.0.0.2:7878 --token ABC do_server_broadcast "Restart in 5 minutes"
+    pyshock get_server_status_v2 --players --filters team=1
+
+The reply is printed as JSON. With several servers, one JSON line is printed per server.
+
+``pyshock batch [FILE]`` reads one JSON command per line from a file or stdin, runs them
+concurrently and prints one JSON result per line as soon as it is available::
+
+    {"id": 1, "method": "do_kick_player", "args": ["Griefer", "Griefing"], "server": "eu"}
+    {"id": 2, "method": "get_server_status_v2", "kwargs": {"players": true}}
+
+Commands without a ``server`` run on every server. Results carry the ``id`` of their command,
+or its line number, and either a ``reply`` or an ``error``.
+
+Only the argument parser is loaded up front; the clients, and with them ``requests``, are only
+imported once a command runs.
+"""
+import argparse
+import json
+import os
+import sys
+from enum import Enum
+from pyshock.endpoints import ENDPOINTS, REQUIRED
+
+DEFAULT_SERVER = "127.0.0.1:7878"
+# Arguments that hand-written functions (registry entries without a doc) fill in themselves,
+# so their subcommands do not take them. Kept here rather than read from the signatures,
+# which would mean importing the clients just to build the parser.
+_FILLED_IN = {"do_destroy_token": ("token",)}
+
+def build_parser() -> argparse.ArgumentParser:
+    """Builds the argument parser, with one subcommand per endpoint of the registry."""
+    parser = argparse.ArgumentParser(prog="pyshock", description="Calls the TShock REST API of one or more servers.")
+    parser.add_argument("-s", "--server", action="append", dest="servers", metavar="[NAME=]HOST:PORT",
+                        help="a server to call, may be repeated (default: $PYSHOCK_SERVER or {0})".format(DEFAULT_SERVER))
+    parser.add_argument("--token", dest="login_token", default=os.environ.get("PYSHOCK_TOKEN", ""),
+                        help="the token to use (default: $PYSHOCK_TOKEN)")
+    parser.add_argument("--user", dest="login_user", default=os.environ.get("PYSHOCK_USER"),
+                        help="the user to obtain a token for (default: $PYSHOCK_USER)")
+    parser.add_argument("--password", dest="login_password", default=os.environ.get("PYSHOCK_PASSWORD"),
+                        help="the user's password (default: $PYSHOCK_PASSWORD)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait for a reply")
+    # The subcommand arguments share the namespace, so the global options use their own dests.
+    commands = parser.add_subparsers(dest="function", metavar="COMMAND", required=True)
+    for endpoint in ENDPOINTS.values():
+        summary = endpoint.doc.strip().splitlines()[0] if endpoint.doc else "Calls {0}.".format(endpoint.path)
+        command = commands.add_parser(endpoint.name, help=summary, description=summary)
+        for param in _params(endpoint):
+            _add_argument(command, param)
+    batch = commands.add_parser("batch", help="Runs JSON-lines commands concurrently.",
+                                description="Runs JSON-lines commands concurrently and prints JSON-lines results.")
+    batch.add_argument("file", nargs="?", default="-", help="the file to read commands from (default: stdin)")
+    batch.add_argument("--max-in-flight", type=int, default=8, help="the maximum number of commands running at once")
+    return parser
+
+def main(argv : list = None) -> int:
+    """Runs the command line interface and returns the exit status.
+    This is the ``pyshock`` console script.
+    """
+    args = build_parser().parse_args(argv)
+    try:
+        if args.function == "batch":
+            return run_batch(args)
+        return run_command(args)
+    except KeyboardInterrupt:
+        return 130
+    except BrokenPipeError:
+        # The reader went away, e.g. ``| head``; nothing is left to print to.
+        sys.stdout = None
+        return 1
+
+def run_command(args) -> int:
+    """Calls one function on every server."""
+    endpoint = ENDPOINTS[args.function]
+    kwargs = {param.name: _from_cli(param, getattr(args, param.name)) for param in _params(endpoint)}
+    status = 0
+    with _connect(args) as fleet:
+        single = len(fleet.servers) == 1
+        for name, reply in fleet.map(args.function, **kwargs):
+            if args.function == "get_token" and not isinstance(reply, Exception):
+                reply = _keep_token(fleet.servers[name])
+            if isinstance(reply, Exception):
+                status = 1
+                if single:
+                    print("pyshock: {0}".format(reply), file=sys.stderr)
+                else:
+                    _emit({"server": name, "error": str(reply), "type": type(reply).__name__})
+            elif single:
+                print(json.dumps(reply, indent=2, default=_jsonable))
+            else:
+                _emit({"server": name, "reply": reply})
+    return status
+
+def run_batch(args) -> int:
+    """Runs the JSON-lines commands of a file or stdin concurrently."""
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+    stream = sys.stdin if args.file == "-" else open(args.file, encoding="utf-8")
+    pending = set()
+    failed = False
+    with _connect(args) as fleet:
+        pool = ThreadPoolExecutor(max_workers=args.max_in_flight)
+        try:
+            for number, line in enumerate(stream, 1):
+                if not line.strip():
+                    continue
+                try:
+                    jobs = _jobs(fleet, json.loads(line), number)
+                except (ValueError, TypeError, KeyError) as e:
+                    failed = True
+                    _emit({"id": number, "error": str(e), "type": type(e).__name__})
+                    continue
+                for job in jobs:
+                    # Keep reading while results stream out, without queueing the whole input.
+                    if len(pending) >= 4 * args.max_in_flight:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        failed = _emit_done(done) or failed
+                    pending.add(pool.submit(*job))
+                done, pending = wait(pending, timeout=0)
+                failed = _emit_done(done) or failed
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                failed = _emit_done(done) or failed
+        finally:
+            pool.shutdown(cancel_futures=True)
+            if stream is not sys.stdin:
+                stream.close()
+    return 1 if failed else 0
+
+def _connect(args):
+    from pyshock.fleet import TShockFleet
+    fleet = TShockFleet(max_workers=16, timeout=args.timeout)
+    for spec in args.servers or [os.environ.get("PYSHOCK_SERVER", DEFAULT_SERVER)]:
+        name, _, address = spec.rpartition("=")
+        host, _, port = address.rpartition(":")
+        if not host or not port.isdigit():
+            raise SystemExit("pyshock: invalid server {0!r}, expected [NAME=]HOST:PORT".format(spec))
+        fleet.add_server(name or address, host, int(port), args.login_token, args.login_user, args.login_password)
+    return fleet
+
+def _jobs(fleet, command : dict, number : int) -> list:
+    """Turns a batch command into ``(function, arguments...)`` tuples, one per server."""
+    method = command["method"]
+    if method not in ENDPOINTS and not method.startswith(("get_", "set_", "do_")):
+        raise ValueError("Unknown method {0!r}.".format(method))
+    args = list(command.get("args", ()))
+    kwargs = dict(command.get("kwargs", {}))
+    servers = [command["server"]] if command.get("server") else list(fleet.servers)
+    for server in servers:
+        if server not in fleet.servers:
+            raise KeyError("Unknown server {0!r}.".format(server))
+    return [(_run_job, fleet.servers[server], server, command.get("id", number), method, args, kwargs)
+            for server in servers]
+
+def _run_job(tshock, server, key, method, args, kwargs) -> dict:
+    result = {"id": key, "server": server, "method": method}
+    try:
+        result["reply"] = _call(tshock, method, args, kwargs)
+    except Exception as e:
+        result["error"] = str(e)
+        result["type"] = type(e).__name__
+    return result
+
+def _call(tshock, method : str, args : list, kwargs : dict):
+    endpoint = ENDPOINTS.get(method)
+    if endpoint is not None:
+        args, kwargs = _coerce(endpoint, args, kwargs)
+    function = getattr(tshock, method, None)
+    if function is None or method.startswith("_"):
+        raise ValueError("Unknown method {0!r}.".format(method))
+    reply = function(*args, **kwargs)
+    if method == "get_token":
+        return _keep_token(tshock)
+    return reply
+
+def _keep_token(tshock) -> dict:
+    # Reassigning the token hands it over to the caller, so closing the client keeps it valid.
+    tshock.token = tshock.token
+    return {"token": tshock.token}
+
+def _params(endpoint) -> list:
+    """Returns the parameters of an endpoint that its function takes as arguments."""
+    filled_in = _FILLED_IN.get(endpoint.name, ())
+    return [param for param in endpoint.params if param.name not in filled_in]
+
+def _coerce(endpoint, args : list, kwargs : dict):
+    """Converts JSON strings to the Enum values the endpoint expects."""
+    params = _params(endpoint)
+    args = [_enum(param, value) for param, value in zip(params, args)] + args[len(params):]
+    params = {param.name: param for param in params}
+    kwargs = {name: _enum(params[name], value) if name in params else value for name, value in kwargs.items()}
+    return args, kwargs
+
+def _enum(param, value):
+    if isinstance(param.type, type) and issubclass(param.type, Enum) and not isinstance(value, Enum):
+        return param.type(value)
+    return value
+
+def _add_argument(parser, param):
+    flag = param.name if param.default is REQUIRED else "--" + param.name
+    if param.type is bool:
+        if param.default is False:
+            parser.add_argument(flag, action="store_true")
+        else:
+            parser.add_argument(flag, type=_boolean, default=param.default, metavar="true|false")
+    elif param.type is dict:
+        parser.add_argument(flag, action="append", metavar="KEY=VALUE", default=None)
+    elif isinstance(param.type, type) and issubclass(param.type, Enum):
+        parser.add_argument(flag, choices=[member.value for member in param.type],
+                            **({} if param.default is REQUIRED else {"default": param.default}))
+    else:
+        parser.add_argument(flag, **({} if param.default is REQUIRED else {"default": param.default}))
+
+def _from_cli(param, value):
+    if param.type is dict and value is not None:
+        items = {}
+        for item in value:
+            key, _, setting = item.partition("=")
+            items[key] = setting
+        return items
+    return _enum(param, value) if value is not None else value
+
+def _boolean(value : str) -> bool:
+    lowered = value.lower()
+    if lowered in ("true", "yes", "1"):
+        return True
+    if lowered in ("false", "no", "0"):
+        return False
+    raise argparse.ArgumentTypeError("expected true or false, got {0!r}".format(value))
+
+def _emit_done(futures) -> bool:
+    failed = False
+    for future in futures:
+        result = future.result()
+        failed = failed or "error" in result
+        _emit(result)
+    return failed
+
+def _emit(record : dict):
+    sys.stdout.write(json.dumps(record, default=_jsonable) + "\n")
+    sys.stdout.flush()
+
+def _jsonable(value):
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    if hasattr(value, "succeeded") and hasattr(value, "items"):
+        return [{"item": item.item, "reply": item.reply, "error": str(item.exception) if item.exception else None}
+                for item in value]
+    if isinstance(value, Enum):
+        return value.value
+    return str(value)
@@ -0,0 +1,610 @@
+from enum import Enum
+from string import Formatter
+from urllib.parse import quote, quote_plus
+from pyshock.enums import BanLookupType, RequestPriority, UserLookupType
+from pyshock.models import Ban, Group, Player, ServerStatus, User, items
+
+REQUIRED = object()
+
+def encode(value) -> str:
+    """Formats an argument the way the TShock REST API expects it,
+    in a query parameter as well as in a path segment.
+    """
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, Enum):
+        return value.value
+    if value is None:
+        return ""
+    return str(value)
+
+class Param():
+    """One argument of an endpoint.
+
+    :param str name:
+        The name of the argument of the generated function.
+
+    :param type:
+        The type of the argument: ``str``, ``bool``, an Enum, or ``dict`` for a
+        mapping whose items are all sent as query parameters.
+
+    :param str query:
+        (Optional) The name of the query parameter, if it differs from ``name``.
+        Unused when the argument appears in the path.
+
+    :param default:
+        (Optional) The default value. Arguments without one are required. A query
+        parameter whose value is None is left out of the url, so an update leaves it unchanged.
+    """
+    __slots__ = ("name", "type", "query", "default")
+
+    def __init__(self, name : str, type = str, query : str = None, default = REQUIRED):
+        self.name = name
+        self.type = type
+        self.query = query or name
+        self.default = default
+
+    def __repr__(self):
+        return "Param({0!r})".format(self.name)
+
+class Endpoint():
+    """One REST endpoint of the TShock server and the function that calls it.
+
+    The url is split up once, when the endpoint is declared, into the path template
+    and the quoted ``name=`` prefix of every query parameter, so building a url for a
+    request only quotes the argument values.
+
+    :param str name:
+        The name of the generated :py:class:`~pyshock.tshock.TShock` function.
+
+    :param str version:
+        The API version prefix of the path, e.g. ``"v2"``, or an empty string.
+
+    :param str path:
+        The rest of the path. Arguments may be placed in it as ``{name}``.
+
+    :param list params:
+        The :py:class:`Param` of every argument, in the order of the function signature.
+
+    :param bool read:
+        Whether the endpoint only reads data, which makes it safe to repeat, cache or share.
+        Defaults to True for names starting with ``get_``.
+
+    :param str doc:
+        The docstring of the generated function.
+
+    :param model:
+        (Optional) Converts the reply for clients created with ``typed=True``, e.g. the
+        ``from_reply`` of a :py:class:`~pyshock.models.Model`.
+
+    :param RequestPriority priority:
+        (Optional) The priority of requests to the endpoint in a
+        :py:class:`~pyshock.scheduler.RequestScheduler`. Defaults to ``Interactive`` for
+        endpoints that only read and ``AdminWrite`` for the others.
+    """
+    __slots__ = ("name", "version", "path", "params", "read", "doc", "model", "priority", "_segments", "_query", "_spread")
+
+    def __init__(self, name : str, version : str, path : str, params : list, read : bool = None, doc : str = None,
+                 model = None, priority : RequestPriority = None):
+        self.name = name
+        self.version = version
+        self.path = "/" + "/".join(part for part in (version, path) if part)
+        self.params = tuple(params)
+        self.read = name.startswith("get_") if read is None else read
+        self.doc = doc
+        self.model = model
+        if priority is None:
+            priority = RequestPriority.Interactive if self.read else RequestPriority.AdminWrite
+        self.priority = priority
+        segments = set(field for _, field, _, _ in Formatter().parse(path) if field)
+        self._segments = tuple((param.name, index) for index, param in enumerate(self.params) if param.name in segments)
+        self._query = tuple((index, quote_plus(param.query) + "=") for index, param in enumerate(self.params)
+                            if param.name not in segments and param.type is not dict)
+        self._spread = tuple(index for index, param in enumerate(self.params) if param.type is dict)
+
+    def __repr__(self):
+        return "<Endpoint {0} {1}>".format(self.name, self.path)
+
+    def url(self, base : str, values : tuple, token_query : str) -> str:
+        """Fills in the url template.
+
+        :param str base:
+            The scheme, host and port, e.g. ``"http://127.0.0.1:7878"``.
+
+        :param tuple values:
+            The argument values, in the order of :py:attr:`params`.
+
+        :param str token_query:
+            The already encoded ``token=...`` query parameter.
+        """
+        path = self.path
+        if self._segments:
+            path = path.format(**{name: quote(encode(values[index]), safe="") for name, index in self._segments})
+        query = [key + quote_plus(encode(values[index])) for index, key in self._query if values[index] is not None]
+        for index in self._spread:
+            if values[index]:
+                query.extend(quote_plus(key) + "=" + quote_plus(encode(value)) for key, value in values[index].items())
+        query.append(token_query)
+        return "{0}{1}?{2}".format(base, path, "&".join(query))
+
+    def function(self):
+        """Generates the client function of the endpoint. It passes its arguments
+        on to ``self._request(endpoint, values)``.
+        """
+        names = [param.name for param in self.params]
+        namespace = {"endpoint": self}
+        exec("def {0}(self{1}):\n    return self._request(endpoint, ({2}))\n".format(
+            self.name,
+            "".join(", " + name for name in names),
+            "".join(name + ", " for name in names)
+        ), namespace)
+        function = namespace[self.name]
+        function.__defaults__ = tuple(param.default for param in self.params if param.default is not REQUIRED) or None
+        function.__annotations__ = {param.name: param.type for param in self.params}
+        function.__doc__ = self.doc
+        return function
+
+# Every REST endpoint the clients know about, by function name. A new endpoint only needs
+# an entry here; its TShock function is generated from it. Entries without a doc are
+# implemented by hand in TShock because they do more than return the reply.
+ENDPOINTS = {endpoint.name: endpoint for endpoint in [
+    Endpoint("get_token", "v2", "token/create/{password}",
+             [Param("user", query="username"), Param("password")], read=False,
+             priority=RequestPriority.Moderation),
+    Endpoint("get_status", "", "status", [],
+             doc="""Gets the server status.
+
+        :returns:
+            A dict with these items:
+                * name - Server name
+                * port - Server port
+                * playercount - Amount of players on the server
+                * players - CSV list of players currently connected
+
+        **endpoint:** /status
+        """, model=ServerStatus.from_reply),
+    Endpoint("get_token_status", "", "tokentest", []),
+    Endpoint("get_server_status_v2", "v2", "server/status",
+             [Param("players", bool, default=False), Param("rules", bool, default=False),
+              Param("filters", dict, default=None)],
+             doc="""Gets the server status. Includes various items based
+        on the parameters sent.
+
+        :param bool players:
+            Bool deciding if players should be included in the response.
+
+        :param bool rules:
+            Bool deciding if server config rules should be included in the response.
+
+        :param dict filters:
+            Dict of filters to be applied to the player search. May contain these items:
+                * nickname
+                * username
+                * group
+                * active
+                * state
+                * team
+
+        :returns:
+            A dict with these items:
+                * name - Server name
+                * port - Port the server is running on
+                * playercount - Number of players currently online
+                * maxplayers - The maximum number of players the server support
+                * world - The name of the currently running world
+                * players - (optional) an array of players including the following information:
+                    * nickname
+                    * username
+                    * ip
+                    * group
+                    * active
+                    * state
+                    * team
+                * rules - (optional) an array of server rules which are name value pairs e.g. AutoSave, DisableBuild etc
+
+        **endpoint:** /v2/server/status
+        """, model=ServerStatus.from_reply),
+    Endpoint("get_active_user_list", "v2", "users/activelist", [],
+             doc="""Gets the currently active players logged into a server.
+
+        :returns:
+            A dict with these items:
+                * activeusers - list of active users
+
+        **endpoint:** /v2/users/activelist
+        """),
+    Endpoint("get_user_list", "v2", "users/list", [],
+             doc="""Gets a list of all of the user accounts on the server.
+
+        :returns:
+            A dict with these items:
+                * users - An array of all the user accounts including:
+                    * name
+                    * id
+                    * group
+
+        **endpoint:** /v2/users/list
+        """, model=items("users", User)),
+    Endpoint("get_user_info", "v2", "users/read",
+             [Param("lookup", UserLookupType, query="type"), Param("user")],
+             doc="""Gets information about a specific user.
+
+        :param UserLookupType lookup:
+            Should be a value of the UserLookupType Enum stating what the
+            lookup value is.
+
+        :param str user:
+            String that is either the user name, id, or ip, depending on the
+            lookup type.
+
+        :returns:
+            A dict with these items:
+                * group - The group the user belong's to
+                * id - The user's ID
+                * name - The name of the user
+                * ip - The ip of the user
+
+        **endpoint:** /v2/users/read
+        """, model=User.from_reply),
+    Endpoint("get_ban_information", "v2", "bans/read",
+             [Param("lookup", BanLookupType, query="type"), Param("user", query="ban")],
+             doc="""Gets information about a ban.
+
+        :param BanLookupType lookup:
+            a BanLookupType value dictating how to search
+            for the user
+
+        :param str user:
+            the user info to search for
+
+        :returns:
+            a dict with these items:
+                * name - The username of the player
+                * ip - The IP address of the player
+                * reason - The reason the player was banned
+
+        **endpoint:** /v2/bans/read
+        """, model=Ban.from_reply),
+    Endpoint("get_ban_list", "v2", "bans/list", [],
+             doc="""Gets a list of all of the bans on the server.
+
+        :returns:
+            A dict with these items:
+                * bans - An array of all the currently banned players including:
+                    * name
+                    * ip
+                    * reason
+
+        **endpoint:** /v2/bans/list
+        """, model=items("bans", Ban)),
+    Endpoint("get_player_list", "v2", "players/list", [],
+             doc="""Gets a list of all of the players currently on the server.
+
+        :returns:
+            A dict with these items:
+                * players - A list of all current players on the server, separated by a comma.
+
+        **endpoint:** /v2/players/list
+        """),
+    Endpoint("get_player_info", "v2", "players/read",
+             [Param("player")],
+             doc="""Gets information about a specific player.
+
+        :param str player:
+            The player to look for, by name.
+
+        :returns:
+            A dict with these items:
+                * nickname - The player's nickname
+                * username - The player's username (if they are registered)
+                * ip - The player's IP address
+                * group - The group that the player belongs to
+                * position - The player's current position on the map
+                * inventory - A list of all items in the player's inventory
+                * buffs - A list of all buffs that are currently affecting the player
+
+        **endpoint:** /v2/players/read
+        """, model=Player.from_reply),
+    Endpoint("get_world_info", "", "world/read", [],
+             doc="""Gets some information about the current world.
+
+        :returns:
+            A dict with these items:
+                * name - The world name
+                * size - The dimensions of the world
+                * time - The current time in the world
+                * daytime - Bool value indicating whether it is daytime or not
+                * bloodmoon - Bool value indicating whether there is a blood moon or not
+                * invasionsize - The current invasion size
+
+        **endpoint:** /world/read
+        """),
+    Endpoint("get_group_list", "v2", "groups/list", [],
+             doc="""Returns a list of all of the groups on the server.
+
+        :returns:
+            A dict with these items:
+                * groups - An array of the groups configured on the server including:
+                    * name
+                    * parent
+                    * chatcolor
+
+        **endpoint:** /v2/groups/list
+        """, model=items("groups", Group)),
+    Endpoint("get_group_info", "v2", "groups/read",
+             [Param("group")],
+             doc="""Returns info about a specific group.
+
+        :param str group:
+            The group to search for.
+
+        :returns:
+            A dict with these items:
+                * name - The name of the group
+                * parent - The name of the parent of this group
+                * chatcolor - The chat color of this group
+                * permissions - An array of permissions assigned "directly" to this group
+                * negatedpermissions - An array of negated permissions assigned "directly" to this group
+                * totalpermissions - An array of the calculated permissions available to members of this group
+                                     due to direct permissions and inherited permissions
+
+        **endpoint:** /v2/groups/read
+        """, model=Group.from_reply),
+    Endpoint("get_server_motd", "v3", "server/motd", [],
+             doc="""Gets the server's MOTD.
+
+        :returns:
+            A dict with these items:
+                * motd - The server's Message of the Day
+
+        **endpoint:** /v3/server/motd
+        """),
+    Endpoint("get_server_rules", "v3", "server/rules", [],
+             doc="""Gets the server's rules.
+
+        :returns:
+            A dict with these items:
+                * rules - The server rules
+
+        **endpoint:** /v3/server/rules
+        """),
+    Endpoint("do_destroy_token", "", "token/destroy/{token}",
+             [Param("token")]),
+    Endpoint("do_destroy_all_tokens", "v3", "token/destroy/all", [],
+             doc="""Destroys all tokens registered with the server.
+
+        **endpoint:** /v3/token/destroy/all
+        """),
+    Endpoint("do_server_broadcast", "v2", "server/broadcast",
+             [Param("message", query="msg")],
+             doc="""Broadcasts a message to all users on the server.
+
+        :param str message:
+            The message to be broadcasted.
+
+        **endpoint:** /v2/server/broadcast
+        """),
+    Endpoint("do_server_reload", "v3", "server/reload", [],
+             doc="""Reloads the config file, permissions, and regions of the server.
+
+        **endpoint:** /v3/server/reload
+        """),
+    Endpoint("do_server_off", "v2", "server/off", [],
+             doc="""Shuts down the server.
+
+        **endpoint:** /v2/server/off
+        """),
+    Endpoint("do_server_restart", "v3", "server/restart", [],
+             doc="""Restarts the server.
+
+        **endpoint:** /v3/server/restart
+        """),
+    Endpoint("do_server_rawcmd_v2", "v2", "server/rawcmd",
+             [Param("command", query="cmd")],
+             doc="""Executes a command on the server and returns the output.
+
+        :param str command:
+            The command to be executed.
+
+        :returns:
+            A dict with these items:
+                * response - The output of the command as a string. Each line of output is separated by a newline.
+
+        **endpoint:** /v2/server/rawcmd
+        """),
+    Endpoint("do_server_rawcmd_v3", "v3", "server/rawcmd",
+             [Param("command", query="cmd")],
+             doc="""Executes a command on the server and returns the output.
+
+        :param str command:
+            The command to be executed.
+
+        :returns:
+            A dict with these items:
+                * response - The output of the command as an array of strings.
+
+        **endpoint:** /v3/server/rawcmd
+        """),
+    Endpoint("do_create_ban", "", "bans/create",
+             [Param("ip"), Param("name"), Param("reason")],
+             doc="""Bans a user.
+
+        :param str ip:
+            The ip address to ban. Is required.
+
+        :param str name:
+            The player name to ban. May be an empty string.
+
+        :param str reason:
+            The reason the player was banned. May be an empty string.
+
+        **endpoint:** /bans/create
+        """, priority=RequestPriority.Moderation),
+    Endpoint("do_delete_ban", "v2", "bans/destroy",
+             [Param("type", BanLookupType), Param("ban")],
+             doc="""Deletes a ban.
+
+        :param BanLookupType type:
+            Defines how to search for the ban to be deleted.
+
+        :param str ban:
+            The ban to delete.
+
+        **endpoint:** /v2/bans/destroy
+        """, priority=RequestPriority.Moderation),
+    Endpoint("do_world_meteor", "", "world/meteor", [],
+             doc="""Drops a meteor on the world.
+
+        **endpoint:** /world/meteor
+        """),
+    Endpoint("do_world_save", "v2", "world/save", [],
+             doc="""Saves the world. (No, not like Superman.)
+
+        **endpoint:** /v2/world/save
+        """),
+    Endpoint("do_world_butcher", "v2", "world/butcher",
+             [Param("killFriendly", bool, query="killfriendly")],
+             doc="""Butchers all NPCs. Will never kill town NPCs, even if killFriendly
+        is enabled.
+
+        :param bool killFriendly:
+            Whether to kill friendly mobs or not, such as bunnies.
+
+        **endpoint:** /v2/world/butcher
+        """),
+    Endpoint("do_kick_player", "v2", "players/kick",
+             [Param("player"), Param("reason")],
+             doc="""Kicks a player.
+
+        :param str reason:
+            The reason the player was kicked.
+
+        **endpoint:** /v2/players/kick
+        """, priority=RequestPriority.Moderation),
+    Endpoint("do_ban_player", "v2", "players/ban",
+             [Param("player"), Param("reason")],
+             doc="""Bans a player permanently.
+
+        :param str player:
+            Player to be banned.
+
+        :param reason:
+            Reason for the ban.
+
+        **endpoint:** /v2/players/ban
+        """, priority=RequestPriority.Moderation),
+    Endpoint("do_kill_player", "v2", "players/kill",
+             [Param("player"), Param("killer", query="from")],
+             doc="""Kills a player.
+
+        :param player:
+            Player to be killed.
+
+        :param killer:
+            Person who 'killed' the player. This is displayed as "{killer} just killed you!"
+            to the player.
+
+        **endpoint:** /v2/players/kill
+        """, priority=RequestPriority.Moderation),
+    Endpoint("do_mute_player", "v2", "players/mute",
+             [Param("player")],
+             doc="""Mutes a player.
+
+        :param str player:
+            Player to be muted.
+
+        **endpoint:** /v2/players/mute
+        """, priority=RequestPriority.Moderation),
+    Endpoint("do_unmute_player", "v2", "players/unmute",
+             [Param("player")],
+             doc="""Unmutes a player.
+
+        :param str player:
+            Player to be unmuted.
+
+        **endpoint:** /v2/players/unmute
+        """, priority=RequestPriority.Moderation),
+    Endpoint("do_group_delete", "v2", "groups/destroy",
+             [Param("group")],
+             doc="""Deletes a group.
+
+        :param str group:
+            The group to be deleted.
+
+        **endpoint:** /v2/groups/destroy
+        """),
+    Endpoint("do_group_create", "v2", "groups/create",
+             [Param("group"), Param("parent", default=""), Param("permissions", default=""),
+              Param("chatColor", query="chatcolor", default="255,255,255")],
+             doc="""Adds a new group. Includes specification of parent, permissions, and chat color.
+
+        :param str group:
+            The name of the group to be created.
+
+        :param str parent:
+            The parent of the group to be created.
+
+        :param str permissions:
+            The permissions that the group should have as CSV.
+
+        :param str chatColor:
+            The group's chat color as three CSV RGB byte values.
+
+        **endpoint:** /v2/groups/create
+        """),
+    Endpoint("set_update_user", "v2", "users/update",
+             [Param("user"), Param("type", UserLookupType), Param("password"), Param("group")],
+             doc="""Updates a user in the TShock DB.
+
+        :param str user:
+            The search string, depending on the the lookup type.
+
+        :param UserLookupType type:
+            The method in which to lookup the user.
+
+        :param str password:
+            The new password for the user.
+
+        :param str group:
+            The new group for the user.
+
+        **endpoint:** /v2/users/update
+        """),
+    Endpoint("set_world_bloodmoon", "", "world/bloodmoon/{bloodmoon}",
+             [Param("bloodmoon", bool)],
+             doc="""Sets the world's bloodmoon.
+
+        :param bool bloodmoon:
+            Bool indicating what to set the bloodmoon to.
+
+        **endpoint:** /world/bloodmoon/{bool}
+        """),
+    Endpoint("set_world_autosaving", "v2", "world/autosave/state/{autosave}",
+             [Param("autosave", bool)],
+             doc="""Turns autosaving on or off.
+
+        :param bool autosave:
+            Bool indicating whether to turn autosaving on or off.
+
+        **endpoint:** /v2/world/autosave/state/{bool}
+        """),
+    Endpoint("set_group_update", "v2", "groups/update",
+             [Param("group"), Param("parent", default=None), Param("chatcolor", default=None),
+              Param("permissions", default=None)],
+             doc="""Updates a group in the TShock DB.
+
+        :param str group:
+            The group to be updated.
+
+        :param str parent:
+            (Optional) The new parent of the group. Defaults to keeping the current one.
+
+        :param str chatcolor:
+            (Optional) The new group chatcolor as CSV RGB byte values. Defaults to keeping the current one.
+
+        :param str permissions:
+            (Optional) The new group permissions as a CSV string. Defaults to keeping the current ones.
+
+        **endpoint:** /v2/groups/update
+        """)
+]}
@@ -6,4 +6,11 @@ class UserLookupType(Enum):
 
 class BanLookupType(Enum):
     Name = "name"
-    IP = "ip"
\ No newline at end of file
+    IP = "ip"
+
+class RequestPriority(Enum):
+    """The classes a :py:class:`~pyshock.scheduler.RequestScheduler` serves requests in, most urgent first."""
+    Moderation = 0
+    AdminWrite = 1
+    Interactive = 2
+    Background = 3
\ No newline at end of file
@@ -1,2 +1,31 @@
 class ApiException(Exception):
     pass
+
+class ResponseException(ApiException):
+    """The server answered with a status other than 200 or 400.
+
+    :param str message:
+        A description of the error.
+
+    :param str status:
+        The ``status`` member of the reply.
+
+    :param str error:
+        The ``error`` member of the reply, if any.
+    """
+    def __init__(self, message : str, status : str = None, error : str = None):
+        super().__init__(message)
+        self.status = status
+        self.error = error
+
+class TimeoutException(ApiException):
+    """The server did not answer in time."""
+    pass
+
+class ConnectionException(ApiException):
+    """The server could not be reached."""
+    pass
+
+class CircuitOpenException(ConnectionException):
+    """The request was not sent because the server failed too often recently."""
+    pass
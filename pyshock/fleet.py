@@ -0,0 +1,183 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pyshock.resilience import CircuitBreaker, RetryPolicy
+from pyshock.scheduler import submit
+from pyshock.snapshot import ItemVocabulary, PlayerSnapshot
+from pyshock.tshock import TShock
+
+class TShockFleet():
+    """Runs :py:class:`~pyshock.tshock.TShock` functions against many servers at once.
+
+    Each server is given a name and gets its own :py:class:`~pyshock.tshock.TShock`
+    instance, reachable through :py:attr:`servers`. Any function of
+    :py:class:`~pyshock.tshock.TShock` may be fanned out to every server with :py:meth:`map`,
+    which runs the calls on at most ``max_workers`` threads and yields every reply as soon
+    as it arrives. A server whose call raises does not stop the others; the exception is
+    yielded in place of its reply.
+
+    Example usage of the API:
+
+    >>> fleet = pyshock.TShockFleet({"eu": ("10.0.0.1", 7878), "us": ("10.0.0.2", 7878, "token")})
+    >>> for name, reply in fleet.map("get_status"):
+    ...     print(name, reply)
+    us {'status': '200', 'name': 'US', 'port': 7777, 'playercount': 3, 'players': 'a, b, c'}
+    eu ConnectionException('Could not connect to the server.')
+
+    :param dict servers:
+        (Optional) Mapping of server name to a tuple of ``(ip, port)`` or ``(ip, port, token)``.
+
+    :param int max_workers:
+        The maximum number of requests in flight at once.
+
+    :param float timeout:
+        (Optional) The timeout passed on to every :py:class:`~pyshock.tshock.TShock`.
+
+    :param RetryPolicy retry:
+        (Optional) The :py:class:`~pyshock.resilience.RetryPolicy` shared by every server.
+
+    :param CircuitBreaker breaker:
+        (Optional) A :py:class:`~pyshock.resilience.CircuitBreaker` whose settings are copied
+        to a breaker of its own for every server, so one server going down does not slow the others.
+    """
+    def __init__(self, servers : dict = None, max_workers : int = 16, timeout : float = None,
+                 retry : RetryPolicy = None, breaker : CircuitBreaker = None):
+        self.servers = {}
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.retry = retry
+        self.breaker = breaker
+        if servers is not None:
+            for name, endpoint in servers.items():
+                self.add_server(name, *endpoint)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add_server(self, name : str, ip : str, port : int, token : str = "", user : str = None, password : str = None) -> TShock:
+        """Adds a server to the fleet, replacing any server with the same name.
+
+        :param str name:
+            The name results for this server are reported under.
+
+        :param str ip:
+            The ip address of the TShock server.
+
+        :param int port:
+            The port that the REST API is opened on.
+
+        :param str token:
+            (Optional) A token obtained earlier for this server.
+
+        :param str user:
+            (Optional) The user to obtain tokens under when there is no valid token.
+
+        :param str password:
+            (Optional) The user's password.
+
+        :returns:
+            The :py:class:`~pyshock.tshock.TShock` instance used for the server.
+        """
+        self.remove_server(name)
+        tshock = TShock(ip, port, timeout=self.timeout, retry=self.retry,
+                        breaker=self.breaker.copy() if self.breaker is not None else None, user=user, password=password)
+        tshock.token = token
+        self.servers[name] = tshock
+        return tshock
+
+    def remove_server(self, name : str):
+        """Removes a server from the fleet and closes its connections.
+        Does nothing if there is no server by that name.
+
+        :param str name:
+            The name of the server to remove.
+        """
+        tshock = self.servers.pop(name, None)
+        if tshock is not None:
+            tshock.close()
+
+    def close(self):
+        """Closes the connections to every server."""
+        for tshock in self.servers.values():
+            tshock.close()
+
+    def map(self, method : str, *args, **kwargs):
+        """Calls a :py:class:`~pyshock.tshock.TShock` function on every server concurrently.
+
+        :param str method:
+            Name of the function to call, e.g. ``"get_server_status_v2"``.
+
+        All other arguments are passed on to the function.
+
+        :returns:
+            A generator of ``(name, reply)`` tuples in the order the servers answer.
+            ``reply`` is whatever the function returned, or the exception it raised.
+        """
+        if not self.servers:
+            return
+        pool = ThreadPoolExecutor(max_workers=min(self.max_workers, len(self.servers)))
+        try:
+            futures = {submit(pool, getattr(tshock, method), *args, **kwargs): name
+                       for name, tshock in self.servers.items()}
+            for future in as_completed(futures):
+                try:
+                    reply = future.result()
+                except Exception as e:
+                    reply = e
+                yield futures[future], reply
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def call(self, method : str, *args, **kwargs) -> dict:
+        """Same as :py:meth:`map`, but waits for every server.
+
+        :returns:
+            A dict mapping server names to replies or exceptions.
+        """
+        return dict(self.map(method, *args, **kwargs))
+
+    def get_total_player_count(self) -> int:
+        """Adds up the player counts of every server.
+        Servers that raise an exception are left out.
+
+        **endpoint:** /status
+        """
+        return sum(reply["playercount"] for name, reply in self.map("get_status")
+                   if not isinstance(reply, Exception))
+
+    def get_player_map(self) -> dict:
+        """Finds out which server every online player is on.
+        Servers that raise an exception are left out.
+
+        :returns:
+            A dict mapping player nicknames to server names.
+
+        **endpoint:** /v2/server/status
+        """
+        players = {}
+        for name, reply in self.map("get_server_status_v2", players=True):
+            if isinstance(reply, Exception):
+                continue
+            for player in reply.get("players", []):
+                players[player["nickname"]] = name
+        return players
+
+    def snapshot_players(self, max_in_flight : int = 8) -> PlayerSnapshot:
+        """Snapshots the players of every server and merges the snapshots into one.
+        Each row's server is named as in the fleet. Servers that raise an exception are left out.
+        Requires the ``numpy`` package.
+
+        :param int max_in_flight:
+            The maximum number of player info requests in flight per server.
+
+        **endpoints:** /v2/players/list, /v2/players/read
+        """
+        vocabulary = ItemVocabulary()
+        snapshots = []
+        for name, snapshot in self.map("snapshot_players", max_in_flight, vocabulary):
+            if isinstance(snapshot, Exception):
+                continue
+            snapshot.servers = (name,)
+            snapshots.append(snapshot)
+        return PlayerSnapshot.merge(snapshots)
@@ -0,0 +1,263 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pyshock.scheduler import submit
+
+class GroupIndex():
+    """A local copy of the group hierarchy of a TShock server that answers
+    permission checks without any requests.
+
+    Every group's effective permissions are computed once, the same way TShock does:
+    walking from the group up through its parents, the nearest group that lists a
+    permission decides it, and a negated permission beats a granted one in the same group.
+    Wildcards such as ``tshock.world.*`` and ``*`` are honoured and the ``superadmin``
+    group has every permission.
+
+    Build the index with :py:meth:`build` (or :py:meth:`build_async` for an
+    :py:class:`~pyshock.async_tshock.AsyncTShock`). The client it is built from keeps it
+    up to date: groups created, deleted or updated through that client are applied locally
+    and only the affected part of the tree is recomputed.
+
+    Example usage of the API:
+
+    >>> groups = pyshock.GroupIndex.build(tshock)
+    >>> groups.has_permission("default", "tshock.world.modify")
+    True
+
+    :param dict groups:
+        (Optional) Mapping of group name to the reply of
+        :py:meth:`~pyshock.tshock.TShock.get_group_info` for that group.
+    """
+    SUPERADMIN = "superadmin"
+
+    WATCHED_ENDPOINTS = ("/v2/groups/create", "/v2/groups/destroy", "/v2/groups/update")
+
+    def __init__(self, groups : dict = None):
+        self._parents = {}
+        self._permissions = {}
+        self._negated = {}
+        self._children = {}
+        self._decisions = {}
+        self._lock = threading.Lock()
+        if groups is not None:
+            self.load(groups)
+
+    @classmethod
+    def build(cls, tshock, max_workers : int = 8, follow : bool = True) -> "GroupIndex":
+        """Builds an index from a server, reading every group concurrently.
+
+        :param TShock tshock:
+            The client to read the groups with.
+
+        :param int max_workers:
+            The maximum number of :py:meth:`~pyshock.tshock.TShock.get_group_info` requests in flight.
+
+        :param bool follow:
+            Whether to apply group changes made through ``tshock`` to the index.
+
+        **endpoints:** /v2/groups/list, /v2/groups/read
+        """
+        names = [group["name"] for group in tshock.get_group_list()["groups"]]
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(names)))) as pool:
+            futures = [submit(pool, tshock.get_group_info, name) for name in names]
+            index = cls({name: future.result() for name, future in zip(names, futures)})
+        if follow:
+            tshock.add_listener(index.on_reply)
+        return index
+
+    @classmethod
+    async def build_async(cls, tshock, follow : bool = True) -> "GroupIndex":
+        """Same as :py:meth:`build` for an :py:class:`~pyshock.async_tshock.AsyncTShock`.
+        The concurrency is bounded by the client's connection pool.
+        """
+        names = [group["name"] for group in (await tshock.get_group_list())["groups"]]
+        infos = await asyncio.gather(*[tshock.get_group_info(name) for name in names])
+        index = cls(dict(zip(names, infos)))
+        if follow:
+            tshock.add_listener(index.on_reply)
+        return index
+
+    def __contains__(self, group : str):
+        return group in self._parents
+
+    def __len__(self):
+        return len(self._parents)
+
+    def load(self, groups : dict):
+        """Replaces the whole index.
+
+        :param dict groups:
+            Mapping of group name to the reply of :py:meth:`~pyshock.tshock.TShock.get_group_info`.
+        """
+        with self._lock:
+            self._parents.clear()
+            self._permissions.clear()
+            self._negated.clear()
+            self._children.clear()
+            for name, info in groups.items():
+                self._set(name, info.get("parent", ""), info.get("permissions", []), info.get("negatedpermissions", []))
+            self._decisions = {}
+            for name in self._parents:
+                self._decide(name)
+
+    def set_group(self, name : str, parent : str = "", permissions : str = ""):
+        """Adds or replaces a group and recomputes it and every group inheriting from it.
+
+        :param str name:
+            The name of the group.
+
+        :param str parent:
+            The name of the parent group. May be an empty string.
+
+        :param str permissions:
+            The permissions as CSV, negated permissions prefixed with ``!``.
+        """
+        granted, negated = _split_permissions(permissions)
+        with self._lock:
+            self._set(name, parent, granted, negated)
+            self._recompute(name)
+
+    def update_group(self, name : str, parent : str = None, permissions : str = None):
+        """Changes some settings of a group and recomputes it and every group inheriting from it.
+        A group not in the index is added.
+
+        :param str name:
+            The name of the group.
+
+        :param str parent:
+            (Optional) The new parent group. May be an empty string. Defaults to keeping the current one.
+
+        :param str permissions:
+            (Optional) The new permissions as CSV. Defaults to keeping the current ones.
+        """
+        if permissions is not None:
+            granted, negated = _split_permissions(permissions)
+        with self._lock:
+            if parent is None:
+                parent = self._parents.get(name, "")
+            if permissions is None:
+                granted, negated = self._permissions.get(name, ()), self._negated.get(name, ())
+            self._set(name, parent, granted, negated)
+            self._recompute(name)
+
+    def remove_group(self, name : str):
+        """Removes a group. Groups inheriting from it are left without a parent, as TShock does.
+
+        :param str name:
+            The name of the group.
+        """
+        with self._lock:
+            if name not in self._parents:
+                return
+            self._unlink(name)
+            del self._parents[name]
+            del self._permissions[name]
+            del self._negated[name]
+            del self._decisions[name]
+            # The children still name it as their parent, and inherit from it again if it is re-created.
+            for child in self._children.get(name, ()):
+                self._recompute(child)
+
+    def get_parents(self, group : str) -> list:
+        """Returns the chain of parents of a group, nearest first."""
+        chain = []
+        parent = self._parents.get(group)
+        while parent and parent in self._parents and parent not in chain and parent != group:
+            chain.append(parent)
+            parent = self._parents[parent]
+        return chain
+
+    def get_permissions(self, group : str) -> frozenset:
+        """Returns every permission a group effectively has, not counting wildcard expansion.
+
+        :raises KeyError:
+            If the group is not in the index.
+        """
+        return frozenset(permission for permission, granted in self._decisions[group].items() if granted)
+
+    def has_permission(self, group : str, permission : str) -> bool:
+        """Checks whether members of a group have a permission.
+
+        :param str group:
+            The name of the group.
+
+        :param str permission:
+            The permission to check, e.g. ``"tshock.world.modify"``.
+
+        :raises KeyError:
+            If the group is not in the index.
+        """
+        if group == self.SUPERADMIN or not permission:
+            return True
+        decisions = self._decisions[group]
+        granted = decisions.get(permission)
+        if granted is not None:
+            return granted
+        nodes = permission.split(".")
+        for i in range(len(nodes) - 1, -1, -1):
+            granted = decisions.get(".".join(nodes[:i]) + ".*" if i else "*")
+            if granted is not None:
+                return granted
+        return False
+
+    def on_reply(self, endpoint : str, params : dict, results : dict):
+        """Listener applying group changes; see :py:meth:`~pyshock.tshock.TShock.add_listener`."""
+        if endpoint not in self.WATCHED_ENDPOINTS:
+            return
+        if endpoint == "/v2/groups/destroy":
+            self.remove_group(params["group"])
+        elif endpoint == "/v2/groups/update":
+            # Arguments left out of an update are not sent, and the server keeps their value.
+            self.update_group(params["group"], params.get("parent"), params.get("permissions"))
+        else:
+            self.set_group(params["group"], params.get("parent", ""), params.get("permissions", ""))
+
+    def _set(self, name, parent, permissions, negated):
+        if name in self._parents:
+            self._unlink(name)
+        self._parents[name] = parent or ""
+        self._permissions[name] = frozenset(permissions)
+        self._negated[name] = frozenset(negated)
+        if parent:
+            self._children.setdefault(parent, set()).add(name)
+
+    def _unlink(self, name):
+        siblings = self._children.get(self._parents[name])
+        if siblings is not None:
+            siblings.discard(name)
+
+    def _decide(self, name, visiting=()):
+        """Computes the decisions of a group from its parent's, computing the parent first if needed."""
+        parent = self._parents[name]
+        if parent in self._parents and parent not in visiting and parent != name:
+            if parent not in self._decisions:
+                self._decide(parent, visiting + (name,))
+            decisions = dict(self._decisions[parent])
+        else:
+            decisions = {}
+        decisions.update(dict.fromkeys(self._permissions[name], True))
+        decisions.update(dict.fromkeys(self._negated[name], False))
+        self._decisions[name] = decisions
+
+    def _recompute(self, name):
+        pending = [name]
+        seen = set()
+        while pending:
+            group = pending.pop()
+            if group in seen:
+                continue
+            seen.add(group)
+            self._decide(group)
+            pending.extend(self._children.get(group, ()))
+
+def _split_permissions(permissions):
+    """Splits CSV permissions into the granted ones and the negated ones, without their ``!``."""
+    granted = []
+    negated = []
+    for permission in permissions.split(","):
+        permission = permission.strip()
+        if permission.startswith("!"):
+            negated.append(permission[1:])
+        elif permission:
+            granted.append(permission)
+    return granted, negated
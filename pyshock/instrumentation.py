@@ -0,0 +1,163 @@
+import bisect
+import threading
+import time
+
+class RequestInfo():
+    """What is known about one request sent to the server, passed to every :py:class:`RequestHook`.
+
+    Before the request only :py:attr:`endpoint` and :py:attr:`url` are set. Afterwards
+    :py:attr:`duration` is the number of seconds it took, :py:attr:`size` the number of bytes
+    of the reply, :py:attr:`status` the ``status`` member of the reply and :py:attr:`exception`
+    the exception it raised, if any. Replies answered by a cache are not requests and are not reported.
+
+    One call of an endpoint is one request, measured end to end: :py:attr:`duration` includes
+    the wait for a :py:class:`~pyshock.scheduler.RequestScheduler` slot and every retry with
+    its backoff, and a call failing after retries is reported once, with the last exception.
+    The time spent queued is in :py:meth:`~pyshock.scheduler.RequestScheduler.stats`.
+    """
+    __slots__ = ("endpoint", "url", "start", "duration", "size", "status", "exception")
+
+    def __init__(self, endpoint : str, url : str):
+        self.endpoint = endpoint
+        self.url = url
+        self.start = None
+        self.duration = None
+        self.size = None
+        self.status = None
+        self.exception = None
+
+    def begin(self, hooks : list) -> "RequestInfo":
+        for hook in hooks:
+            hook.before_request(self)
+        self.start = time.perf_counter()
+        return self
+
+    def end(self, hooks : list):
+        self.duration = time.perf_counter() - self.start
+        for hook in hooks:
+            hook.after_request(self)
+
+class RequestHook():
+    """Base class of the objects passed to :py:meth:`~pyshock.tshock.TShock.add_hook`.
+    Both functions are called on the thread making the request and should return quickly.
+    """
+    def before_request(self, info : RequestInfo):
+        """Called right before a request is sent."""
+        pass
+
+    def after_request(self, info : RequestInfo):
+        """Called once a request has completed or failed."""
+        pass
+
+class RequestMetrics(RequestHook):
+    """A hook counting requests, errors and reply sizes per endpoint and keeping a
+    latency histogram with fixed buckets per endpoint. Requests are counted and timed
+    per call, see :py:class:`RequestInfo`.
+
+    Example usage of the API:
+
+    >>> metrics = pyshock.RequestMetrics(labels={"server": "eu"})
+    >>> tshock.add_hook(metrics)
+    >>> tshock.get_status()
+    >>> print(metrics.to_prometheus())
+
+    :param tuple buckets:
+        (Optional) The upper bounds of the histogram buckets in seconds, ascending.
+
+    :param dict labels:
+        (Optional) Labels added to every exported sample, e.g. the server name.
+    """
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets : tuple = DEFAULT_BUCKETS, labels : dict = None):
+        self.buckets = tuple(buckets)
+        self.labels = dict(labels or {})
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def after_request(self, info : RequestInfo):
+        with self._lock:
+            stats = self._endpoints.get(info.endpoint)
+            if stats is None:
+                stats = self._endpoints[info.endpoint] = _EndpointStats(len(self.buckets))
+            status = info.status or "error"
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            if info.exception is not None:
+                stats.errors += 1
+            stats.bytes += info.size or 0
+            stats.seconds += info.duration
+            stats.histogram[bisect.bisect_left(self.buckets, info.duration)] += 1
+
+    def snapshot(self) -> dict:
+        """Returns a copy of the counters.
+
+        :returns:
+            A dict mapping endpoint names to dicts with these items:
+                * requests - Number of requests
+                * errors - Number of requests that raised an exception
+                * statuses - Dict of reply status to number of requests; ``error`` if there was no reply
+                * bytes - Total size of the replies
+                * seconds - Total time spent on requests
+                * histogram - Number of requests per bucket, the last one being above every bound
+        """
+        with self._lock:
+            return {endpoint: {"requests": sum(stats.histogram), "errors": stats.errors,
+                               "statuses": dict(stats.statuses), "bytes": stats.bytes,
+                               "seconds": stats.seconds, "histogram": list(stats.histogram)}
+                    for endpoint, stats in self._endpoints.items()}
+
+    def reset(self):
+        """Clears every counter."""
+        with self._lock:
+            self._endpoints.clear()
+
+    def to_prometheus(self, prefix : str = "pyshock") -> str:
+        """Renders the counters in the Prometheus text exposition format.
+
+        :param str prefix:
+            The prefix of every metric name.
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        def sample(name, labels, value):
+            labels = dict(self.labels, **labels)
+            text = ",".join('{0}="{1}"'.format(key, _escape(str(label))) for key, label in labels.items())
+            lines.append("{0}_{1}{{{2}}} {3}".format(prefix, name, text, value))
+
+        lines.append("# HELP {0}_requests_total Requests sent, by endpoint and reply status.".format(prefix))
+        lines.append("# TYPE {0}_requests_total counter".format(prefix))
+        for endpoint, stats in snapshot.items():
+            for status, count in stats["statuses"].items():
+                sample("requests_total", {"endpoint": endpoint, "status": status}, count)
+        lines.append("# HELP {0}_request_errors_total Requests that raised an exception.".format(prefix))
+        lines.append("# TYPE {0}_request_errors_total counter".format(prefix))
+        for endpoint, stats in snapshot.items():
+            sample("request_errors_total", {"endpoint": endpoint}, stats["errors"])
+        lines.append("# HELP {0}_response_bytes_total Bytes received in replies.".format(prefix))
+        lines.append("# TYPE {0}_response_bytes_total counter".format(prefix))
+        for endpoint, stats in snapshot.items():
+            sample("response_bytes_total", {"endpoint": endpoint}, stats["bytes"])
+        lines.append("# HELP {0}_request_duration_seconds Request latency per call, queueing and retries included.".format(prefix))
+        lines.append("# TYPE {0}_request_duration_seconds histogram".format(prefix))
+        for endpoint, stats in snapshot.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), stats["histogram"]):
+                cumulative += count
+                sample("request_duration_seconds_bucket", {"endpoint": endpoint, "le": bound}, cumulative)
+            sample("request_duration_seconds_sum", {"endpoint": endpoint}, stats["seconds"])
+            sample("request_duration_seconds_count", {"endpoint": endpoint}, stats["requests"])
+        return "\n".join(lines) + "\n"
+
+class _EndpointStats():
+    __slots__ = ("statuses", "errors", "bytes", "seconds", "histogram")
+
+    def __init__(self, buckets):
+        self.statuses = {}
+        self.errors = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.histogram = [0] * (buckets + 1)
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
@@ -0,0 +1,207 @@
+import random
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pyshock.enums import RequestPriority
+from pyshock.exceptions import ApiException
+from pyshock.scheduler import priority, submit
+
+MaintenanceResult = namedtuple("MaintenanceResult", ["server", "action", "started", "seconds", "held", "reply",
+                                                     "exception", "skipped"])
+MaintenanceResult.__doc__ = """The outcome of one maintenance action on one server.
+``started`` is the unix time the action was sent, ``seconds`` how long it took and ``held`` how
+many seconds it waited for players to leave. ``reply`` is None if the action raised ``exception``
+or was ``skipped`` because the server stayed busy or the scheduler was stopped."""
+
+class MaintenanceScheduler():
+    """Runs maintenance actions such as :py:meth:`~pyshock.tshock.TShock.do_world_save`,
+    :py:meth:`~pyshock.tshock.TShock.do_server_reload` and
+    :py:meth:`~pyshock.tshock.TShock.do_server_restart` across many servers without running
+    them all at the same second.
+
+    The servers are started ``stagger`` seconds apart, each with up to ``jitter`` more seconds
+    of random delay, and at most ``max_concurrent`` actions run at once, so saves do not hit
+    shared storage together. With ``max_players`` set, the action on a server is held while
+    more players than that are online, checking again every ``hold_interval`` seconds, and
+    skipped once it has been held for ``max_hold`` seconds.
+
+    Every outcome is kept in :py:attr:`history`, with how long the action took.
+
+    Example usage of the API:
+
+    >>> maintenance = pyshock.MaintenanceScheduler(fleet, stagger=10, jitter=5, max_players=4)
+    >>> for result in maintenance.run("do_world_save"):
+    ...     print(result.server, result.seconds, result.exception)
+    >>> maintenance.start("do_world_save", interval=1800)
+
+    :param servers:
+        A :py:class:`~pyshock.fleet.TShockFleet` or a dict mapping names to
+        :py:class:`~pyshock.tshock.TShock` instances.
+
+    :param float stagger:
+        Seconds between the starts on two consecutive servers.
+
+    :param float jitter:
+        The most seconds of random delay added to every start.
+
+    :param int max_concurrent:
+        The maximum number of actions running at once.
+
+    :param int max_players:
+        (Optional) Hold the action while more players than this are online.
+
+    :param float hold_interval:
+        Seconds between two player count checks while an action is held.
+
+    :param float max_hold:
+        (Optional) Seconds after which a held action is skipped. Defaults to holding for as long as needed.
+
+    :param int history:
+        The number of results kept in :py:attr:`history`.
+    """
+    def __init__(self, servers, stagger : float = 5.0, jitter : float = 2.0, max_concurrent : int = 1,
+                 max_players : int = None, hold_interval : float = 30.0, max_hold : float = None, history : int = 1000):
+        self.servers = servers if isinstance(servers, dict) else servers.servers
+        self.stagger = stagger
+        self.jitter = jitter
+        self.max_concurrent = max_concurrent
+        self.max_players = max_players
+        self.hold_interval = hold_interval
+        self.max_hold = max_hold
+        self.history = deque(maxlen=history)
+        self.last_error = None
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._random = random.Random()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run(self, action : str, *args, servers = None) -> list:
+        """Runs an action on every server, staggered, and waits for all of them.
+
+        :param str action:
+            Name of the :py:class:`~pyshock.tshock.TShock` function to call, e.g. ``"do_world_save"``.
+
+        All other positional arguments are passed on to the function.
+
+        :param servers:
+            (Optional) The names of the servers to run the action on, in order. Defaults to every server.
+
+        :returns:
+            A list of :py:class:`MaintenanceResult` in the order the servers were started.
+        """
+        names = list(self.servers if servers is None else servers)
+        if not names:
+            return []
+        start = time.monotonic()
+        delays = [index * self.stagger + self._random.uniform(0.0, self.jitter) for index in range(len(names))]
+        order = sorted(range(len(names)), key=delays.__getitem__)
+        with ThreadPoolExecutor(max_workers=len(names)) as pool:
+            futures = [submit(pool, self._run_one, names[index], action, args, start + delays[index]) for index in order]
+            results = [future.result() for future in futures]
+        self.history.extend(results)
+        return results
+
+    def start(self, action : str, interval : float, *args):
+        """Runs an action on every server every ``interval`` seconds on a daemon thread.
+        A failed run is stored in :py:attr:`last_error`.
+
+        :param str action:
+            Name of the :py:class:`~pyshock.tshock.TShock` function to call.
+
+        :param float interval:
+            Seconds between the starts of two runs.
+        """
+        self.stop()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(action, interval, args), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the runs started by :py:meth:`start`. Actions that were not sent yet are skipped."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self._stop.clear()
+
+    def stats(self) -> dict:
+        """Returns the durations of the actions in :py:attr:`history`.
+
+        :returns:
+            A dict mapping every action name to a dict with these items:
+                * runs - Actions sent
+                * failures - Actions that raised an exception
+                * skipped - Actions not sent
+                * mean_seconds - The mean duration of the actions sent
+                * max_seconds - The longest duration of an action sent
+                * held_seconds - Total time actions were held for players
+        """
+        stats = {}
+        for result in list(self.history):
+            entry = stats.setdefault(result.action, {"runs": 0, "failures": 0, "skipped": 0, "mean_seconds": 0.0,
+                                                     "max_seconds": 0.0, "held_seconds": 0.0})
+            entry["held_seconds"] += result.held
+            if result.skipped:
+                entry["skipped"] += 1
+                continue
+            entry["runs"] += 1
+            entry["failures"] += result.exception is not None
+            entry["mean_seconds"] += result.seconds
+            entry["max_seconds"] = max(entry["max_seconds"], result.seconds)
+        for entry in stats.values():
+            if entry["runs"]:
+                entry["mean_seconds"] /= entry["runs"]
+        return stats
+
+    def _run(self, action, interval, args):
+        while True:
+            started = time.monotonic()
+            try:
+                results = self.run(action, *args)
+                failed = [result.exception for result in results if result.exception is not None]
+                self.last_error = failed[-1] if failed else None
+            except Exception as e:
+                # Keep the daemon thread alive; the next run may succeed, e.g. once a removed server is gone.
+                self.last_error = e
+            if self._stop.wait(max(0.0, interval - (time.monotonic() - started))):
+                return
+
+    def _run_one(self, name, action, args, due):
+        tshock = self.servers[name]
+        if self._stop.wait(max(0.0, due - time.monotonic())):
+            return MaintenanceResult(name, action, None, 0.0, 0.0, None, None, True)
+        busy_since = None
+        while True:
+            checked = time.monotonic()
+            with self._slots:
+                # The player count is read once the slot is ours, so it is still current
+                # when the action is sent, however long the slot took to free up.
+                if self.max_players is None or not self._busy(tshock):
+                    held = checked - busy_since if busy_since is not None else 0.0
+                    started = time.time()
+                    begin = time.perf_counter()
+                    try:
+                        reply = getattr(tshock, action)(*args)
+                        exception = None
+                    except Exception as e:
+                        reply = None
+                        exception = e
+                    return MaintenanceResult(name, action, started, time.perf_counter() - begin, held, reply,
+                                             exception, False)
+            if busy_since is None:
+                busy_since = checked
+            held = time.monotonic() - busy_since
+            if self.max_hold is not None and held >= self.max_hold:
+                return MaintenanceResult(name, action, None, 0.0, held, None, None, True)
+            if self._stop.wait(self.hold_interval):
+                return MaintenanceResult(name, action, None, 0.0, held, None, None, True)
+
+    def _busy(self, tshock) -> bool:
+        """Tells whether more than :py:attr:`max_players` are online. A server whose count
+        cannot be read is treated as idle, so the action itself reports the failure."""
+        try:
+            with priority(RequestPriority.Background):
+                return tshock.get_status()["playercount"] > self.max_players
+        except ApiException:
+            return False
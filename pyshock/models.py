@@ -0,0 +1,188 @@
+class Lazy():
+    """A model field kept as received and parsed on first access.
+    The parsed value replaces the raw one, so every field is parsed at most once.
+
+    :param parse:
+        Called with the raw value from the reply, which is None when the reply lacks the field.
+    """
+    __slots__ = ("parse", "raw", "parsed")
+
+    def __init__(self, parse):
+        self.parse = parse
+
+    def __set_name__(self, owner, name):
+        self.raw = "_raw_" + name
+        self.parsed = "_" + name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            return getattr(instance, self.parsed)
+        except AttributeError:
+            value = self.parse(getattr(instance, self.raw))
+            setattr(instance, self.parsed, value)
+            setattr(instance, self.raw, None)
+            return value
+
+def slots(plain : tuple, lazy : tuple = ()) -> tuple:
+    """Builds the ``__slots__`` of a model: one slot per plain field and two per
+    :py:class:`Lazy` field, for the raw and the parsed value.
+    """
+    return plain + tuple(slot for name in lazy for slot in ("_raw_" + name, "_" + name))
+
+class Model():
+    """Base class of the typed replies returned by a :py:class:`~pyshock.tshock.TShock`
+    created with ``typed=True``.
+
+    A model keeps the fields of a reply in ``__slots__`` instead of a dict, which takes a
+    fraction of the memory, and parses string fields like lists and coordinates only when
+    they are first read. Fields missing from the reply are None. Models may also be read
+    like the reply dict, e.g. ``player["nickname"]`` or ``player.get("team")``, so code
+    written for dicts keeps working.
+
+    :param fields:
+        The items of the reply. Items that are not fields of the model are ignored.
+    """
+    __slots__ = ()
+    fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        own = cls.__dict__.get("__slots__", ())
+        cls.fields = cls.fields + tuple(slot[5:] if slot.startswith("_raw_") else slot for slot in own
+                                        if slot.startswith("_raw_") or not slot.startswith("_"))
+        cls._layout = tuple((field, "_raw_" + field if isinstance(getattr(cls, field, None), Lazy) else field)
+                            for field in cls.fields)
+
+    def __init__(self, **fields):
+        for field, slot in self._layout:
+            setattr(self, slot, fields.get(field))
+
+    @classmethod
+    def from_reply(cls, reply : dict) -> "Model":
+        """Builds a model from a reply dict."""
+        return cls(**reply)
+
+    def __getitem__(self, key : str):
+        if key not in self.fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key : str) -> bool:
+        return key in self.fields
+
+    def get(self, key : str, default = None):
+        """Returns a field by name, or ``default`` if the model has no such field or it is None."""
+        value = getattr(self, key, None) if key in self.fields else None
+        return default if value is None else value
+
+    def to_dict(self) -> dict:
+        """Returns the parsed fields as a dict."""
+        return {field: getattr(self, field) for field in self.fields}
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return "{0}({1})".format(type(self).__name__, ", ".join(
+            "{0}={1!r}".format(field, getattr(self, field)) for field in self.fields[:2]))
+
+def _split(value) -> tuple:
+    """Splits a comma separated string; arrays are kept as they are."""
+    if not value:
+        return ()
+    if isinstance(value, str):
+        return tuple(part.strip() for part in value.split(",") if part.strip())
+    return tuple(value)
+
+def parse_position(value) -> tuple:
+    """Parses the ``"x,y"`` position of a player to an ``(x, y)`` tuple of tile coordinates."""
+    if not value:
+        return None
+    x, y = value.split(",")
+    return (int(float(x)), int(float(y)))
+
+def parse_inventory(value) -> tuple:
+    """Parses the ``"Name:stack, ..."`` inventory of a player to a tuple of ``(name, stack)`` tuples."""
+    stacks = []
+    for item in _split(value):
+        name, _, stack = item.rpartition(":")
+        if not name:
+            name, stack = stack, "1"
+        stacks.append((name, int(stack) if stack.isdigit() else 1))
+    return tuple(stacks)
+
+def parse_buffs(value) -> tuple:
+    """Parses the comma separated buff ids of a player to a tuple of ints."""
+    return tuple(int(buff) for buff in _split(value))
+
+def _color(value) -> tuple:
+    return tuple(int(part) for part in _split(value)) or None
+
+def _permissions(value) -> frozenset:
+    return frozenset(_split(value))
+
+def _players(value) -> tuple:
+    if isinstance(value, str) or not value:
+        return _split(value)
+    return tuple(Player.from_reply(player) for player in value)
+
+class Player(Model):
+    """A player, from :py:meth:`~pyshock.tshock.TShock.get_player_info` or the ``players``
+    of :py:meth:`~pyshock.tshock.TShock.get_server_status_v2`.
+
+    ``position`` is parsed to an ``(x, y)`` tuple, ``inventory`` to a tuple of
+    ``(item name, stack)`` tuples and ``buffs`` to a tuple of buff ids.
+    """
+    __slots__ = slots(("nickname", "username", "ip", "group", "active", "state", "team"),
+                      ("position", "inventory", "buffs"))
+    position = Lazy(parse_position)
+    inventory = Lazy(parse_inventory)
+    buffs = Lazy(parse_buffs)
+
+class Ban(Model):
+    """A ban, from :py:meth:`~pyshock.tshock.TShock.get_ban_information` or
+    :py:meth:`~pyshock.tshock.TShock.get_ban_list`."""
+    __slots__ = slots(("name", "ip", "reason"))
+
+class Group(Model):
+    """A group, from :py:meth:`~pyshock.tshock.TShock.get_group_info` or
+    :py:meth:`~pyshock.tshock.TShock.get_group_list`.
+
+    ``chatcolor`` is parsed to an ``(r, g, b)`` tuple, ``permissions`` and
+    ``negatedpermissions`` to tuples and ``totalpermissions`` to a frozenset.
+    """
+    __slots__ = slots(("name", "parent"), ("chatcolor", "permissions", "negatedpermissions", "totalpermissions"))
+    chatcolor = Lazy(_color)
+    permissions = Lazy(_split)
+    negatedpermissions = Lazy(_split)
+    totalpermissions = Lazy(_permissions)
+
+class User(Model):
+    """A user account, from :py:meth:`~pyshock.tshock.TShock.get_user_info` or
+    :py:meth:`~pyshock.tshock.TShock.get_user_list`."""
+    __slots__ = slots(("id", "name", "group", "ip"))
+
+class ServerStatus(Model):
+    """The server status, from :py:meth:`~pyshock.tshock.TShock.get_status` or
+    :py:meth:`~pyshock.tshock.TShock.get_server_status_v2`.
+
+    ``players`` is parsed to a tuple of nicknames for :py:meth:`~pyshock.tshock.TShock.get_status`
+    and to a tuple of :py:class:`Player` for :py:meth:`~pyshock.tshock.TShock.get_server_status_v2`.
+    """
+    __slots__ = slots(("name", "serverversion", "tshockversion", "port", "playercount", "maxplayers",
+                       "world", "uptime", "serverpassword", "rules"), ("players",))
+    players = Lazy(_players)
+
+def items(key : str, model : type):
+    """Returns a function converting the array ``key`` of a reply to models.
+    The reply itself stays a dict, so list replies are read the same way in both modes.
+    """
+    def convert(reply : dict) -> dict:
+        reply = dict(reply)
+        reply[key] = [model.from_reply(item) for item in reply.get(key, ())]
+        return reply
+    return convert
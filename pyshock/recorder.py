@@ -0,0 +1,360 @@
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import namedtuple
+from pyshock.enums import RequestPriority
+from pyshock.exceptions import ApiException
+from pyshock.scheduler import priority
+
+Sample = namedtuple("Sample", ["time", "playercount", "maxplayers", "worldtime", "daytime", "bloodmoon",
+                               "invasionsize", "players"])
+Sample.__doc__ = """One recorded poll of a server. ``time`` is a unix timestamp and ``players``
+a tuple of nicknames, or None if the scan did not ask for them."""
+
+Aggregate = namedtuple("Aggregate", ["start", "samples", "min_players", "max_players", "mean_players",
+                                     "bloodmoon", "max_invasion"])
+Aggregate.__doc__ = """The samples of one interval of :py:meth:`Recorder.downsample`.
+``bloodmoon`` is the fraction of the samples taken during a blood moon."""
+
+_HEADER = struct.Struct("<4sHHI4x")
+_MAGIC = b"PYSR"
+_VERSION = 1
+# time, world time, player count, max players, flags, invasion size
+_SAMPLE = struct.Struct("<dfHHBi")
+# sample index within the segment, player name id
+_ROSTER = struct.Struct("<II")
+_DAYTIME = 1
+_BLOODMOON = 2
+
+class _Segment():
+    """A file of fixed-width records behind a header holding the record count.
+    The file is created at its full size and mapped into memory, so appending a record is a
+    copy into the map, and readers only touch the pages of the records they read.
+    Only a writable segment is created; opening a missing one to read raises FileNotFoundError.
+    """
+    def __init__(self, path : str, record : struct.Struct, capacity : int = 0, writable : bool = False):
+        self.path = path
+        self.record = record
+        exists = os.path.exists(path)
+        if not exists and not writable:
+            raise FileNotFoundError("{0} does not exist.".format(path))
+        self._file = open(path, "r+b" if exists and writable else "rb" if exists else "w+b")
+        if not exists:
+            self._file.truncate(_HEADER.size + capacity * record.size)
+            self._file.write(_HEADER.pack(_MAGIC, _VERSION, record.size, 0))
+            self._file.flush()
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        magic, version, size, _ = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC or version != _VERSION or size != record.size:
+            self.close()
+            raise ValueError("{0} is not a recorder segment.".format(path))
+        self.capacity = (len(self._map) - _HEADER.size) // record.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def count(self) -> int:
+        return _HEADER.unpack_from(self._map)[3]
+
+    def append(self, *values):
+        count = self.count
+        self.record.pack_into(self._map, _HEADER.size + count * self.record.size, *values)
+        # The count is written last, so a reader never sees a half written record.
+        struct.pack_into("<I", self._map, 8, count + 1)
+
+    def first(self, index : int) -> float:
+        """Returns the first field of a record."""
+        return self.record.unpack_from(self._map, _HEADER.size + index * self.record.size)[0]
+
+    def bisect(self, value : float, count : int) -> int:
+        """Returns the index of the first record whose first field is not below ``value``."""
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if self.first(middle) < value:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def records(self, start : int, end : int, chunk : int = 4096):
+        """Iterates over the records from index ``start`` up to ``end``, copying
+        ``chunk`` records at a time out of the map."""
+        size = self.record.size
+        for index in range(start, end, chunk):
+            offset = _HEADER.size + index * size
+            yield from self.record.iter_unpack(self._map[offset:offset + min(chunk, end - index) * size])
+
+    def flush(self):
+        self._map.flush()
+
+    def close(self):
+        if not self._map.closed:
+            self._map.close()
+        self._file.close()
+
+class Recorder():
+    """Records the player count, world time, blood moon and invasion state of a server
+    in compact binary files, for history spanning weeks.
+
+    Every poll of :py:meth:`~pyshock.tshock.TShock.get_server_status_v2` and
+    :py:meth:`~pyshock.tshock.TShock.get_world_info` is appended as one 21 byte record to a
+    memory-mapped segment file. The nicknames of the players online are interned: each name is
+    stored once in ``names.jsonl`` and every sample only refers to its id. When a segment is full
+    a new one is started, so old segments can be archived or deleted as whole files.
+
+    Queries read the segments through memory maps, locate the requested range with a binary
+    search on the record times and decode only the records in it.
+
+    Example usage of the API:
+
+    >>> recorder = pyshock.Recorder("history/eu")
+    >>> recorder.start(tshock, interval=30)
+    >>> for bucket in recorder.downsample(3600, start=time.time() - 7 * 86400):
+    ...     print(bucket.start, bucket.max_players)
+
+    :param str path:
+        The directory to keep the segments in. It is created if needed.
+
+    :param int segment_size:
+        The number of samples per segment.
+
+    :param int roster_size:
+        (Optional) The number of player entries per segment. Defaults to 32 per sample.
+    """
+    def __init__(self, path : str, segment_size : int = 65536, roster_size : int = None):
+        self.path = path
+        self.segment_size = segment_size
+        self.roster_size = roster_size or segment_size * 32
+        self.last_error = None
+        self.names = []
+        self.ids = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        os.makedirs(path, exist_ok=True)
+        names = os.path.join(path, "names.jsonl")
+        if os.path.exists(names):
+            with open(names, encoding="utf-8") as file:
+                for line in file:
+                    self._intern(json.loads(line))
+        self._names = open(names, "a", encoding="utf-8")
+        segments = self._segment_numbers()
+        self._number = segments[-1] if segments else 0
+        self._samples, self._roster = self._open(self._number)
+        count = self._samples.count
+        # The time of the last sample; the times of new ones never go below it.
+        self._last = self._samples.first(count - 1) if count else float("-inf")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record(self, status : dict, world : dict, timestamp : float = None) -> Sample:
+        """Appends one sample.
+
+        :param dict status:
+            A reply of :py:meth:`~pyshock.tshock.TShock.get_server_status_v2` with players.
+
+        :param dict world:
+            A reply of :py:meth:`~pyshock.tshock.TShock.get_world_info`.
+
+        :param float timestamp:
+            (Optional) The unix time of the sample. Defaults to now. A time before the last
+            sample's, e.g. after the system clock was set back, is raised to it so the samples
+            stay in time order.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        players = tuple(player["nickname"] for player in status.get("players") or ())
+        flags = (_DAYTIME if world.get("daytime") else 0) | (_BLOODMOON if world.get("bloodmoon") else 0)
+        sample = Sample(timestamp, status.get("playercount") or 0, status.get("maxplayers") or 0,
+                        float(world.get("time") or 0.0), bool(flags & _DAYTIME), bool(flags & _BLOODMOON),
+                        world.get("invasionsize") or 0, players)
+        with self._lock:
+            if timestamp < self._last:
+                timestamp = self._last
+                sample = sample._replace(time=timestamp)
+            self._last = timestamp
+            if (self._samples.count >= self._samples.capacity or
+                    self._roster.count + len(players) > self._roster.capacity):
+                self._rotate()
+            index = self._samples.count
+            for name in players[:self._roster.capacity]:
+                self._roster.append(index, self._intern(name, store=True))
+            self._samples.append(timestamp, sample.worldtime, sample.playercount, sample.maxplayers, flags,
+                                 sample.invasionsize)
+        return sample
+
+    def poll(self, tshock) -> Sample:
+        """Requests the server status and world info and records them.
+
+        **endpoints:** /v2/server/status, /world/read
+        """
+        return self.record(tshock.get_server_status_v2(players=True), tshock.get_world_info())
+
+    def start(self, tshock, interval : float = 60.0):
+        """Polls the server every ``interval`` seconds on a daemon thread.
+        A failed poll records nothing and is stored in :py:attr:`last_error`.
+
+        :param TShock tshock:
+            The client to poll with.
+
+        :param float interval:
+            Seconds between two polls.
+        """
+        self.stop()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(tshock, interval), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the polls started by :py:meth:`start`."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def flush(self):
+        """Writes the current segment and the name dictionary to disk."""
+        with self._lock:
+            self._samples.flush()
+            self._roster.flush()
+            self._names.flush()
+
+    def close(self):
+        """Stops polling, flushes and closes the files."""
+        self.stop()
+        self.flush()
+        with self._lock:
+            self._samples.close()
+            self._roster.close()
+            self._names.close()
+
+    def scan(self, start : float = None, end : float = None, players : bool = False):
+        """Iterates over the samples taken from ``start`` up to, but not including, ``end``.
+
+        :param float start:
+            (Optional) Unix time of the first sample. Defaults to the oldest one.
+
+        :param float end:
+            (Optional) Unix time past the last sample. Defaults to now.
+
+        :param bool players:
+            Whether to read the nicknames of the players online, which is slower.
+
+        :returns:
+            A generator of :py:class:`Sample` tuples in time order.
+        """
+        for samples, roster, first, last in self._ranges(start, end):
+            with samples, roster:
+                entries = roster.records(roster.bisect(first, roster.count), roster.count) if players else None
+                entry = next(entries, None) if players else None
+                for index, values in enumerate(samples.records(first, last), first):
+                    online = None
+                    if players:
+                        online = []
+                        while entry is not None and entry[0] == index:
+                            online.append(self.names[entry[1]])
+                            entry = next(entries, None)
+                        online = tuple(online)
+                    yield _sample(values, online)
+
+    def downsample(self, step : float, start : float = None, end : float = None) -> list:
+        """Aggregates the samples of a time range into intervals of ``step`` seconds.
+        Intervals are aligned to multiples of ``step`` since the epoch and empty ones are left out.
+
+        :param float step:
+            The length of an interval in seconds, e.g. 3600 for hourly values.
+
+        :returns:
+            A list of :py:class:`Aggregate` tuples in time order.
+        """
+        buckets = []
+        current = None
+        for values in self._scan_records(start, end):
+            bucket = values[0] // step * step
+            if current is None or current[0] != bucket:
+                current = [bucket, 0, values[2], values[2], 0, 0, values[5]]
+                buckets.append(current)
+            current[1] += 1
+            current[2] = min(current[2], values[2])
+            current[3] = max(current[3], values[2])
+            current[4] += values[2]
+            current[5] += bool(values[4] & _BLOODMOON)
+            current[6] = max(current[6], values[5])
+        return [Aggregate(bucket, count, low, high, total / count, moon / count, invasion)
+                for bucket, count, low, high, total, moon, invasion in buckets]
+
+    def _scan_records(self, start, end):
+        for samples, roster, first, last in self._ranges(start, end):
+            with samples, roster:
+                yield from samples.records(first, last)
+
+    def _ranges(self, start, end):
+        """Opens every segment overlapping the time range, with the index range to read from it."""
+        start = float("-inf") if start is None else start
+        end = float("inf") if end is None else end
+        for number in self._segment_numbers():
+            try:
+                samples, roster = self._open(number, writable=False)
+            except FileNotFoundError:
+                # Deleted since it was listed, or its roster is not created yet.
+                continue
+            count = samples.count
+            if not count or samples.first(0) >= end or samples.first(count - 1) < start:
+                samples.close()
+                roster.close()
+                continue
+            yield samples, roster, samples.bisect(start, count), samples.bisect(end, count)
+
+    def _run(self, tshock, interval):
+        while not self._stop.wait(interval):
+            try:
+                with priority(RequestPriority.Background):
+                    self.poll(tshock)
+                self.last_error = None
+            except ApiException as e:
+                self.last_error = e
+
+    def _segment_numbers(self) -> list:
+        return sorted(int(os.path.basename(path)[:-8]) for path in glob.glob(os.path.join(self.path, "*.samples")))
+
+    def _open(self, number : int, writable : bool = True):
+        base = os.path.join(self.path, "{0:08d}".format(number))
+        samples = _Segment(base + ".samples", _SAMPLE, self.segment_size, writable)
+        try:
+            return samples, _Segment(base + ".roster", _ROSTER, self.roster_size, writable)
+        except BaseException:
+            samples.close()
+            raise
+
+    def _rotate(self):
+        self._samples.close()
+        self._roster.close()
+        self._number += 1
+        self._samples, self._roster = self._open(self._number)
+
+    def _intern(self, name : str, store : bool = False) -> int:
+        key = self.ids.get(name)
+        if key is None:
+            key = self.ids[name] = len(self.names)
+            self.names.append(name)
+            if store:
+                self._names.write(json.dumps(name) + "\n")
+                self._names.flush()
+        return key
+
+def _sample(values, players):
+    timestamp, worldtime, playercount, maxplayers, flags, invasionsize = values
+    return Sample(timestamp, playercount, maxplayers, worldtime, bool(flags & _DAYTIME), bool(flags & _BLOODMOON),
+                  invasionsize, players)
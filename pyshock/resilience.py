@@ -0,0 +1,128 @@
+import random
+import threading
+import time
+from pyshock.exceptions import CircuitOpenException, ConnectionException, ResponseException, TimeoutException
+
+class RetryPolicy():
+    """Decides whether a failed request is sent again and how long to wait first.
+
+    Only read-only ``get_`` requests are retried, and only after a
+    :py:class:`~pyshock.exceptions.TimeoutException` or
+    :py:class:`~pyshock.exceptions.ConnectionException`; an error status from the server is final.
+    The delays grow exponentially and are fully jittered, so that clients that failed
+    together do not retry together.
+
+    :param int retries:
+        The maximum number of times a request is sent again.
+
+    :param float backoff:
+        The upper bound of the first delay in seconds. It doubles with every retry.
+
+    :param float max_backoff:
+        The upper bound of any delay in seconds.
+    """
+    def __init__(self, retries : int = 3, backoff : float = 0.1, max_backoff : float = 5.0):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def delay(self, exception : Exception, attempt : int) -> float:
+        """Returns the seconds to wait before retrying, or None if the request must not be retried.
+
+        :param Exception exception:
+            What the failed attempt raised.
+
+        :param int attempt:
+            The number of retries made so far.
+        """
+        if attempt >= self.retries or isinstance(exception, CircuitOpenException):
+            return None
+        if not isinstance(exception, (TimeoutException, ConnectionException)):
+            return None
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+class CircuitBreaker():
+    """Stops sending requests to a server that keeps failing.
+
+    After ``failure_threshold`` consecutive failures of the server (see :py:meth:`is_failure`) the circuit opens
+    and requests fail straight away with a :py:class:`~pyshock.exceptions.CircuitOpenException`.
+    After ``reset_timeout`` seconds one request is let through: if it succeeds the circuit
+    closes again, otherwise it stays open for another ``reset_timeout``. A trial request
+    that has not finished after ``reset_timeout`` seconds counts as failed, so one that was
+    abandoned never keeps the circuit half open.
+
+    A breaker belongs to one server; do not share it between clients of different servers.
+
+    :param int failure_threshold:
+        The number of consecutive failures that opens the circuit.
+
+    :param float reset_timeout:
+        Seconds the circuit stays open before a trial request is let through.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold : int = 5, reset_timeout : float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened = 0.0
+        self._trial = 0.0
+        self._lock = threading.Lock()
+
+    def copy(self) -> "CircuitBreaker":
+        """Returns a new, closed breaker with the same settings."""
+        return CircuitBreaker(self.failure_threshold, self.reset_timeout)
+
+    def before_request(self):
+        """Called before every request.
+
+        :raises CircuitOpenException:
+            If the circuit is open, or half open with the trial request already in flight.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            now = time.monotonic()
+            if self.state == self.HALF_OPEN and now - self._trial >= self.reset_timeout:
+                # The trial request never reported back; count it as failed.
+                self.failures += 1
+                self._opened = self._trial
+                self.state = self.OPEN
+            if self.state == self.OPEN and now - self._opened >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial = now
+                return
+        raise CircuitOpenException("Not sending the request, the server failed {0} times in a row.".format(self.failures))
+
+    def record_success(self):
+        """Called after a request got an answer from the server."""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def is_failure(self, exception : BaseException) -> bool:
+        """Tells whether what a request raised is a failure of the server: a timeout, a connection
+        error or an HTTP 5xx reply. Anything else, such as a cancelled request, a status in the
+        reply or a bug in the caller, says nothing about the server and does not count."""
+        if isinstance(exception, ResponseException):
+            return str(exception.status).startswith("5")
+        return isinstance(exception, (TimeoutException, ConnectionException))
+
+    def record_aborted(self):
+        """Called after a request ended without telling whether the server works, e.g. it was
+        cancelled. A trial request is given up, so the next request is let through as the trial."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+                self._opened = time.monotonic() - self.reset_timeout
+
+    def record_failure(self):
+        """Called after a request failed, see :py:meth:`is_failure`, or its trial expired."""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened = time.monotonic()
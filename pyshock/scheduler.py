@@ -0,0 +1,191 @@
+import asyncio
+import itertools
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar, copy_context
+from pyshock.enums import RequestPriority
+
+_priority = ContextVar("pyshock_priority", default=None)
+
+@contextmanager
+def priority(value : RequestPriority):
+    """Sends every request made inside the block with the given priority, instead of the
+    priority of its endpoint. Applies to the current thread or asyncio task, and to the
+    calls that pyshock fans out from it to worker threads.
+
+    >>> with pyshock.scheduler.priority(RequestPriority.Background):
+    ...     tshock.get_ban_list()
+    """
+    token = _priority.set(value)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+def submit(pool, function, *args, **kwargs):
+    """Submits a call to a thread pool, to run with the :py:func:`priority` of the caller.
+    Worker threads do not inherit context variables, so each call runs in its own copy
+    of the caller's context."""
+    return pool.submit(copy_context().run, function, *args, **kwargs)
+
+def current_priority(endpoint = None) -> RequestPriority:
+    """Returns the priority of a request to an endpoint made here: the one set by
+    :py:func:`priority`, else the one of the endpoint."""
+    value = _priority.get()
+    if value is not None:
+        return value
+    return endpoint.priority if endpoint is not None else RequestPriority.Interactive
+
+class RequestScheduler():
+    """Limits the requests in flight to one server and lets the most urgent waiting one go first.
+
+    The TShock REST API answers requests one at a time, so a burst of polls delays everything
+    behind it. Pass a scheduler to :py:class:`~pyshock.tshock.TShock` and at most
+    ``max_in_flight`` requests are sent at once; the others wait in a queue ordered by
+    :py:class:`~pyshock.enums.RequestPriority`: moderation, then admin writes, then interactive
+    reads, then background polls. Every ``aging`` seconds of waiting raise a request by one
+    class, so background polls are delayed but never starved.
+
+    Endpoints carry a default priority, which :py:func:`priority` overrides. Cached and
+    coalesced replies never wait. Threads and asyncio tasks may share one scheduler.
+
+    A scheduler belongs to one server; do not share it between clients of different servers.
+
+    :param int max_in_flight:
+        The maximum number of requests sent to the server at once.
+
+    :param float aging:
+        Seconds of waiting that make a request as urgent as one of the next higher class.
+    """
+    def __init__(self, max_in_flight : int = 2, aging : float = 2.0):
+        self.max_in_flight = max_in_flight
+        self.aging = aging
+        self.in_flight = 0
+        self._waiting = []
+        self._order = itertools.count()
+        self._stats = {value: _PriorityStats() for value in RequestPriority}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, value : RequestPriority):
+        """Waits for a free slot and holds it for the duration of the block."""
+        self.acquire(value)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def slot_async(self, value : RequestPriority):
+        """Same as :py:meth:`slot`, awaiting the slot without blocking the event loop."""
+        await self.acquire_async(value)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def acquire(self, value : RequestPriority):
+        """Takes a slot, blocking until one is free and no more urgent request is waiting."""
+        event = threading.Event()
+        waiter = self._enqueue(value, event.set)
+        if waiter is not None:
+            event.wait()
+
+    async def acquire_async(self, value : RequestPriority):
+        """Takes a slot, awaiting until one is free and no more urgent request is waiting."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = self._enqueue(value, lambda: loop.call_soon_threadsafe(_resolve, future))
+        if waiter is None:
+            return
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    self._waiting.remove(waiter)
+                    self._stats[value].queued -= 1
+            if granted:
+                self.release()
+            raise
+
+    def release(self):
+        """Frees a slot, handing it to the most urgent waiting request if there is one."""
+        with self._lock:
+            if not self._waiting:
+                self.in_flight -= 1
+                return
+            now = time.monotonic()
+            waiter = min(self._waiting, key=lambda waiter: (waiter.priority.value - (now - waiter.enqueued) / self.aging,
+                                                            waiter.order))
+            self._waiting.remove(waiter)
+            waiter.granted = True
+            stats = self._stats[waiter.priority]
+            stats.queued -= 1
+            stats.record(now - waiter.enqueued)
+        waiter.wake()
+
+    def stats(self) -> dict:
+        """Returns the queue statistics.
+
+        :returns:
+            A dict with ``in_flight``, the number of requests being sent, and ``priorities``,
+            a dict mapping every priority name to a dict with these items:
+                * queued - Requests waiting right now
+                * max_queued - The longest the queue of this priority has been
+                * requests - Requests that got a slot
+                * wait_seconds - Total time requests waited for a slot
+                * max_wait - The longest a request waited for a slot
+        """
+        with self._lock:
+            return {"in_flight": self.in_flight,
+                    "priorities": {value.name: stats.snapshot() for value, stats in self._stats.items()}}
+
+    def _enqueue(self, value, wake):
+        """Takes a free slot and returns None, or queues a waiter and returns it."""
+        with self._lock:
+            stats = self._stats[value]
+            if self.in_flight < self.max_in_flight and not self._waiting:
+                self.in_flight += 1
+                stats.record(0.0)
+                return None
+            waiter = _Waiter(value, time.monotonic(), next(self._order), wake)
+            self._waiting.append(waiter)
+            stats.queued += 1
+            stats.max_queued = max(stats.max_queued, stats.queued)
+            return waiter
+
+class _Waiter():
+    __slots__ = ("priority", "enqueued", "order", "wake", "granted")
+
+    def __init__(self, priority, enqueued, order, wake):
+        self.priority = priority
+        self.enqueued = enqueued
+        self.order = order
+        self.wake = wake
+        self.granted = False
+
+class _PriorityStats():
+    __slots__ = ("queued", "max_queued", "requests", "wait_seconds", "max_wait")
+
+    def __init__(self):
+        self.queued = 0
+        self.max_queued = 0
+        self.requests = 0
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait):
+        self.requests += 1
+        self.wait_seconds += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def snapshot(self) -> dict:
+        return {"queued": self.queued, "max_queued": self.max_queued, "requests": self.requests,
+                "wait_seconds": self.wait_seconds, "max_wait": self.max_wait}
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,150 @@
+import asyncio
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pyshock.exceptions import ApiException, ResponseException
+from pyshock.scheduler import submit
+
+Command = namedtuple("Command", ["line", "command", "concurrent"])
+Command.__doc__ = """One command of a :py:class:`Script`.
+``line`` is its line number in the script, counting from one."""
+
+CommandResult = namedtuple("CommandResult", ["line", "command", "output", "exception"])
+CommandResult.__doc__ = """The outcome of one command of a :py:class:`Script`.
+``output`` is the list of lines the server answered with, or None if the command raised ``exception``."""
+
+class Script():
+    """A sequence of server commands run through ``do_server_rawcmd_v3``.
+
+    A script has one command per line. Empty lines and lines starting with ``#`` are skipped.
+    A command starting with ``&`` is independent: it may run at the same time as the
+    independent commands around it. Any other command is a barrier: it starts once every
+    command before it has finished, and the commands after it wait for it to finish.
+
+    Example script::
+
+        # Warn everyone, then save before restarting.
+        /broadcast Restarting in one minute
+        & /kick Alice Cheating
+        & /kick Bob Cheating
+        & /ban add Carol Griefing
+        /save
+
+    Results are yielded in the order of the script as soon as every command before them
+    has finished, whatever order the server answers in. A command raising an ApiException
+    does not stop the script; the exception is reported in its result.
+
+    Example usage of the API:
+
+    >>> script = pyshock.Script.load("restart.txt")
+    >>> for result in script.run(tshock, max_in_flight=8):
+    ...     print(result.line, result.command, result.output or result.exception)
+
+    :param commands:
+        An iterable of :py:class:`Command` tuples, or of lines in the syntax above.
+    """
+    def __init__(self, commands = ()):
+        self.commands = []
+        for line, command in enumerate(commands, 1):
+            if isinstance(command, Command):
+                self.commands.append(command)
+            else:
+                self._add_line(line, command)
+
+    def __iter__(self):
+        return iter(self.commands)
+
+    def __len__(self):
+        return len(self.commands)
+
+    @classmethod
+    def parse(cls, text : str) -> "Script":
+        """Builds a script from its text."""
+        return cls(text.splitlines())
+
+    @classmethod
+    def load(cls, path : str) -> "Script":
+        """Reads a script from a file."""
+        with open(path, encoding="utf-8") as file:
+            return cls(file.read().splitlines())
+
+    def _add_line(self, line : int, text : str):
+        text = text.strip()
+        if not text or text.startswith("#"):
+            return
+        concurrent = text.startswith("&")
+        if concurrent:
+            text = text[1:].lstrip()
+        self.commands.append(Command(line, text, concurrent))
+
+    def run(self, tshock, max_in_flight : int = 4):
+        """Runs the script on a thread pool.
+
+        :param TShock tshock:
+            The :py:class:`~pyshock.tshock.TShock` to run the commands on.
+
+        :param int max_in_flight:
+            The maximum number of commands running at once.
+
+        :returns:
+            A generator of :py:class:`CommandResult` tuples in the order of the script.
+        """
+        pending = deque()
+        pool = ThreadPoolExecutor(max_workers=max_in_flight)
+        try:
+            for command in self.commands:
+                if not command.concurrent:
+                    while pending:
+                        yield pending.popleft().result()
+                pending.append(submit(pool, _run, tshock, command))
+                if not command.concurrent:
+                    yield pending.popleft().result()
+                while pending and pending[0].done():
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # Commands that have not started yet are not run when the caller stops early.
+            pool.shutdown(cancel_futures=True)
+
+    async def run_async(self, tshock, max_in_flight : int = 4):
+        """Same as :py:meth:`run` for an :py:class:`~pyshock.async_tshock.AsyncTShock`,
+        running on the event loop. Returns an async generator.
+        """
+        semaphore = asyncio.Semaphore(max_in_flight)
+
+        async def run(command):
+            async with semaphore:
+                try:
+                    return _result(command, await tshock.do_server_rawcmd_v3(command.command))
+                except ApiException as e:
+                    return CommandResult(command.line, command.command, None, e)
+
+        pending = deque()
+        try:
+            for command in self.commands:
+                if not command.concurrent:
+                    while pending:
+                        yield await pending.popleft()
+                pending.append(asyncio.ensure_future(run(command)))
+                if not command.concurrent:
+                    yield await pending.popleft()
+                while pending and pending[0].done():
+                    yield pending.popleft().result()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+
+def _run(tshock, command : Command) -> CommandResult:
+    try:
+        return _result(command, tshock.do_server_rawcmd_v3(command.command))
+    except ApiException as e:
+        return CommandResult(command.line, command.command, None, e)
+
+def _result(command : Command, reply : dict) -> CommandResult:
+    if reply["status"] != "200":
+        return CommandResult(command.line, command.command, None, ResponseException(
+            "Command failed. Server returned status: {0} With error: {1}".format(reply["status"], reply.get("error")),
+            reply["status"], reply.get("error")))
+    return CommandResult(command.line, command.command, reply.get("response", []), None)
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+
+class SingleFlight():
+    """Lets concurrent identical ``get_`` requests share one call to the server.
+
+    Pass an instance to :py:class:`~pyshock.tshock.TShock` or
+    :py:class:`~pyshock.async_tshock.AsyncTShock` to enable it. While a request for a url is in
+    flight, every other thread or task requesting the same url waits for it and gets the same
+    reply dict, or the same exception, instead of sending a request of its own. Urls include
+    the parameters and the token, so only truly identical requests are shared. The ``do_``
+    and ``set_`` functions are never shared.
+
+    Shared dicts must not be modified, like the ones of a :py:class:`~pyshock.cache.ResponseCache`.
+
+    Example usage of the API:
+
+    >>> flights = pyshock.SingleFlight()
+    >>> tshock = pyshock.TShock("127.0.0.1", 7878, single_flight=flights)
+    >>> pool.map(lambda _: tshock.get_server_status_v2(players=True), range(8))
+    >>> flights.stats()
+    {'requests': 1, 'coalesced': 7, 'in_flight': 0}
+    """
+    def __init__(self):
+        self.requests = 0
+        self.coalesced = 0
+        self._calls = {}
+        # Keyed by event loop and key: a task can only be awaited on the loop running it.
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def do(self, key : str, function):
+        """Calls ``function``, unless a call for ``key`` is already in flight on another
+        thread, in which case its outcome is waited for and shared.
+
+        :param str key:
+            What identifies identical calls, e.g. the url.
+
+        :param function:
+            Called without arguments.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.requests += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.exception is not None:
+                raise call.exception
+            return call.result
+        try:
+            call.result = function()
+            return call.result
+        except BaseException as e:
+            call.exception = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key : str, function):
+        """Same as :py:meth:`do` for a coroutine function, sharing calls between the tasks
+        of an event loop. Tasks of different event loops never share a call. A task that is
+        cancelled while waiting does not cancel the call for the others.
+        """
+        key = (asyncio.get_running_loop(), key)
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is None:
+                task = self._tasks[key] = asyncio.ensure_future(function())
+                task.add_done_callback(lambda done: self._forget(key, done))
+                self.requests += 1
+            else:
+                self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        """Returns the sharing statistics.
+
+        :returns:
+            A dict with these items:
+                * requests - Calls that went to the server
+                * coalesced - Calls that shared the reply of another one
+                * in_flight - Calls currently waited for
+        """
+        with self._lock:
+            return {"requests": self.requests, "coalesced": self.coalesced,
+                    "in_flight": len(self._calls) + len(self._tasks)}
+
+    def _forget(self, key, task):
+        with self._lock:
+            del self._tasks[key]
+        # Every waiter may have been cancelled; the outcome is retrieved so it is not reported as lost.
+        if not task.cancelled():
+            task.exception()
+
+class _Call():
+    __slots__ = ("done", "result", "exception")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.exception = None
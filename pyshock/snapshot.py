@@ -0,0 +1,185 @@
+import sys
+import threading
+from pyshock.models import parse_buffs, parse_inventory, parse_position
+
+def _numpy():
+    # NumPy is only needed for snapshots, so it is not imported with the package.
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("Player snapshots require the numpy package.")
+    return numpy
+
+class ItemVocabulary():
+    """Maps item names to small integer ids, in the order they are first seen.
+    Snapshots that share a vocabulary use the same id for the same item and can be
+    merged without remapping. Safe to share between threads.
+    """
+    def __init__(self, names = ()):
+        self.names = []
+        self.ids = {}
+        self._lock = threading.Lock()
+        for name in names:
+            self.id(name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def id(self, name : str) -> int:
+        """Returns the id of an item, adding it to the vocabulary if it is new."""
+        item = self.ids.get(name)
+        if item is None:
+            with self._lock:
+                item = self.ids.get(name)
+                if item is None:
+                    item = self.ids[sys.intern(name)] = len(self.names)
+                    self.names.append(name)
+        return item
+
+    def get(self, name : str) -> int:
+        """Returns the id of an item, or -1 if it was never seen."""
+        return self.ids.get(name, -1)
+
+class PlayerSnapshot():
+    """The info of every player of one or more servers, stored column by column in NumPy arrays
+    with one row per player. Requires the ``numpy`` package.
+
+    Columns:
+        * nickname, username, group, ip - String arrays
+        * server - Index into :py:attr:`servers` of the server the player is on
+        * x, y - Tile position, NaN if unknown
+        * items - Item id matrix, one column per inventory slot that holds something, padded with -1
+        * stacks - Stack size matrix matching ``items``, padded with 0
+        * buffs - Buff id matrix, padded with -1
+
+    Item ids are looked up in :py:attr:`vocabulary`. The queries return boolean masks that
+    can index any column or be passed to :py:meth:`select`.
+
+    Example usage of the API:
+
+    >>> snapshot = tshock.snapshot_players()
+    >>> snapshot.nickname[snapshot.holding("Zenith", more_than=1)]
+    array(['player3'], dtype='<U7')
+    >>> snapshot.select(snapshot.within(4200, 1200, radius=50)).nickname
+    """
+    COLUMNS = ("nickname", "username", "group", "ip", "server", "x", "y", "items", "stacks", "buffs")
+
+    def __init__(self, servers : tuple, vocabulary : ItemVocabulary, **columns):
+        self.servers = tuple(servers)
+        self.vocabulary = vocabulary
+        for name in self.COLUMNS:
+            setattr(self, name, columns[name])
+
+    def __len__(self):
+        return len(self.nickname)
+
+    def __repr__(self):
+        return "<PlayerSnapshot {0} players on {1} servers>".format(len(self), len(self.servers))
+
+    @classmethod
+    def from_replies(cls, replies : list, server : str = "", vocabulary : ItemVocabulary = None) -> "PlayerSnapshot":
+        """Builds a snapshot of one server.
+
+        :param list replies:
+            The replies of :py:meth:`~pyshock.tshock.TShock.get_player_info`, one per player.
+
+        :param str server:
+            The name of the server.
+
+        :param ItemVocabulary vocabulary:
+            (Optional) The vocabulary to add the item names to. Defaults to a new one.
+        """
+        np = _numpy()
+        vocabulary = vocabulary if vocabulary is not None else ItemVocabulary()
+        count = len(replies)
+        inventories = [parse_inventory(reply.get("inventory")) for reply in replies]
+        buffs = [parse_buffs(reply.get("buffs")) for reply in replies]
+        positions = [parse_position(reply.get("position")) or (np.nan, np.nan) for reply in replies]
+        items = np.full((count, max(map(len, inventories), default=0)), -1, dtype=np.int32)
+        stacks = np.zeros(items.shape, dtype=np.int32)
+        for row, inventory in enumerate(inventories):
+            if inventory:
+                items[row, :len(inventory)] = [vocabulary.id(name) for name, _ in inventory]
+                stacks[row, :len(inventory)] = [stack for _, stack in inventory]
+        buff_matrix = np.full((count, max(map(len, buffs), default=0)), -1, dtype=np.int32)
+        for row, ids in enumerate(buffs):
+            buff_matrix[row, :len(ids)] = ids
+        position = np.array(positions, dtype=np.float32).reshape(count, 2)
+        return cls((server,), vocabulary,
+                   nickname=_strings(np, replies, "nickname"), username=_strings(np, replies, "username"),
+                   group=_strings(np, replies, "group"), ip=_strings(np, replies, "ip"),
+                   server=np.zeros(count, dtype=np.int16), x=position[:, 0], y=position[:, 1],
+                   items=items, stacks=stacks, buffs=buff_matrix)
+
+    @classmethod
+    def merge(cls, snapshots) -> "PlayerSnapshot":
+        """Concatenates snapshots, e.g. of several servers, into one.
+        Item ids are translated to the vocabulary of the first snapshot.
+
+        :param snapshots:
+            An iterable of snapshots.
+        """
+        np = _numpy()
+        snapshots = list(snapshots)
+        if not snapshots:
+            return cls.from_replies([])
+        vocabulary = snapshots[0].vocabulary
+        servers = []
+        columns = {name: [] for name in cls.COLUMNS}
+        width = max(snapshot.items.shape[1] for snapshot in snapshots)
+        buff_width = max(snapshot.buffs.shape[1] for snapshot in snapshots)
+        for snapshot in snapshots:
+            for name in ("nickname", "username", "group", "ip", "x", "y"):
+                columns[name].append(getattr(snapshot, name))
+            columns["server"].append(snapshot.server + len(servers))
+            servers.extend(snapshot.servers)
+            items = snapshot.items
+            if snapshot.vocabulary is not vocabulary and items.size:
+                lookup = np.array([vocabulary.id(name) for name in snapshot.vocabulary.names] or [-1], dtype=np.int32)
+                items = np.where(items >= 0, lookup[items.clip(0)], -1)
+            columns["items"].append(_pad(np, items, width, -1))
+            columns["stacks"].append(_pad(np, snapshot.stacks, width, 0))
+            columns["buffs"].append(_pad(np, snapshot.buffs, buff_width, -1))
+        return cls(servers, vocabulary, **{name: np.concatenate(arrays) for name, arrays in columns.items()})
+
+    def select(self, mask) -> "PlayerSnapshot":
+        """Returns a snapshot of the rows a boolean mask (or index array) selects."""
+        return PlayerSnapshot(self.servers, self.vocabulary, **{name: getattr(self, name)[mask] for name in self.COLUMNS})
+
+    def count(self, item : str):
+        """Returns the total stack of an item held by every player."""
+        np = _numpy()
+        item = self.vocabulary.get(item)
+        if item < 0:
+            return np.zeros(len(self), dtype=self.stacks.dtype)
+        return np.where(self.items == item, self.stacks, 0).sum(axis=1)
+
+    def holding(self, item : str, more_than : int = 0):
+        """Returns a mask of the players holding more than ``more_than`` of an item over all their slots."""
+        return self.count(item) > more_than
+
+    def has_buff(self, buff : int):
+        """Returns a mask of the players affected by a buff."""
+        return (self.buffs == buff).any(axis=1)
+
+    def within(self, x : float, y : float, radius : float, server : str = None):
+        """Returns a mask of the players at most ``radius`` tiles away from a position.
+
+        :param str server:
+            (Optional) Only match players on this server. Positions on different servers
+            are unrelated, so this should be given for merged snapshots.
+        """
+        mask = (self.x - x) ** 2 + (self.y - y) ** 2 <= radius * radius
+        if server is not None:
+            mask &= self.server == (self.servers.index(server) if server in self.servers else -1)
+        return mask
+
+def _strings(np, replies, key):
+    return np.array([reply.get(key) or "" for reply in replies], dtype=str)
+
+def _pad(np, matrix, width, fill):
+    if matrix.shape[1] == width:
+        return matrix
+    padded = np.full((matrix.shape[0], width), fill, dtype=matrix.dtype)
+    padded[:, :matrix.shape[1]] = matrix
+    return padded
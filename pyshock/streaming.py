@@ -0,0 +1,137 @@
+import codecs
+import json
+
+_MORE = object()
+# What the parser expects next.
+_OBJECT = 0
+_KEY = 1
+_COLON = 2
+_VALUE = 3
+_FIRST_ITEM = 4
+_ITEM = 5
+_AFTER_ITEM = 6
+_AFTER_VALUE = 7
+_END = 8
+
+class ArrayParser():
+    """Parses a JSON object fed in chunks and returns the elements of one of its arrays as
+    soon as each is complete, so a reply holding a large array is never decoded as a whole.
+
+    Only the unparsed rest of the last chunk and the element being read are held in memory.
+    The other members of the object are decoded as usual and collected in :py:attr:`members`.
+
+    >>> parser = ArrayParser("bans")
+    >>> parser.feed(b'{"status": "200", "bans": [{"name": "a"}, {"na')
+    [{'name': 'a'}]
+    >>> parser.feed(b'me": "b"}]}')
+    [{'name': 'b'}]
+    >>> parser.close()
+    {'status': '200'}
+
+    :param str key:
+        The member holding the array.
+    """
+    def __init__(self, key : str):
+        self.key = key
+        self.members = {}
+        self._buffer = ""
+        self._position = 0
+        self._state = _OBJECT
+        self._name = None
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+
+    def feed(self, chunk : bytes) -> list:
+        """Parses the next chunk of the body.
+
+        :returns:
+            The elements of the array completed by this chunk.
+        """
+        self._buffer = self._buffer[self._position:] + self._text.decode(chunk)
+        self._position = 0
+        return self._parse(False)
+
+    def close(self) -> dict:
+        """Parses what is left once the body has been read.
+
+        :returns:
+            The members of the object other than the array.
+
+        :raises ValueError:
+            If the body is not a complete JSON object.
+        """
+        self._buffer = self._buffer[self._position:] + self._text.decode(b"", final=True)
+        self._position = 0
+        if self._parse(True) or self._state != _END:
+            raise ValueError("The reply ended before the JSON object was complete.")
+        return self.members
+
+    def _parse(self, final):
+        items = []
+        buffer = self._buffer
+        while True:
+            while self._position < len(buffer) and buffer[self._position] in " \t\r\n":
+                self._position += 1
+            if self._position == len(buffer):
+                return items
+            char = buffer[self._position]
+            state = self._state
+            if state == _OBJECT:
+                self._expect(char, "{", _KEY)
+            elif state == _KEY:
+                if char == "}" and self._name is None:
+                    self._expect(char, "}", _END)
+                    continue
+                name = self._decode(final)
+                if name is _MORE:
+                    return items
+                if not isinstance(name, str):
+                    raise ValueError("Expected a member name at position {0}.".format(self._position))
+                self._name = name
+                self._state = _COLON
+            elif state == _COLON:
+                self._expect(char, ":", _VALUE)
+            elif state == _VALUE:
+                if self._name == self.key and char == "[":
+                    self._expect(char, "[", _FIRST_ITEM)
+                    continue
+                value = self._decode(final)
+                if value is _MORE:
+                    return items
+                self.members[self._name] = value
+                self._state = _AFTER_VALUE
+            elif state == _FIRST_ITEM and char == "]":
+                self._expect(char, "]", _AFTER_VALUE)
+            elif state in (_FIRST_ITEM, _ITEM):
+                value = self._decode(final)
+                if value is _MORE:
+                    return items
+                items.append(value)
+                self._state = _AFTER_ITEM
+            elif state == _AFTER_ITEM:
+                self._expect(char, ",]", _ITEM if char == "," else _AFTER_VALUE)
+            elif state == _AFTER_VALUE:
+                self._expect(char, ",}", _KEY if char == "," else _END)
+            else:
+                raise ValueError("Unexpected data after the JSON object at position {0}.".format(self._position))
+
+    def _expect(self, char, allowed, state):
+        if char not in allowed:
+            raise ValueError("Expected one of {0!r} at position {1}, got {2!r}.".format(allowed, self._position, char))
+        self._position += 1
+        self._state = state
+
+    def _decode(self, final):
+        """Decodes the value at the current position, or returns _MORE if it may continue
+        in the next chunk."""
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._position)
+        except ValueError:
+            if final:
+                raise
+            return _MORE
+        # A number or literal ending with the buffer may be cut off.
+        if end == len(self._buffer) and not final and self._buffer[end - 1] not in '"]}':
+            return _MORE
+        self._position = end
+        return value
@@ -0,0 +1,275 @@
+import asyncio
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from urllib.parse import urlsplit
+from pyshock.exceptions import ApiException, ConnectionException, TimeoutException
+
+REDACTED = "REDACTED"
+
+_HEADER = struct.Struct("<4sH")
+_MAGIC = b"PYSA"
+_VERSION = 1
+# kind, url length, body length, seconds the server took
+_RECORD = struct.Struct("<BHIf")
+_MAX_URL = 0xFFFF
+_REPLY = 0
+_TIMEOUT = 1
+_UNREACHABLE = 2
+_ERROR = 3
+_EXCEPTIONS = {_TIMEOUT: TimeoutException, _UNREACHABLE: ConnectionException, _ERROR: ApiException}
+# Query parameters and path prefixes whose value is a secret.
+_SECRET_QUERY = ("token=", "password=")
+_SECRET_PATHS = ("/v2/token/create/", "/token/destroy/")
+
+def redact(url : str) -> str:
+    """Returns the path and query of a request url with the token and passwords replaced.
+    Urls are recorded and looked up in this form, so an archive holds no secrets and
+    replays the same way whatever the server address or the token.
+
+    >>> redact("http://127.0.0.1:7878/v2/token/create/secret?username=Ijwu&token=")
+    '/v2/token/create/REDACTED?username=Ijwu&token=REDACTED'
+    """
+    parts = urlsplit(url)
+    path = parts.path
+    for prefix in _SECRET_PATHS:
+        if path.startswith(prefix):
+            path = prefix + REDACTED
+    query = "&".join(pair.partition("=")[0] + "=" + REDACTED if pair.startswith(_SECRET_QUERY) else pair
+                     for pair in parts.query.split("&") if pair)
+    return path + "?" + query if query else path
+
+class Transport():
+    """Sends the requests of a client. The default one sends them to the server.
+
+    Pass a subclass to :py:class:`~pyshock.tshock.TShock` or
+    :py:class:`~pyshock.async_tshock.AsyncTShock` to change how requests are answered,
+    e.g. a :py:class:`RecordingTransport` or a :py:class:`ReplayTransport`. A transport sits
+    below the cache, retries, circuit breaker and scheduler, so all of them behave as with
+    a real server.
+    """
+    def send(self, url : str, timeout : float, send) -> bytes:
+        """Returns the body of the reply to a request.
+
+        :param str url:
+            The full url, token included.
+
+        :param float timeout:
+            The timeout of the request.
+
+        :param send:
+            The client's own ``send(url, timeout)``, which requests the server and raises
+            :py:class:`~pyshock.exceptions.TimeoutException` or
+            :py:class:`~pyshock.exceptions.ConnectionException` on failure.
+        """
+        return send(url, timeout)
+
+    async def send_async(self, url : str, timeout : float, send) -> bytes:
+        """Same as :py:meth:`send` for :py:class:`~pyshock.async_tshock.AsyncTShock`,
+        where ``send`` is a coroutine function."""
+        return await send(url, timeout)
+
+class RecordingTransport(Transport):
+    """Sends requests to the server and appends every reply to an archive, for a
+    :py:class:`ReplayTransport` to answer them later without a server.
+
+    Each record holds the url with the token and passwords redacted (see :py:func:`redact`),
+    the compressed body and the seconds the server took. Timeouts and connection failures
+    are recorded as well and raised again on replay. Tokens in replies to ``v2/token/create``
+    are redacted too. Recording appends to an existing archive. A request whose redacted url
+    is longer than 65535 bytes cannot be recorded and raises ValueError before it is sent.
+
+    Example usage of the API:
+
+    >>> with pyshock.RecordingTransport("session.pysa") as transport:
+    ...     tshock = pyshock.TShock("127.0.0.1", 7878, transport=transport)
+    ...     run_bot(tshock)
+
+    :param str path:
+        The archive file.
+    """
+    def __init__(self, path : str):
+        self.path = path
+        self.records = 0
+        self._lock = threading.Lock()
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, "ab")
+        if not exists:
+            self._file.write(_HEADER.pack(_MAGIC, _VERSION))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def send(self, url : str, timeout : float, send) -> bytes:
+        key = _key(url)
+        started = time.perf_counter()
+        try:
+            body = send(url, timeout)
+        except ApiException as e:
+            self._write(key, e, time.perf_counter() - started)
+            raise
+        self._write(key, body, time.perf_counter() - started)
+        return body
+
+    async def send_async(self, url : str, timeout : float, send) -> bytes:
+        key = _key(url)
+        started = time.perf_counter()
+        try:
+            body = await send(url, timeout)
+        except ApiException as e:
+            self._write(key, e, time.perf_counter() - started)
+            raise
+        self._write(key, body, time.perf_counter() - started)
+        return body
+
+    def flush(self):
+        """Writes the buffered records to disk."""
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        """Flushes and closes the archive."""
+        with self._lock:
+            self._file.close()
+
+    def _write(self, key, outcome, elapsed):
+        if isinstance(outcome, bytes):
+            kind = _REPLY
+            body = _redact_body(key, outcome)
+        else:
+            kind = _TIMEOUT if isinstance(outcome, TimeoutException) else \
+                   _UNREACHABLE if isinstance(outcome, ConnectionException) else _ERROR
+            body = str(outcome).encode("utf-8")
+        body = zlib.compress(body)
+        with self._lock:
+            self._file.write(_RECORD.pack(kind, len(key), len(body), elapsed))
+            self._file.write(key)
+            self._file.write(body)
+            self.records += 1
+
+def _key(url):
+    """Returns the redacted url a request is recorded under, checking that a record can hold it."""
+    key = redact(url).encode("utf-8")
+    if len(key) > _MAX_URL:
+        raise ValueError("Cannot record a url of {0} bytes; the limit is {1}.".format(len(key), _MAX_URL))
+    return key
+
+class ReplayTransport(Transport):
+    """Answers requests from an archive written by :py:class:`RecordingTransport`,
+    without a server.
+
+    The archive is read and decompressed into memory up front, so replies are served at full
+    speed. Requests are matched on their redacted url; a url recorded several times is
+    answered with its replies in recorded order, and the last one is repeated once they run
+    out. Timeouts and connection failures are raised as they were recorded.
+
+    Example usage of the API:
+
+    >>> transport = pyshock.ReplayTransport("session.pysa", latency=1.0)
+    >>> tshock = pyshock.TShock("127.0.0.1", 7878, transport=transport)
+    >>> run_bot(tshock)
+    >>> transport.stats()
+    {'replies': 120, 'missing': 0}
+
+    :param str path:
+        The archive file.
+
+    :param float latency:
+        (Optional) Multiplier of the recorded server times to wait before answering,
+        e.g. 1.0 to replay at the recorded speed. Defaults to 0, answering at once.
+    """
+    def __init__(self, path : str, latency : float = 0.0):
+        self.path = path
+        self.latency = latency
+        self.replies = 0
+        self.missing = 0
+        self._records = {}
+        self._positions = {}
+        self._lock = threading.Lock()
+        with open(path, "rb") as file:
+            data = file.read()
+        if len(data) < _HEADER.size or _HEADER.unpack_from(data) != (_MAGIC, _VERSION):
+            raise ValueError("{0} is not a transport archive.".format(path))
+        offset = _HEADER.size
+        while offset + _RECORD.size <= len(data):
+            kind, url_size, body_size, elapsed = _RECORD.unpack_from(data, offset)
+            offset += _RECORD.size
+            end = offset + url_size + body_size
+            if end > len(data):
+                # The recording was interrupted in the middle of a record.
+                break
+            url = data[offset:offset + url_size].decode("utf-8")
+            body = zlib.decompress(data[offset + url_size:end])
+            self._records.setdefault(url, []).append((kind, body, elapsed))
+            offset = end
+
+    def __len__(self):
+        return sum(len(records) for records in self._records.values())
+
+    @property
+    def urls(self) -> list:
+        """The redacted urls in the archive."""
+        return list(self._records)
+
+    def send(self, url : str, timeout : float, send) -> bytes:
+        kind, body, elapsed = self._next(url)
+        if self.latency:
+            time.sleep(elapsed * self.latency)
+        return _outcome(kind, body)
+
+    async def send_async(self, url : str, timeout : float, send) -> bytes:
+        kind, body, elapsed = self._next(url)
+        if self.latency:
+            await asyncio.sleep(elapsed * self.latency)
+        return _outcome(kind, body)
+
+    def rewind(self):
+        """Starts replaying every url from its first recorded reply again."""
+        with self._lock:
+            self._positions.clear()
+
+    def stats(self) -> dict:
+        """Returns the replay statistics.
+
+        :returns:
+            A dict with these items:
+                * replies - Requests answered from the archive
+                * missing - Requests whose url is not in the archive
+        """
+        with self._lock:
+            return {"replies": self.replies, "missing": self.missing}
+
+    def _next(self, url):
+        key = redact(url)
+        with self._lock:
+            records = self._records.get(key)
+            if records is None:
+                self.missing += 1
+                raise ApiException("No recorded reply for {0}.".format(key))
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            self.replies += 1
+        return records[min(position, len(records) - 1)]
+
+def _outcome(kind, body):
+    if kind == _REPLY:
+        return body
+    raise _EXCEPTIONS[kind](body.decode("utf-8"))
+
+def _redact_body(key, body):
+    if not key.startswith(b"/v2/token/create/"):
+        return body
+    try:
+        results = json.loads(body)
+    except ValueError:
+        return body
+    if isinstance(results, dict) and "token" in results:
+        results["token"] = REDACTED
+        return json.dumps(results).encode("utf-8")
+    return body
@@ -1,7 +1,87 @@
-import requests as req
-from pyshock.exceptions import ApiException
-from pyshock.enums import UserLookupType, BanLookupType
-from urllib.parse import urljoin, urlencode
+import json
+import threading
+import time
+from contextlib import closing, contextmanager
+from pyshock.batch import BatchResult, run_batch
+from pyshock.cache import ResponseCache
+from pyshock.enums import RequestPriority
+from pyshock.exceptions import ApiException, ConnectionException, ResponseException, TimeoutException
+from pyshock.instrumentation import RequestHook, RequestInfo
+from pyshock.models import Ban, Group, User
+from pyshock.resilience import CircuitBreaker, RetryPolicy
+from pyshock.scheduler import RequestScheduler, current_priority, priority
+from pyshock.singleflight import SingleFlight
+from pyshock.snapshot import ItemVocabulary, PlayerSnapshot
+from pyshock.streaming import ArrayParser
+from pyshock.transport import Transport
+from pyshock.endpoints import ENDPOINTS, Endpoint, encode
+from pyshock.watch import PollInterval, diff_players, index_players
+from urllib.parse import quote, quote_plus, urlsplit, parse_qsl
+
+def check_response(results : dict) -> dict:
+    """Checks the ``status`` member of a decoded REST response.
+    Shared by every client so they all raise on the same statuses.
+
+    :param dict results:
+        The decoded JSON reply of the TShock server.
+
+    :returns:
+        The same dict, if the status is 200 or 400.
+
+    :raises ResponseException:
+        If the REST response returns a status other than 200 or 400.
+    """
+    if results['status'] == "404":
+        raise ResponseException("404 Error. Are you sure the server has REST enabled?", "404", results.get("error"))
+    elif results['status'] in ["200", "400"]:
+        pass
+    else:
+        raise ResponseException("Error in request. Server returned status: {0} With error: {1}".format(
+            results["status"],
+            results["error"]
+        ), results["status"], results["error"])
+    return results
+
+def transport_error(exception : Exception) -> ApiException:
+    """Translates an exception raised by :py:mod:`requests` to the ApiException to raise instead."""
+    from requests.exceptions import ConnectionError, Timeout
+    if isinstance(exception, Timeout):
+        return TimeoutException("The server did not answer in time.")
+    if isinstance(exception, ConnectionError):
+        return ConnectionException("Could not connect to the server.")
+    return ApiException("An error occurred in making the request to the server.")
+
+def server_error(status : int, body : bytes) -> ResponseException:
+    """Returns the ResponseException to raise for a reply with an HTTP 5xx status.
+    Unlike a status in the JSON of a reply, it counts as a failure of the server for the circuit breaker."""
+    try:
+        error = json.loads(body).get("error")
+    except (ValueError, AttributeError):
+        error = None
+    return ResponseException("The server failed with HTTP status {0}.".format(status), str(status), error)
+
+def is_token_error(exception : ApiException) -> bool:
+    """Tells whether a request failed because its token is missing, expired or destroyed.
+    TShock answers those with status 401 or 403 and an error mentioning the token; a 403
+    for a user lacking a permission is not a token error.
+
+    :param ApiException exception:
+        What the request raised.
+    """
+    if not isinstance(exception, ResponseException):
+        return False
+    return exception.status == "401" or (exception.status == "403" and "token" in (exception.error or ""))
+
+def player_names(results : dict) -> list:
+    """Returns the nicknames of a :py:meth:`~TShock.get_player_list` reply, which is a comma
+    separated string on older servers and an array of players on newer ones."""
+    players = results.get("players") or []
+    if isinstance(players, str):
+        return [name.strip() for name in players.split(",") if name.strip()]
+    return [player["nickname"] for player in players]
+
+# Requests that manage the token themselves and are never replayed with a new one.
+_TOKEN_ENDPOINTS = frozenset(("get_token", "get_token_status", "do_destroy_token"))
 
 class TShock():
     """The main API wrapper. This class handles all requests.
@@ -51,14 +131,161 @@ class TShock():
 
     :param int port:
         the port that the REST API is opened on
+
+    :param int pool_size:
+        the maximum number of keep-alive connections kept open to the server.
+        Set this to at least the number of threads sharing the instance.
+
+    :param float timeout:
+        (Optional) the default number of seconds to wait for a response, or a
+        ``(connect, read)`` tuple of seconds. ``None`` waits forever.
+
+    :param ResponseCache cache:
+        (Optional) a :py:class:`~pyshock.cache.ResponseCache` that answers repeated
+        ``get_`` requests. The ``do_`` and ``set_`` functions evict what they change.
+
+    :param RetryPolicy retry:
+        (Optional) a :py:class:`~pyshock.resilience.RetryPolicy` for ``get_`` requests
+        that time out or cannot connect. Nothing is retried by default.
+
+    :param CircuitBreaker breaker:
+        (Optional) a :py:class:`~pyshock.resilience.CircuitBreaker` that makes requests fail
+        fast while the server is down.
+
+    :param str user:
+        (Optional) the user to obtain tokens under. Together with ``password`` this lets
+        the instance manage its token by itself, see below.
+
+    :param str password:
+        (Optional) the user's password.
+
+    :param SingleFlight single_flight:
+        (Optional) a :py:class:`~pyshock.singleflight.SingleFlight` that lets concurrent
+        identical ``get_`` requests share one call to the server.
+
+    :param RequestScheduler scheduler:
+        (Optional) a :py:class:`~pyshock.scheduler.RequestScheduler` that caps the requests in
+        flight to the server and sends urgent ones (kicks, bans) before background polls.
+
+    :param bool typed:
+        (Optional) return :py:mod:`~pyshock.models` instead of dicts for players, bans,
+        groups, users and the server status. List replies stay dicts whose arrays hold models.
+        Defaults to false.
+
+    :param Transport transport:
+        (Optional) a :py:class:`~pyshock.transport.Transport` that answers the requests instead
+        of the server, e.g. to record them with :py:class:`~pyshock.transport.RecordingTransport`
+        and replay them offline with :py:class:`~pyshock.transport.ReplayTransport`.
+
+    When credentials are given (or :py:meth:`get_token` is run with ``remember=True``), there
+    is no need to test the token with :py:meth:`get_token_status`: the first request obtains a
+    token, and a request rejected because the token is no longer valid obtains a new one and is
+    sent once more. Threads that find the token invalid at the same time wait for a single
+    ``v2/token/create`` request. A token obtained by :py:meth:`get_token` is destroyed on :py:meth:`close`.
+
+    Failures raise subclasses of ApiException: :py:class:`~pyshock.exceptions.TimeoutException`,
+    :py:class:`~pyshock.exceptions.ConnectionException` (and its subclass
+    :py:class:`~pyshock.exceptions.CircuitOpenException`) when the server cannot be reached, and
+    :py:class:`~pyshock.exceptions.ResponseException` when it answers with an error status.
+
+    A single instance may be shared between threads. Connections are pooled and
+    reused through one :py:class:`requests.Session`, and the token is only ever
+    replaced as a whole, so a request always carries either the old or the new token.
+    Call :py:meth:`close` (or use the instance as a context manager) to release the
+    pooled connections.
     """
-    def __init__(self, ip, port):
+    def __init__(self, ip, port, pool_size : int = 10, timeout : float = None, cache : ResponseCache = None,
+                 retry : RetryPolicy = None, breaker : CircuitBreaker = None, user : str = None, password : str = None,
+                 single_flight : SingleFlight = None, scheduler : RequestScheduler = None, typed : bool = False,
+                 transport : Transport = None):
         self.urls = RequestBuilder(ip, port)
         self.ip = ip
         self.port = port
-        self.token = ""
-
-    def _make_request(self, url : str) -> dict:
+        self.timeout = timeout
+        self.cache = cache
+        self.retry = retry
+        self.breaker = breaker
+        self.single_flight = single_flight
+        self.scheduler = scheduler
+        self.typed = typed
+        self.transport = transport
+        self.listeners = []
+        self.hooks = []
+        self.credentials = (user, password) if user is not None else None
+        self._owns_token = False
+        self._auth_lock = self._create_lock()
+        self.session = self._create_session(pool_size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def token(self) -> str:
+        """The token passed with every request. Empty until :py:meth:`get_token` is run."""
+        return self.urls.token
+
+    @token.setter
+    def token(self, value : str):
+        self.urls.token = value
+        self._owns_token = False
+
+    def close(self):
+        """Destroys the token obtained by :py:meth:`get_token`, if any, and closes all
+        pooled connections to the server. A token that was assigned to :py:attr:`token`
+        directly is left alone.
+        """
+        if self._owns_token:
+            try:
+                self.do_destroy_token()
+            except ApiException:
+                pass
+            self.token = ""
+        self.session.close()
+
+    def add_listener(self, callback):
+        """Registers a function to be called with every successful reply.
+        Used by the local indexes to follow changes made through this instance.
+
+        :param callback:
+            Called as ``callback(endpoint, params, results)`` where ``endpoint`` is the
+            url path (e.g. ``"/v2/groups/create"``), ``params`` is a dict of the query
+            parameters without the token and ``results`` is the reply dict.
+        """
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """Unregisters a function added with :py:meth:`add_listener`."""
+        self.listeners.remove(callback)
+
+    def add_hook(self, hook : RequestHook):
+        """Registers a hook called before and after every request sent to the server,
+        e.g. a :py:class:`~pyshock.instrumentation.RequestMetrics`. Without any hooks,
+        requests are not timed at all.
+
+        :param RequestHook hook:
+            A :py:class:`~pyshock.instrumentation.RequestHook`.
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook : RequestHook):
+        """Unregisters a hook added with :py:meth:`add_hook`."""
+        self.hooks.remove(hook)
+
+    def _create_session(self, pool_size : int):
+        # requests is imported by the first client rather than with the package, so that
+        # importing pyshock (and the command line interface) stays fast.
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _make_request(self, url : str, timeout : float = None, endpoint : Endpoint = None) -> dict:
         """Makes a GET request to the specified url.
         Takes care of checking the response status as well
         as handling all possible connection errors.
@@ -66,32 +293,281 @@ class TShock():
         :param str url:
             Url string to make a GET request to.
 
+        :param float timeout:
+            (Optional) Seconds to wait for a response. Defaults to the
+            timeout given at instantiation.
+
+        :param Endpoint endpoint:
+            (Optional) The endpoint the url belongs to, reported to the hooks.
+
         :returns:
             A dict mapping of the json reply.
             every response dict has a ``status`` member
             indicating the HTTP response status. MOst mappings
             have a ``response`` member.
 
-        :raises ApiException:
-            If the request times out or the REST response returns a status other than 200 or 400.
+        :raises TimeoutException:
+            If the server does not answer in time.
+
+        :raises ConnectionException:
+            If the server cannot be reached, or the circuit breaker is open.
+
+        :raises ResponseException:
+            If the REST response returns a status other than 200 or 400.
         """
+        results = self._cached(url)
+        if results is not None:
+            return results
+        if self._shared(endpoint):
+            return self.single_flight.do(url, lambda: self._fetch(url, timeout, endpoint))
+        return self._fetch(url, timeout, endpoint)
+
+    def _fetch(self, url : str, timeout : float, endpoint : Endpoint) -> dict:
+        generation = self._generation(url)
+        try:
+            if not self.hooks:
+                return self._decode(url, self._send(url, timeout, endpoint), None, generation)
+            with self._measure(url, endpoint) as info:
+                return self._decode(url, self._send(url, timeout, endpoint), info, generation)
+        except BaseException:
+            self._failed(url)
+            raise
+
+    def _send(self, url : str, timeout : float, endpoint : Endpoint = None) -> bytes:
+        """Sends the GET request and returns the body of the reply,
+        retrying read-only endpoints according to :py:attr:`retry`.
+        """
+        attempt = 0
+        while True:
+            try:
+                if self.scheduler is None:
+                    return self._send_once(url, timeout)
+                with self.scheduler.slot(current_priority(endpoint)):
+                    return self._send_once(url, timeout)
+            except ApiException as e:
+                delay = self._retry_delay(e, attempt, endpoint)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+    def _send_once(self, url : str, timeout : float) -> bytes:
+        with self._circuit():
+            if self.transport is None:
+                return self._get(url, timeout)
+            return self.transport.send(url, timeout, self._get)
+
+    def _get(self, url : str, timeout : float) -> bytes:
+        try:
+            res = self.session.get(url, timeout=timeout if timeout is not None else self.timeout)
+        except Exception as e:
+            raise transport_error(e)
+        if res.status_code >= 500:
+            raise server_error(res.status_code, res.content)
+        return res.content
+
+    def _chunks(self, url : str, chunk_size : int, endpoint : Endpoint = None):
+        """Sends the GET request and yields the body of the reply in chunks as it is received.
+        The scheduler slot is held until the reply is read or the generator is closed."""
+        if self.scheduler is None:
+            yield from self._stream(url, chunk_size)
+            return
+        with self.scheduler.slot(current_priority(endpoint)):
+            yield from self._stream(url, chunk_size)
+
+    def _stream(self, url : str, chunk_size : int):
+        if self.transport is not None:
+            yield self._send_once(url, None)
+            return
+        with self._circuit():
+            try:
+                res = self.session.get(url, timeout=self.timeout, stream=True)
+            except Exception as e:
+                raise transport_error(e)
+            if res.status_code >= 500:
+                with res:
+                    raise server_error(res.status_code, res.content)
+        with res:
+            try:
+                yield from res.iter_content(chunk_size)
+            except Exception as e:
+                self._record_failure()
+                raise transport_error(e)
+
+    def _iter_items(self, endpoint : Endpoint, key : str, model : type, chunk_size : int):
+        """Yields the elements of the array ``key`` of an endpoint's reply while it is received.
+        The status is checked once the reply is complete; a reply rejecting the token holds no
+        elements, so it is sent once more with a new one like :py:meth:`_authorized_request` does.
+        Until the first element is yielded, failures are retried like :py:meth:`_send` does, and
+        the hooks see the whole stream as one request.
+        """
+        if self.credentials is not None and not self.token:
+            self._authenticate("")
+        if not self.hooks:
+            yield from self._stream_items(endpoint, key, model, chunk_size, None)
+            return
+        with self._measure(self.urls.build(endpoint), endpoint) as info:
+            yield from self._stream_items(endpoint, key, model, chunk_size, info)
+
+    def _stream_items(self, endpoint, key, model, chunk_size, info):
+        reauthenticate = self.credentials is not None
+        attempt = 0
+        while True:
+            token = self.token
+            parser = ArrayParser(key)
+            yielded = False
+            try:
+                with closing(self._chunks(self.urls.build(endpoint), chunk_size, endpoint)) as chunks:
+                    for chunk in chunks:
+                        if info is not None:
+                            info.size = (info.size or 0) + len(chunk)
+                        for item in parser.feed(chunk):
+                            yielded = True
+                            yield model.from_reply(item) if self.typed else item
+                results = check_response(parser.close())
+                if info is not None:
+                    info.status = results.get("status")
+                return
+            except ApiException as e:
+                if yielded:
+                    raise
+                if reauthenticate and is_token_error(e):
+                    reauthenticate = False
+                    self._authenticate(token)
+                    continue
+                delay = self._retry_delay(e, attempt, endpoint)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+    # The bookkeeping around a request, shared with AsyncTShock, which only differs in its I/O.
+
+    def _shared(self, endpoint : Endpoint) -> bool:
+        """Tells whether concurrent identical requests to an endpoint share one reply."""
+        return self.single_flight is not None and endpoint is not None and endpoint.read
+
+    def _retry_delay(self, exception : ApiException, attempt : int, endpoint : Endpoint) -> float:
+        """Returns the seconds to wait before sending a failed request again, or None to give up."""
+        if self.retry is None or endpoint is None or not endpoint.read:
+            return None
+        return self.retry.delay(exception, attempt)
+
+    @contextmanager
+    def _circuit(self):
+        """Sends the request made inside the block through the circuit breaker, if any.
+        Only failures of the server count; anything else ending the block, cancellation
+        included, still gives up a trial request so the circuit never stays half open."""
+        if self.breaker is None:
+            yield
+            return
+        self.breaker.before_request()
+        try:
+            yield
+        except BaseException as e:
+            if self.breaker.is_failure(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_aborted()
+            raise
+        self.breaker.record_success()
+
+    def _record_failure(self):
+        if self.breaker is not None:
+            self.breaker.record_failure()
+
+    @contextmanager
+    def _measure(self, url : str, endpoint : Endpoint):
+        """Reports the request made inside the block to the hooks, once per call, retries included."""
+        info = RequestInfo(endpoint.name if endpoint is not None else urlsplit(url).path, url).begin(self.hooks)
+        try:
+            yield info
+        except Exception as e:
+            info.exception = e
+            raise
+        finally:
+            info.end(self.hooks)
+
+    def _decode(self, url : str, body : bytes, info : RequestInfo = None, generation : int = None) -> dict:
+        """Decodes the body of a reply and finishes it like :py:meth:`_finish`."""
+        results = json.loads(body)
+        if info is not None:
+            info.size = len(body)
+            info.status = results.get("status")
+        return self._finish(url, results, generation)
+
+    def _request(self, endpoint : Endpoint, values : tuple = ()) -> dict:
+        """Makes a request to an endpoint. All generated functions end up here.
+
+        :param Endpoint endpoint:
+            The endpoint to request.
+
+        :param tuple values:
+            The argument values, in the order of the endpoint's parameters.
+        """
+        results = self._authorized_request(endpoint, values)
+        if self.typed and endpoint.model is not None:
+            return endpoint.model(results)
+        return results
+
+    def _authorized_request(self, endpoint : Endpoint, values : tuple) -> dict:
+        if self.credentials is None or endpoint.name in _TOKEN_ENDPOINTS:
+            return self._make_request(self.urls.build(endpoint, values), endpoint=endpoint)
+        if not self.token:
+            self._authenticate("")
+        token = self.token
         try:
-            res = req.get(url)
-        except Exception:
-            raise ApiException("An error occurred in making the request to the server.")
-        results = res.json()
-        if results['status'] == "404":
-            raise ApiException("404 Error. Are you sure the server has REST enabled?")
-        elif results['status'] in ["200", "400"]:
-            pass
-        else:
-            raise ApiException("Error in request. Server returned status: {0} With error: {1}".format(
-                results["status"],
-                results["error"]
-            ))
+            return self._make_request(self.urls.build(endpoint, values), endpoint=endpoint)
+        except ResponseException as e:
+            if not is_token_error(e):
+                raise
+        self._authenticate(token)
+        return self._make_request(self.urls.build(endpoint, values), endpoint=endpoint)
+
+    def _create_lock(self):
+        return threading.Lock()
+
+    def _authenticate(self, rejected : str):
+        """Obtains a new token with the stored credentials, unless another thread
+        already replaced the rejected one while this one was waiting."""
+        with self._auth_lock:
+            if self.token == rejected:
+                self.get_token(*self.credentials)
+
+    def _run_batch(self, function, items, max_in_flight : int, rate) -> BatchResult:
+        return run_batch(function, items, max_in_flight, rate)
+
+    def _cached(self, url : str):
+        """Returns the cached reply for the url, or None if there is none."""
+        if self.cache is None:
+            return None
+        return self.cache.get(urlsplit(url).path, url)
+
+    def _generation(self, url : str) -> int:
+        """Returns the cache generation of the url's endpoint, taken before the request is sent."""
+        if self.cache is None:
+            return None
+        return self.cache.generation(urlsplit(url).path)
+
+    def _failed(self, url : str):
+        """Evicts what a failed request to a write endpoint may have changed anyway."""
+        if self.cache is not None:
+            self.cache.failed(urlsplit(url).path)
+
+    def _finish(self, url : str, results : dict, generation : int = None) -> dict:
+        """Checks a decoded reply and updates the cache and listeners with it."""
+        results = check_response(results)
+        if self.cache is not None:
+            self.cache.store(urlsplit(url).path, url, results, generation)
+        if self.listeners and results["status"] == "200":
+            parts = urlsplit(url)
+            params = dict(parse_qsl(parts.query, keep_blank_values=True))
+            params.pop("token", None)
+            for callback in self.listeners:
+                callback(parts.path, params, results)
         return results
 
-    def get_token(self, user : str, password : str):
+    def get_token(self, user : str, password : str, remember : bool = False):
         """Gets and stores a token for the user.
         The token is used for all rest endpoints that require authentication.
         The token may be overridden by running this function again.
@@ -102,25 +578,16 @@ class TShock():
         :param str password:
             String that is the user's password.
 
-        **endpoint:** v2/token/create/
-        """
-        self.urls.token = self._make_request(
-            self.urls.get_url("v2", "token", "create", password, username=user)
-        )["token"]
-
-    def get_status(self) -> dict:
-        """Gets the server status.
-
-        :returns:
-            A dict with these items:
-                * name - Server name
-                * port - Server port
-                * playercount - Amount of players on the server
-                * players - CSV list of players currently connected
+        :param bool remember:
+            (Optional) keep the credentials to obtain a new token by itself when this one
+            stops being valid. Defaults to false.
 
-        **endpoint:** /status
+        **endpoint:** v2/token/create/
         """
-        return self._make_request(self.urls.get_url("status"))
+        self.token = self._request(ENDPOINTS["get_token"], (user, password))["token"]
+        self._owns_token = True
+        if remember:
+            self.credentials = (user, password)
 
     def get_token_status(self) -> bool:
         """Tests if the the currently saved token is still valid.
@@ -131,522 +598,264 @@ class TShock():
         **endpoint:** /tokentest
         """
         try:
-            self._make_request(self.urls.get_url("tokentest"))
+            self._request(ENDPOINTS["get_token_status"])
         except ApiException:
             return False
         return True
 
-    def get_server_status_v2(self, players=False, rules=False, filters=None) -> dict:
-        """Gets the server status. Includes various items based
-        on the parameters sent.
+    def watch(self, min_interval : float = 1.0, max_interval : float = 30.0, filters : dict = None, initial : bool = False):
+        """Polls the server's players and yields what changed between two polls.
+        Polls every ``min_interval`` seconds while players are joining, leaving or changing,
+        and slows down to ``max_interval`` seconds while nothing happens.
 
-        :param bool players:
-            Bool deciding if players should be included in the response.
+        :param float min_interval:
+            The shortest delay between polls.
 
-        :param bool rules:
-            Bool deciding if server config rules should be included in the response.
+        :param float max_interval:
+            The longest delay between polls.
 
         :param dict filters:
-            Dict of filters to be applied to the player search. May contain these items:
-                * nickname
-                * username
-                * group
-                * active
-                * state
-                * team
-
-        :returns:
-            A dict with these items:
-                * name - Server name
-                * port - Port the server is running on
-                * playercount - Number of players currently online
-                * maxplayers - The maximum number of players the server support
-                * world - The name of the currently running world
-                * players - (optional) an array of players including the following information:
-                    * nickname
-                    * username
-                    * ip
-                    * group
-                    * active
-                    * state
-                    * team
-                * rules - (optional) an array of server rules which are name value pairs e.g. AutoSave, DisableBuild etc
+            (Optional) Player filters, see :py:meth:`get_server_status_v2`.
 
-        **endpoint:** /v2/server/status
-        """
-        if filters is None:
-            filters = {}
-        return self._make_request(self.urls.get_url("v2", "server", "status", players=players, rules=rules, **filters))
-
-    def get_active_user_list(self):
-        """Gets the currently active players logged into a server.
-
-        :returns:
-            A dict with these items:
-                * activeusers - list of active users
-
-        **endpoint:** /v2/users/activelist
-        """
-        return self._make_request(self.urls.get_url("v2", "users", "activelist"))
-
-    def get_user_info(self, lookup : UserLookupType, user : str):
-        """Gets information about a specific user.
-
-        :param UserLookupType lookup:
-            Should be a value of the UserLookupType Enum stating what the
-            lookup value is.
-
-        :param str user:
-            String that is either the user name, id, or ip, depending on the
-            lookup type.
+        :param bool initial:
+            Whether to yield a :py:class:`~pyshock.watch.PlayerJoined` for every player
+            already online at the first poll.
 
         :returns:
-            A dict with these items:
-                * group - The group the user belong's to
-                * id - The user's ID
-                * name - The name of the user
-                * ip - The ip of the user
+            An endless generator of :py:class:`~pyshock.watch.PlayerJoined`,
+            :py:class:`~pyshock.watch.PlayerLeft`, :py:class:`~pyshock.watch.GroupChanged`
+            and :py:class:`~pyshock.watch.TeamChanged` events.
 
-        **endpoint:** /v2/users/read
-        """
-        return self._make_request(self.urls.get_url("v2", "users", "read", type=lookup.value, user=user))
-
-    def get_ban_information(self, lookup : BanLookupType, user : str) -> dict:
-        """Gets information about a ban.
-
-        :param BanLookupType lookup:
-            a BanLookupType value dictating how to search
-            for the user
-
-        :param str user:
-            the user info to search for
-
-        :returns:
-            a dict with these items:
-                * name - The username of the player
-                * ip - The IP address of the player
-                * reason - The reason the player was banned
+        :raises ApiException:
+            If a poll fails. The generator cannot be resumed afterwards.
 
-        **endpoint:** /v2/bans/read
+        **endpoint:** /v2/server/status
         """
-        return self._make_request(self.urls.get_url("v2", "bans", "read", type=lookup.value, ban=user))
+        interval = PollInterval(min_interval, max_interval)
+        previous = {} if initial else None
+        while True:
+            with priority(RequestPriority.Background):
+                current = index_players(self.get_server_status_v2(players=True, filters=filters).get("players", []))
+            events = diff_players(previous, current) if previous is not None else []
+            previous = current
+            yield from events
+            time.sleep(interval.next(bool(events)))
 
-    def get_ban_list(self):
-        """Gets a list of all of the bans on the server.
+    def snapshot_players(self, max_in_flight : int = 8, vocabulary : ItemVocabulary = None) -> PlayerSnapshot:
+        """Gets the info of every player concurrently and stores it in NumPy columns.
+        Players that leave before their info is read are left out. Requires the ``numpy`` package.
 
-        :returns:
-            A dict with these items:
-                * bans - An array of all the currently banned players including:
-                    * name
-                    * ip
-                    * reason
+        :param int max_in_flight:
+            The maximum number of requests in flight at once.
 
-        **endpoint:** /v2/bans/list
-        """
-        return self._make_request(self.urls.get_url("v2", "bans", "list"))
-
-    def get_player_list(self):
-        """Gets a list of all of the players currently on the server.
+        :param ItemVocabulary vocabulary:
+            (Optional) The :py:class:`~pyshock.snapshot.ItemVocabulary` to map item names with.
+            Pass the same one to snapshots that will be merged.
 
         :returns:
-            A dict with these items:
-                * players - A list of all current players on the server, separated by a comma.
+            A :py:class:`~pyshock.snapshot.PlayerSnapshot` named ``"ip:port"``.
 
-        **endpoint:** /v2/players/list
+        **endpoints:** /v2/players/list, /v2/players/read
         """
-        return self._make_request(self.urls.get_url("v2", "players", "list"))
+        names = player_names(self._authorized_request(ENDPOINTS["get_player_list"], ()))
+        batch = self._run_batch(lambda name: self._authorized_request(ENDPOINTS["get_player_info"], (name,)),
+                                names, max_in_flight, None)
+        return PlayerSnapshot.from_replies([item.reply for item in batch.succeeded],
+                                           "{0}:{1}".format(self.ip, self.port), vocabulary)
 
-    def get_player_info(self, player : str):
-        """Gets information about a specific player.
+    def iter_bans(self, chunk_size : int = 65536):
+        """Iterates over the bans on the server, parsing the reply while it is received.
+        Unlike :py:meth:`get_ban_list`, the list is never held in memory as a whole, and
+        stopping early stops reading the reply. Neither the cache nor the listeners see it;
+        it holds a scheduler slot until it is read or closed, and is reported to the hooks once.
 
-        :param str player:
-            The player to look for, by name.
+        :param int chunk_size:
+            The number of bytes read from the connection at a time.
 
         :returns:
-            A dict with these items:
-                * nickname - The player's nickname
-                * username - The player's username (if they are registered)
-                * ip - The player's IP address
-                * group - The group that the player belongs to
-                * position - The player's current position on the map
-                * inventory - A list of all items in the player's inventory
-                * buffs - A list of all buffs that are currently affecting the player
-
-        **endpoint:** /v2/players/read
-        """
-        return self._make_request(self.urls.get_url("v2", "players", "read", player=player))
+            A generator of ban dicts with ``name``, ``ip`` and ``reason``, or of
+            :py:class:`~pyshock.models.Ban` when the instance is typed.
 
-    def get_world_info(self):
-        """Gets some information about the current world.
+        :raises ResponseException:
+            Once the reply is complete, if its status is not 200 or 400.
 
-        :returns:
-            A dict with these items:
-                * name - The world name
-                * size - The dimensions of the world
-                * time - The current time in the world
-                * daytime - Bool value indicating whether it is daytime or not
-                * bloodmoon - Bool value indicating whether there is a blood moon or not
-                * invasionsize - The current invasion size
-
-        **endpoint:** /world/read
+        **endpoint:** /v2/bans/list
         """
-        return self._make_request(self.urls.get_url("world", "read"))
+        return self._iter_items(ENDPOINTS["get_ban_list"], "bans", Ban, chunk_size)
 
-    def get_group_list(self):
-        """Returns a list of all of the groups on the server.
+    def iter_groups(self, chunk_size : int = 65536):
+        """Iterates over the groups on the server, parsing the reply while it is received.
+        See :py:meth:`iter_bans`.
 
         :returns:
-            A dict with these items:
-                * groups - An array of the groups configured on the server including:
-                    * name
-                    * parent
-                    * chatcolor
+            A generator of group dicts with ``name``, ``parent`` and ``chatcolor``, or of
+            :py:class:`~pyshock.models.Group` when the instance is typed.
 
         **endpoint:** /v2/groups/list
         """
-        return self._make_request(self.urls.get_url("v2", "groups", "list"))
-
-    def get_group_info(self, group : str):
-        """Returns info about a specific group.
-
-        :param str group:
-            The group to search for.
-
-        :returns:
-            A dict with these items:
-                * name - The name of the group
-                * parent - The name of the parent of this group
-                * chatcolor - The chat color of this group
-                * permissions - An array of permissions assigned "directly" to this group
-                * negatedpermissions - An array of negated permissions assigned "directly" to this group
-                * totalpermissions - An array of the calculated permissions available to members of this group
-                                     due to direct permissions and inherited permissions
-
-        **endpoint:** /v2/groups/read
-        """
-        return self._make_request(self.urls.get_url("v2", "groups", "read", group=group))
-
-    def get_server_motd(self):
-        """Gets the server's MOTD.
-
-        :returns:
-            A dict with these items:
-                * motd - The server's Message of the Day
-
-        **endpoint:** /v3/server/motd
-        """
-        return self._make_request(self.urls.get_url("v3", "server", "motd"))
+        return self._iter_items(ENDPOINTS["get_group_list"], "groups", Group, chunk_size)
 
-    def get_server_rules(self):
-        """Gets the server's rules.
+    def iter_users(self, chunk_size : int = 65536):
+        """Iterates over the user accounts on the server, parsing the reply while it is received.
+        See :py:meth:`iter_bans`.
 
         :returns:
-            A dict with these items:
-                * rules - The server rules
+            A generator of user dicts with ``name``, ``id`` and ``group``, or of
+            :py:class:`~pyshock.models.User` when the instance is typed.
 
-        **endpoint:** /v3/server/rules
+        **endpoint:** /v2/users/list
         """
-        return self._make_request(self.urls.get_url("v3", "server", "rules"))
+        return self._iter_items(ENDPOINTS["get_user_list"], "users", User, chunk_size)
 
     def do_destroy_token(self):
         """Destroys the token being used by this class.
 
         **endpoint:** /token/destroy
         """
-        self._make_request(self.urls.get_url("token", "destroy", self.urls.token))
+        return self._request(ENDPOINTS["do_destroy_token"], (self.token,))
 
-    def do_destroy_all_tokens(self):
-        """Destroys all tokens registered with the server.
+    def do_create_bans(self, bans, max_in_flight : int = 4, rate = None) -> BatchResult:
+        """Bans many users concurrently. See :py:meth:`do_create_ban`.
 
-        **endpoint:** /v3/token/destroy/all
-        """
-        self._make_request(self.urls.get_url("v3", "token", "destroy", "all"))
+        :param bans:
+            An iterable of ``(ip, name, reason)`` tuples.
 
-    def do_server_broadcast(self, message : str):
-        """Broadcasts a message to all users on the server.
+        :param int max_in_flight:
+            The maximum number of requests in flight at once.
 
-        :param str message:
-            The message to be broadcasted.
-
-        **endpoint:** /v2/server/broadcast
-        """
-        self._make_request(self.urls.get_url("v2", "server", "broadcast", msg=message))
-
-    def do_server_reload(self):
-        """Reloads the config file, permissions, and regions of the server.
-
-        **endpoint:** /v3/server/reload
-        """
-        self._make_request(self.urls.get_url("v3", "server", "reload"))
-
-    def do_server_off(self):
-        """Shuts down the server.
-
-        **endpoint:** /v2/server/off
-        """
-        self._make_request(self.urls.get_url("v2", "server", "off"))
-
-    def do_server_restart(self):
-        """Restarts the server.
-
-        **endpoint:** /v3/server/restart
-        """
-        self._make_request(self.urls.get_url("v3", "server", "restart"))
-
-    def do_server_rawcmd_v2(self, command : str):
-        """Executes a command on the server and returns the output.
-
-        :param str command:
-            The command to be executed.
-
-        :returns:
-            A dict with these items:
-                * response - The output of the command as a string. Each line of output is separated by a newline.
-
-        **endpoint:** /v2/server/rawcmd
-        """
-        return self._make_request(self.urls.get_url("v2", "server", "rawcmd", cmd=command))
-
-    def do_server_rawcmd_v3(self, command : str):
-        """Executes a command on the server and returns the output.
-
-        :param str command:
-            The command to be executed.
+        :param rate:
+            (Optional) The maximum number of requests per second, or a
+            :py:class:`~pyshock.batch.RateLimiter` shared with other batches.
 
         :returns:
-            A dict with these items:
-                * response - The output of the command as an array of strings.
-
-        **endpoint:** /v3/server/rawcmd
-        """
-        return self._make_request(self.urls.get_url("v3", "server", "rawcmd", cmd=command))
-
-    def do_create_ban(self, ip : str, name : str, reason : str):
-        """Bans a user.
-
-        :param str ip:
-            The ip address to ban. Is required.
-
-        :param str name:
-            The player name to ban. May be an empty string.
-
-        :param str reason:
-            The reason the player was banned. May be an empty string.
+            A :py:class:`~pyshock.batch.BatchResult`. ApiExceptions are collected
+            per ban instead of stopping the batch.
 
         **endpoint:** /bans/create
         """
-        self._make_request(self.urls.get_url("bans", "create", ip=ip, name=name, reason=reason))
+        return self._run_batch(lambda ban: self.do_create_ban(*ban), bans, max_in_flight, rate)
 
-    def do_delete_ban(self, type : BanLookupType, ban : str):
-        """Deletes a ban.
+    def do_kick_players(self, players, reason : str, max_in_flight : int = 4, rate = None) -> BatchResult:
+        """Kicks many players concurrently.
 
-        :param BanLookupType type:
-            Defines how to search for the ban to be deleted.
+        :param players:
+            An iterable of player names.
 
-        :param str ban:
-            The ban to delete.
-
-        **endpoint:** /v2/bans/destroy
-        """
-        self._make_request(self.urls.get_url("v2", "bans", "destroy", ban=ban, type=type))
+        :param str reason:
+            The reason the players were kicked.
 
-    def do_world_meteor(self):
-        """Drops a meteor on the world.
+        :param int max_in_flight:
+            The maximum number of requests in flight at once.
 
-        **endpoint:** /world/meteor
-        """
-        self._make_request(self.urls.get_url("world", "meteor"))
+        :param rate:
+            (Optional) The maximum number of requests per second, or a
+            :py:class:`~pyshock.batch.RateLimiter` shared with other batches.
 
-    def do_world_save(self):
-        """Saves the world. (No, not like Superman.)
+        :returns:
+            A :py:class:`~pyshock.batch.BatchResult`. ApiExceptions are collected
+            per player instead of stopping the batch.
 
-        **endpoint:** /v2/world/save
+        **endpoint:** /v2/players/kick
         """
-        self._make_request(self.urls.get_url("v2", "world", "save"))
-
-    def do_world_butcher(self, killFriendly : bool):
-        """Butchers all NPCs. Will never kill town NPCs, even if killFriendly
-        is enabled.
+        return self._run_batch(lambda player: self.do_kick_player(player, reason), players, max_in_flight, rate)
 
-        :param bool killFriendly:
-            Whether to kill friendly mobs or not, such as bunnies.
-
-        **endpoint:** /v2/world/butcher
-        """
-        self._make_request(self.urls.get_url("v2", "world", "butcher", killfriendly=killFriendly))
+    def do_ban_players(self, players, reason : str, max_in_flight : int = 4, rate = None) -> BatchResult:
+        """Bans many players permanently and concurrently.
 
-    def do_kick_player(self, player : str, reason : str):
-        """Kicks a player.
+        :param players:
+            An iterable of player names.
 
         :param str reason:
-            The reason the player was kicked.
+            Reason for the bans.
 
-        **endpoint:** /v2/players/kick
-        """
-        self._make_request(self.urls.get_url("v2", "players", "kick", reason=reason, player=player))
-
-    def do_ban_player(self, player : str, reason : str):
-        """Bans a player permanently.
+        :param int max_in_flight:
+            The maximum number of requests in flight at once.
 
-        :param str player:
-            Player to be banned.
+        :param rate:
+            (Optional) The maximum number of requests per second, or a
+            :py:class:`~pyshock.batch.RateLimiter` shared with other batches.
 
-        :param reason:
-            Reason for the ban.
+        :returns:
+            A :py:class:`~pyshock.batch.BatchResult`. ApiExceptions are collected
+            per player instead of stopping the batch.
 
         **endpoint:** /v2/players/ban
         """
-        self._make_request(self.urls.get_url("v2", "players", "ban", reason=reason, player=player))
+        return self._run_batch(lambda player: self.do_ban_player(player, reason), players, max_in_flight, rate)
 
-    def do_kill_player(self, player : str, killer : str):
-        """Kills a player.
+    def do_mute_players(self, players, max_in_flight : int = 4, rate = None) -> BatchResult:
+        """Mutes many players concurrently.
 
-        :param player:
-            Player to be killed.
+        :param players:
+            An iterable of player names.
 
-        :param killer:
-            Person who 'killed' the player. This is displayed as "{killer} just killed you!"
-            to the player.
+        :param int max_in_flight:
+            The maximum number of requests in flight at once.
 
-        **endpoint:** /v2/players/kill
-        """
-        self._make_request(self.urls.get_url("v2", "players", "kill", player=player, **{"from":killer}))
+        :param rate:
+            (Optional) The maximum number of requests per second, or a
+            :py:class:`~pyshock.batch.RateLimiter` shared with other batches.
 
-    def do_mute_player(self, player : str):
-        """Mutes a player.
-
-        :param str player:
-            Player to be muted.
+        :returns:
+            A :py:class:`~pyshock.batch.BatchResult`. ApiExceptions are collected
+            per player instead of stopping the batch.
 
         **endpoint:** /v2/players/mute
         """
-        self._make_request(self.urls.get_url("v2", "players", "mute", player=player))
-
-    def do_unmute_player(self, player : str):
-        """Unmutes a player.
+        return self._run_batch(self.do_mute_player, players, max_in_flight, rate)
 
-        :param str player:
-            Player to be unmuted.
-
-        **endpoint:** /v2/players/unmute
-        """
-        self._make_request(self.urls.get_url("v2", "players", "unmute", player=player))
-
-    def do_group_delete(self, group : str):
-        """Deletes a group.
-
-        :param str group:
-            The group to be deleted.
-
-        **endpoint:** /v2/groups/destroy
-        """
-        self._make_request(self.urls.get_url("v2", "groups", "destroy", group=group))
-
-    def do_group_create(self, group : str, parent : str = "", permissions : str = "", chatColor : str = "255,255,255"):
-        """Adds a new group. Includes specification of parent, permissions, and chat color.
-
-        :param str group:
-            The name of the group to be created.
-
-        :param str parent:
-            The parent of the group to be created.
-
-        :param str permissions:
-            The permissions that the group should have as CSV.
-
-        :param str chatColor:
-            The group's chat color as three CSV RGB byte values.
-
-        **endpoint:** /v2/groups/create
-        """
-        self._make_request(self.urls.get_url("v2", "groups", "create",
-                                             group=group,
-                                             parent=parent,
-                                             permissions=permissions,
-                                             chatcolor=chatColor))
-
-    def set_update_user(self, user : str, type : UserLookupType, password : str, group : str):
-        """Updates a user in the TShock DB.
-
-        :param str user:
-            The search string, depending on the the lookup type.
-
-        :param UserLookupType type:
-            The method in which to lookup the user.
-
-        :param str password:
-            The new password for the user.
-
-        :param str group:
-            The new group for the user.
+class RequestBuilder():
+    """Builds the urls of requests to one server.
+    The base url and the encoded token are kept ready so that building
+    a url only fills in the endpoint's template. The token and its encoded
+    form are replaced together, so a url never pairs a new token with an old query.
 
-        **endpoint:** /v2/users/update
-        """
-        self._make_request(self.urls.get_url("v2", "users", "update",
-                                             user=user,
-                                             type=type.value,
-                                             password=password,
-                                             group=group))
+    :param str ip:
+        the ip address of the TShock server
 
-    def set_world_bloodmoon(self, bloodmoon : bool):
-        """Sets the world's bloodmoon.
+    :param int post:
+        the port that the REST API is opened on
+    """
+    def __init__(self, ip, post):
+        self.ip = ip
+        self.post = post
+        self.base = "http://{0}:{1}".format(ip, post)
+        self.token = ""
 
-        :param bool bloodmoon:
-            Bool indicating what to set the bloodmoon to.
+    @property
+    def token(self) -> str:
+        return self._token[0]
 
-        **endpoint:** /world/bloodmoon/{bool}
-        """
-        self._make_request(self.urls.get_url("world", "bloodmoon", bloodmoon))
+    @token.setter
+    def token(self, value : str):
+        self._token = (value, "token=" + quote_plus(value))
 
-    def set_world_autosaving(self, autosave : bool):
-        """Turns autosaving on or off.
+    def build(self, endpoint : Endpoint, values : tuple = ()) -> str:
+        """Builds the url of a request to an endpoint.
 
-        :param bool autosave:
-            Bool indicating whether to turn autosaving on or off.
+        :param Endpoint endpoint:
+            The endpoint to request.
 
-        **endpoint:** /v2/world/autosave/state/{bool}
+        :param tuple values:
+            The argument values, in the order of the endpoint's parameters.
         """
-        self._make_request(self.urls.get_url("v2", "world", "autosave", "state", autosave))
-
-    def set_group_update(self, group : str, parent : str = None, chatcolor : str = None, permissions : str = None):
-        """Updates a group in the TShock DB.
-
-        :param str group:
-            The group to be updated.
-
-        :param str parent:
-            (Optional) The new parent of the group.
+        return endpoint.url(self.base, values, self._token[1])
 
-        :param str chatcolor:
-            (Optional) The new group chatcolor as CSV RGB byte values.
+    def get_url(self, *args, **kwargs) -> str:
+        """Builds the url of a request to any path, for endpoints not in the registry.
 
-        :param str permissions:
-            (Optional) The new group permissions as a CSV string.
+        :param args:
+            The segments of the path.
 
-        **endpoint:** /v2/groups/update
+        :param kwargs:
+            The query parameters.
         """
-        if parent is None:
-            parent = ""
-        if chatcolor is None:
-            chatcolor = ""
-        if permissions is None:
-            permissions = ""
-        self._make_request(self.urls.get_url("v2", "groups", "update",
-                                             group=group,
-                                             parent=parent,
-                                             chatcolor=chatcolor,
-                                             permissions=permissions))
-
-class RequestBuilder():
-    def __init__(self, ip, post):
-        self.ip = ip
-        self.post = post
-        self.token = ""
-
-    def get_url(self, *args, **kwargs) -> str:
-        base = "http://{0}:{1}".format(self.ip, self.post)
-        path = "/" + "/".join(args)
-        kwargs['token'] = self.token
+        path = "/".join(quote(encode(arg), safe="") for arg in args)
+        params = "".join(quote_plus(key) + "=" + quote_plus(encode(value)) + "&" for key, value in kwargs.items())
+        return "{0}/{1}?{2}{3}".format(self.base, path, params, self._token[1])
 
-        params = urlencode(kwargs)
-        return "{0}?{1}".format(urljoin(base, path), params)
\ No newline at end of file
+for _endpoint in ENDPOINTS.values():
+    if not hasattr(TShock, _endpoint.name):
+        _function = _endpoint.function()
+        _function.__qualname__ = "TShock." + _endpoint.name
+        setattr(TShock, _endpoint.name, _function)
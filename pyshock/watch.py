@@ -0,0 +1,70 @@
+from collections import namedtuple
+
+PlayerJoined = namedtuple("PlayerJoined", ["nickname", "username", "group", "team"])
+PlayerJoined.__doc__ = "A player connected to the server."
+
+PlayerLeft = namedtuple("PlayerLeft", ["nickname", "username"])
+PlayerLeft.__doc__ = "A player disconnected from the server."
+
+TeamChanged = namedtuple("TeamChanged", ["nickname", "old", "new"])
+TeamChanged.__doc__ = "A player switched teams."
+
+GroupChanged = namedtuple("GroupChanged", ["nickname", "old", "new"])
+GroupChanged.__doc__ = "A player's group changed, e.g. by logging in."
+
+def index_players(players : list) -> dict:
+    """Maps the ``players`` array of :py:meth:`~pyshock.tshock.TShock.get_server_status_v2` by nickname,
+    which is unique among the players of a server.
+    """
+    return {player["nickname"]: player for player in players}
+
+def diff_players(previous : dict, current : dict) -> list:
+    """Compares two snapshots made by :py:func:`index_players` in linear time.
+
+    :returns:
+        A list of :py:class:`PlayerLeft`, :py:class:`PlayerJoined`, :py:class:`GroupChanged`
+        and :py:class:`TeamChanged` events, in that order.
+    """
+    events = [PlayerLeft(nickname, player.get("username", ""))
+              for nickname, player in previous.items() if nickname not in current]
+    for nickname, player in current.items():
+        old = previous.get(nickname)
+        if old is None:
+            events.append(PlayerJoined(nickname, player.get("username", ""), player.get("group"), player.get("team")))
+            continue
+        if old.get("group") != player.get("group"):
+            events.append(GroupChanged(nickname, old.get("group"), player.get("group")))
+        if old.get("team") != player.get("team"):
+            events.append(TeamChanged(nickname, old.get("team"), player.get("team")))
+    return events
+
+class PollInterval():
+    """An adaptive polling delay. It drops to ``minimum`` whenever something changed and
+    grows by ``factor`` after every quiet poll, up to ``maximum``.
+
+    :param float minimum:
+        Seconds between polls while players are churning.
+
+    :param float maximum:
+        Seconds between polls while the server is idle.
+
+    :param float factor:
+        How much the delay grows after a quiet poll.
+    """
+    def __init__(self, minimum : float = 1.0, maximum : float = 30.0, factor : float = 1.5):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.current = minimum
+
+    def next(self, changed : bool) -> float:
+        """Returns the delay before the next poll.
+
+        :param bool changed:
+            Whether the last poll produced any events.
+        """
+        if changed:
+            self.current = self.minimum
+        else:
+            self.current = min(self.maximum, self.current * self.factor)
+        return self.current
@@ -0,0 +1,98 @@
+"""Fakes shared by the tests: a transport that answers requests without a server, and clients using it."""
+import asyncio
+import json
+import time
+from collections import deque
+from urllib.parse import parse_qsl, urlsplit
+from pyshock.fleet import TShockFleet
+from pyshock.instrumentation import RequestHook
+from pyshock.transport import Transport
+from pyshock.tshock import TShock
+
+OK = {"status": "200", "response": "ok"}
+# Queued with FakeTransport.fail: the request is never answered.
+HANG = object()
+
+class FakeTransport(Transport):
+    """Answers the requests of either client and keeps every url it was sent, in :py:attr:`urls`.
+
+    :param dict routes:
+        (Optional) Maps url paths to replies. A reply is a dict sent as JSON, the body as bytes,
+        an exception to raise, or a function called with the url that returns one of those.
+
+    :param default:
+        The reply to paths not in ``routes``.
+
+    :param float latency:
+        (Optional) Seconds to wait before answering.
+    """
+    def __init__(self, routes : dict = None, default = OK, latency : float = 0.0):
+        self.routes = dict(routes or {})
+        self.default = default
+        self.latency = latency
+        self.urls = []
+        self._outcomes = deque()
+
+    @property
+    def paths(self) -> list:
+        """The paths of the urls sent, in order."""
+        return [urlsplit(url).path for url in self.urls]
+
+    def params(self, index : int = -1) -> dict:
+        """Returns the query parameters of a url sent, the last one by default."""
+        return dict(parse_qsl(urlsplit(self.urls[index]).query, keep_blank_values=True))
+
+    def fail(self, *outcomes):
+        """Makes the next requests raise the given exceptions, or never answer for :py:data:`HANG`."""
+        self._outcomes.extend(outcomes)
+
+    def send(self, url, timeout, send):
+        outcome = self._next(url)
+        if outcome is HANG:
+            raise RuntimeError("A sync request cannot hang.")
+        if self.latency:
+            time.sleep(self.latency)
+        return self._body(url, outcome)
+
+    async def send_async(self, url, timeout, send):
+        outcome = self._next(url)
+        if outcome is HANG:
+            await asyncio.sleep(3600)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._body(url, outcome)
+
+    def _next(self, url):
+        self.urls.append(url)
+        try:
+            return self._outcomes.popleft()
+        except IndexError:
+            return self.routes.get(urlsplit(url).path, self.default)
+
+    def _body(self, url, reply):
+        if callable(reply) and not isinstance(reply, type):
+            reply = reply(url)
+        if isinstance(reply, BaseException):
+            raise reply
+        if isinstance(reply, bytes):
+            return reply
+        return json.dumps(reply).encode("utf-8")
+
+class CollectHook(RequestHook):
+    """Keeps the info of every finished request."""
+    def __init__(self):
+        self.infos = []
+
+    def after_request(self, info):
+        self.infos.append(info)
+
+def client(cls = TShock, transport : FakeTransport = None, **kwargs):
+    """Returns a client of ``cls`` answered by ``transport``, a new FakeTransport by default."""
+    return cls("127.0.0.1", 7878, transport=transport if transport is not None else FakeTransport(), **kwargs)
+
+def fleet(**transports) -> TShockFleet:
+    """Returns a fleet with one TShock per keyword, answered by the FakeTransport passed for it."""
+    servers = TShockFleet()
+    for name, transport in transports.items():
+        servers.servers[name] = client(transport=transport)
+    return servers
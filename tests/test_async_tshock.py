@@ -0,0 +1,47 @@
+import asyncio
+import unittest
+from pyshock.async_tshock import AsyncTShock
+from pyshock.exceptions import ConnectionException
+from pyshock.resilience import CircuitBreaker, RetryPolicy
+from pyshock.tshock import TShock
+from support import CollectHook, FakeTransport, client
+
+def flaky(cls, failures=0):
+    """Returns a client whose first ``failures`` requests cannot connect, and the hook it reports to."""
+    transport = FakeTransport(default={"status": "200", "playercount": 1})
+    transport.fail(*[ConnectionException("down") for _ in range(failures)])
+    hook = CollectHook()
+    tshock = client(cls, transport, retry=RetryPolicy(retries=2, backoff=0), breaker=CircuitBreaker(failure_threshold=3))
+    tshock.add_hook(hook)
+    return tshock, hook
+
+class ClientTest(unittest.TestCase):
+    def check(self, tshock, hook, reply):
+        self.assertEqual(reply["playercount"], 1)
+        self.assertEqual(tshock.breaker.state, CircuitBreaker.CLOSED)
+        info, = hook.infos
+        self.assertEqual((info.endpoint, info.status, info.exception), ("get_status", "200", None))
+
+    def test_sync_and_async_share_bookkeeping(self):
+        tshock, hook = flaky(TShock, failures=2)
+        self.check(tshock, hook, tshock.get_status())
+        tshock, hook = flaky(AsyncTShock, failures=2)
+        self.check(tshock, hook, asyncio.run(tshock.get_status()))
+
+    def test_failures_reach_hooks_and_breaker(self):
+        tshock, hook = flaky(AsyncTShock, failures=3)
+        self.assertRaises(ConnectionException, asyncio.run, tshock.get_status())
+        self.assertEqual(tshock.breaker.state, CircuitBreaker.OPEN)
+        self.assertIsInstance(hook.infos[0].exception, ConnectionException)
+
+    def test_sync_context_manager_refused(self):
+        tshock = AsyncTShock("127.0.0.1", 7878)
+        with self.assertRaises(TypeError):
+            with tshock:
+                pass
+
+        async def run():
+            async with client(AsyncTShock, FakeTransport(default={"status": "200", "playercount": 1})) as tshock:
+                return await tshock.get_status()
+
+        self.assertEqual(asyncio.run(run())["playercount"], 1)
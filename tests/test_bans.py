@@ -0,0 +1,120 @@
+import threading
+import time
+import unittest
+from pyshock.bans import BanIndex
+from pyshock.cache import ResponseCache
+from pyshock.enums import BanLookupType
+from support import FakeTransport, client
+
+class BanIndexTest(unittest.TestCase):
+    def test_ranges_and_names(self):
+        index = BanIndex([{"name": "griefer", "ip": "1.2.3.4", "reason": "grief"},
+                          {"name": "", "ip": "10.0.0.0/8", "reason": "proxy"},
+                          {"name": "", "ip": "10.1.*", "reason": "narrower"}])
+        self.assertEqual(index.find_ip("1.2.3.4")["reason"], "grief")
+        self.assertEqual(index.find_ip("10.1.2.3")["reason"], "narrower")
+        self.assertEqual(index.find_ip("10.9.2.3")["reason"], "proxy")
+        self.assertIsNone(index.find_ip("11.0.0.1"))
+        self.assertEqual(index.find_name("griefer")["ip"], "1.2.3.4")
+
+    def test_add_and_remove(self):
+        index = BanIndex([])
+        index.add_ban("10.0.0.0/8", "", "proxy")
+        index.add_ban("1.2.3.4", "griefer", "grief")
+        self.assertEqual(set(index.check_many(["10.1.1.1", "1.2.3.4", "8.8.8.8"])), {"10.1.1.1", "1.2.3.4"})
+        index.remove_ban(BanLookupType.Name, "griefer")
+        index.remove_ban(BanLookupType.IP, "10.0.0.0/8")
+        self.assertEqual(index.check_many(["10.1.1.1", "1.2.3.4"]), {})
+        self.assertIsNone(index.find_name("griefer"))
+
+    def test_changes_keep_tables(self):
+        index = BanIndex([{"name": "p{0}".format(i), "ip": "172.16.0.{0}".format(i), "reason": ""} for i in range(200)])
+        ips, names = index._bans.ips, index._bans.names
+        index.add_ban("1.2.3.4", "griefer", "grief")
+        index.add_ban("10.0.0.0/8", "", "proxy")
+        index.remove_ban(BanLookupType.Name, "p7")
+        self.assertIs(index._bans.ips, ips)
+        self.assertIs(index._bans.names, names)
+        stale = index._bans
+        index.remove_ban(BanLookupType.IP, "10.0.0.0/8")
+        self.assertEqual(index._bans.prefixes, [])
+        self.assertIsNone(index.find_ip("10.1.1.1"))
+        self.assertIsNone(index.find_ip("172.16.0.7"))
+        self.assertEqual(stale.prefixes, [(4, 8)])
+
+    def test_sync_keeps_changes_made_during_fetch(self):
+        def bans(url):
+            # The listener of another request applies these while the list is being fetched.
+            index.add_ban("1.2.3.4", "griefer", "grief")
+            index.remove_ban(BanLookupType.Name, "spammer")
+            return {"status": "200", "bans": [{"name": "spammer", "ip": "5.6.7.8", "reason": "spam"},
+                                              {"name": "old", "ip": "9.9.9.9", "reason": ""}]}
+
+        index = BanIndex()
+        index.tshock = client(transport=FakeTransport({"/v2/bans/list": bans}))
+        index.sync()
+        self.assertEqual(index.find_ip("1.2.3.4")["name"], "griefer")
+        self.assertIsNone(index.find_name("spammer"))
+        self.assertIsNone(index.find_ip("5.6.7.8"))
+        self.assertEqual(index.find_name("old")["ip"], "9.9.9.9")
+        self.assertEqual(index._logs, [])
+
+    def test_player_ban_indexes_ip(self):
+        transport = FakeTransport({"/v2/players/read": {"status": "200", "nickname": "griefer", "ip": "1.2.3.4"},
+                                   "/v2/bans/list": {"status": "200", "bans": []}})
+        tshock = client(transport=transport, cache=ResponseCache({"/v2/players/read": 60}))
+        index = BanIndex.build(tshock)
+        tshock.get_player_info("griefer")
+        tshock.do_ban_player("griefer", "grief")
+        self.assertEqual(index.find_ip("1.2.3.4")["name"], "griefer")
+        self.assertFalse(index.stale)
+        self.assertEqual(transport.paths.count("/v2/bans/list"), 1)
+
+    def test_player_ban_without_ip_resyncs(self):
+        listed = [{"name": "griefer", "ip": "1.2.3.4", "reason": "grief"}]
+        transport = FakeTransport({"/v2/bans/list": lambda url: {"status": "200", "bans": listed}})
+        tshock = client(transport=transport)
+        index = BanIndex.build(tshock)
+        tshock.do_ban_player("griefer", "grief")
+        self.assertEqual(index.find_name("griefer")["reason"], "grief")
+        deadline = time.monotonic() + 5
+        while index.stale and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(index.stale)
+        self.assertEqual(index.find_ip("1.2.3.4")["name"], "griefer")
+
+    def test_checks_during_resync(self):
+        bans = [{"name": "p{0}".format(i), "ip": "10.{0}.{1}.0/24".format(i // 256, i % 256), "reason": ""}
+                for i in range(20000)]
+        bans += [{"name": "", "ip": "172.16.{0}.{1}".format(i // 256, i % 256), "reason": ""} for i in range(20000)]
+        index = BanIndex(bans)
+        ips = ["10.{0}.{1}.7".format(i // 256, i % 256) for i in range(0, 20000, 97)] + \
+              ["172.16.{0}.{1}".format(i // 256, i % 256) for i in range(0, 20000, 89)]
+        done = threading.Event()
+        errors = []
+
+        def check():
+            while not done.is_set():
+                try:
+                    banned = index.check_many(ips)
+                except Exception as e:
+                    errors.append(e)
+                    return
+                if len(banned) != len(ips):
+                    errors.append(AssertionError("{0} of {1} banned".format(len(banned), len(ips))))
+                    return
+
+        checker = threading.Thread(target=check)
+        checker.start()
+        try:
+            for _ in range(3):
+                index.load(bans)
+                index.add_ban("192.168.0.0/16")
+                index.remove_ban(BanLookupType.IP, "192.168.0.0/16")
+        finally:
+            done.set()
+            checker.join()
+        self.assertEqual(errors, [])
+
+if __name__ == "__main__":
+    unittest.main()
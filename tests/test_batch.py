@@ -0,0 +1,65 @@
+import asyncio
+import threading
+import time
+import unittest
+from pyshock.async_tshock import AsyncTShock
+from pyshock.batch import RateLimiter, run_batch
+from pyshock.exceptions import ResponseException
+from support import FakeTransport, client
+
+def kicks():
+    """Returns a transport kicking every player but ``ghost``, who is not online."""
+    def kick(url):
+        if "player=ghost" in url:
+            return {"status": "404", "error": "Player ghost was not found"}
+        return {"status": "200", "response": "Player kicked"}
+    return FakeTransport({"/v2/players/kick": kick})
+
+class BatchTest(unittest.TestCase):
+    def test_failures_collected_in_order(self):
+        transport = kicks()
+        batch = client(transport=transport).do_kick_players(["a", "ghost", "b"], "spam")
+        self.assertEqual([item.item for item in batch], ["a", "ghost", "b"])
+        self.assertEqual([item.item for item in batch.failed], ["ghost"])
+        self.assertIsInstance(batch.failed[0].exception, ResponseException)
+        self.assertFalse(batch.ok)
+        self.assertEqual(sorted(params["player"] for params in map(transport.params, range(3))), ["a", "b", "ghost"])
+        self.assertEqual(transport.params()["reason"], "spam")
+
+    def test_max_in_flight(self):
+        lock = threading.Lock()
+        running, peak = [0], [0]
+
+        def call(item):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return item
+
+        batch = run_batch(call, range(12), max_in_flight=3)
+        self.assertEqual([item.reply for item in batch], list(range(12)))
+        self.assertEqual(peak[0], 3)
+
+    def test_rate_limit(self):
+        started = time.monotonic()
+        run_batch(lambda item: item, range(6), max_in_flight=6, rate=50)
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+
+    def test_shared_limiter(self):
+        limiter = RateLimiter(20, burst=2)
+        self.assertEqual([limiter.reserve() > 0 for _ in range(3)], [False, False, True])
+        self.assertAlmostEqual(limiter.reserve(), 0.1, delta=0.01)
+
+    def test_async_batch(self):
+        transport = kicks()
+        tshock = client(AsyncTShock, transport)
+        started = time.monotonic()
+        batch = asyncio.run(tshock.do_kick_players(["a", "ghost", "b", "c"], "spam", rate=40))
+        self.assertGreaterEqual(time.monotonic() - started, 0.07)
+        self.assertEqual([item.item for item in batch.succeeded], ["a", "b", "c"])
+
+if __name__ == "__main__":
+    unittest.main()
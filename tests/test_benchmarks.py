@@ -0,0 +1,79 @@
+import argparse
+import contextlib
+import io
+import time
+import unittest
+from benchmarks import loadgen
+from benchmarks.bench_client import percentile, run_sync, summarize
+from benchmarks.mock_server import TOKEN, MockTShockServer
+from pyshock.tshock import TShock
+
+class MockServerTest(unittest.TestCase):
+    def test_canned_replies(self):
+        with MockTShockServer(players=5, bans=1000, groups=3) as server:
+            with TShock("127.0.0.1", server.port) as tshock:
+                tshock.get_token("anyone", "anything")
+                self.assertEqual(tshock.token, TOKEN)
+                self.assertEqual(len(tshock.get_ban_list()["bans"]), 1000)
+                self.assertEqual(len(tshock.get_server_status_v2(players=True)["players"]), 5)
+                self.assertNotIn("players", tshock.get_server_status_v2())
+                self.assertEqual(tshock.get_group_list()["groups"][2]["parent"], "group1")
+                self.assertEqual(tshock.do_server_rawcmd_v3("/time")["response"], ["Executed /time"])
+            # Closing the client destroys its token.
+            self.assertEqual(server.requests, 7)
+
+class BenchClientTest(unittest.TestCase):
+    def test_percentile_and_summary(self):
+        samples = [0.001 * i for i in range(1, 101)]
+        self.assertEqual(percentile(samples, 0.5), samples[50])
+        self.assertEqual(percentile(samples, 1.0), samples[-1])
+        self.assertEqual(percentile([], 0.5), 0.0)
+        summary = summarize("sync", "get_status", list(reversed(samples)), 2.0)
+        self.assertEqual((summary["requests"], summary["throughput"], summary["max_ms"]), (100, 50.0, 100.0))
+
+    def test_threaded_run(self):
+        with MockTShockServer() as server:
+            latencies, elapsed = run_sync(server.port, "get_status", 20, 4)
+            # Besides the timed calls: the token, one warm-up call and destroying the token.
+            self.assertEqual(server.requests, 23)
+        self.assertEqual(len(latencies), 20)
+        self.assertGreater(elapsed, 0)
+
+class LoadgenTest(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(loadgen.parse_stage("50:2"), {"clients": None, "rate": 50.0, "seconds": 2.0, "spec": "50:2"})
+        self.assertEqual(loadgen.parse_stage("c4:1.5")["clients"], 4)
+        for spec in ("50", "cx:1", "fast:1"):
+            self.assertRaises(argparse.ArgumentTypeError, loadgen.parse_stage, spec)
+        self.assertEqual(loadgen.parse_mix(["get_status=3", "get_ban_list"]), {"get_status": 3.0, "get_ban_list": 1.0})
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertRaises(SystemExit, loadgen.parse_mix, ["get_everything=1"])
+
+    def test_latency_counted_from_due_time(self):
+        with MockTShockServer() as server:
+            with TShock("127.0.0.1", server.port) as tshock:
+                latency, failed, finished = loadgen.call(tshock, "get_status", time.perf_counter() - 1.0)
+        self.assertGreaterEqual(latency, 1.0)
+        self.assertFalse(failed)
+
+    def test_stages(self):
+        stages = [loadgen.parse_stage("100:0.2"), loadgen.parse_stage("c2:0.2")]
+        mix = {"get_status": 1, "get_world_info": 1}
+        with MockTShockServer(latency=0.001) as server:
+            with TShock("127.0.0.1", server.port) as tshock:
+                with contextlib.redirect_stderr(io.StringIO()) as log:
+                    results = loadgen.run_stages(tshock, stages, mix, workers=8, seed=1)
+                requests = server.requests
+        totals = [result for result in results if result["endpoint"] == "all"]
+        self.assertEqual([(total["stage"], total["load"]) for total in totals], [(0, "100:0.2"), (1, "c2:0.2")])
+        self.assertEqual(totals[0]["requests"], 20)
+        self.assertEqual(sum(total["requests"] for total in totals), requests)
+        self.assertEqual(sum(total["errors"] for total in totals), 0)
+        for total in totals:
+            self.assertEqual(sum(result["requests"] for result in results
+                                 if result["stage"] == total["stage"] and result["endpoint"] != "all"), total["requests"])
+            self.assertLessEqual(total["p50_ms"], total["p99_ms"])
+        self.assertEqual(len(log.getvalue().splitlines()), 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import threading
+import time
+import unittest
+from pyshock.broadcast import BroadcastQueue
+from pyshock.exceptions import ConnectionException
+from support import FakeTransport, client, fleet
+
+def broadcasts(transport : FakeTransport) -> list:
+    """Returns the messages broadcast through a transport, in order."""
+    return [transport.params(index)["msg"] for index, path in enumerate(transport.paths)
+            if path == "/v2/server/broadcast"]
+
+class BroadcastQueueTest(unittest.TestCase):
+    def test_burst_merged_and_deduplicated(self):
+        transport = FakeTransport()
+        with BroadcastQueue(client(transport=transport), window=0.1, rate=100) as queue:
+            for message in ("Restart in 3", "Restart in 2", "Restart in 3", "Restart in 1"):
+                queue.send(message)
+            self.assertEqual(queue.stats()["queued"], 3)
+            queue.flush()
+            self.assertEqual(queue.stats(), {"messages": 4, "duplicates": 1, "broadcasts": 1, "failures": 0,
+                                             "queued": 0})
+        self.assertEqual(broadcasts(transport), ["Restart in 3\nRestart in 2\nRestart in 1"])
+
+    def test_window_waits_for_more_messages(self):
+        transport = FakeTransport()
+        with BroadcastQueue(client(transport=transport), window=0.2, rate=100) as queue:
+            queue.send("a")
+            time.sleep(0.05)
+            self.assertEqual(transport.urls, [])
+            queue.send("b")
+            time.sleep(0.3)
+            self.assertEqual(broadcasts(transport), ["a\nb"])
+
+    def test_max_lines(self):
+        transport = FakeTransport()
+        with BroadcastQueue(client(transport=transport), window=0.05, rate=100, max_lines=2, separator=" | ") as queue:
+            for message in "abcde":
+                queue.send(message)
+        self.assertEqual(broadcasts(transport), ["a | b", "c | d", "e"])
+
+    def test_rate_limit_merges_waiting_messages(self):
+        transport = FakeTransport()
+        with BroadcastQueue(client(transport=transport), window=0, rate=5) as queue:
+            queue.send("first")
+            queue.flush()
+            started = time.monotonic()
+            queue.send("second")
+            time.sleep(0.05)
+            # Sent while the server waits for the rate limit, so they join its next broadcast.
+            queue.send("third")
+            queue.send("fourth")
+            queue.flush()
+            self.assertGreaterEqual(time.monotonic() - started, 0.15)
+        self.assertEqual(broadcasts(transport), ["first", "second", "third\nfourth"])
+
+    def test_servers_are_independent(self):
+        slow, fast = FakeTransport(latency=0.3), FakeTransport()
+        down = FakeTransport(default=ConnectionException("The server refused the connection."))
+        servers = fleet(slow=slow, fast=fast, down=down)
+        with BroadcastQueue(servers, window=0.01, rate=100) as queue:
+            queue.send("everyone")
+            queue.send("only fast", servers=["fast"])
+            self.assertRaises(KeyError, queue.send, "nobody", servers=["missing"])
+            # A slow server does not hold up the others.
+            time.sleep(0.15)
+            self.assertEqual(broadcasts(fast), ["everyone\nonly fast"])
+            self.assertEqual((queue.stats()["broadcasts"], queue.stats()["failures"]), (1, 1))
+        self.assertEqual(broadcasts(slow), ["everyone"])
+        self.assertIsInstance(queue.last_error, ConnectionException)
+        self.assertEqual(queue.stats()["broadcasts"], 2)
+
+    def test_closed_queue_refuses_messages(self):
+        queue = BroadcastQueue(client(), window=10)
+        queue.send("sent on close")
+        closing = threading.Thread(target=queue.close)
+        closing.start()
+        closing.join(5)
+        self.assertFalse(closing.is_alive())
+        self.assertEqual(queue.stats()["broadcasts"], 1)
+        self.assertRaises(RuntimeError, queue.send, "late")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import time
+import unittest
+from pyshock.cache import ResponseCache
+from pyshock.exceptions import TimeoutException
+from support import FakeTransport, client
+
+def bans(*names):
+    return {"status": "200", "bans": [{"name": name, "ip": "", "reason": ""} for name in names]}
+
+class ResponseCacheTest(unittest.TestCase):
+    def test_hits_and_expiry(self):
+        transport = FakeTransport({"/v2/bans/list": bans("old")})
+        tshock = client(transport=transport, cache=ResponseCache({"/v2/bans/list": 0.05}))
+        self.assertIs(tshock.get_ban_list(), tshock.get_ban_list())
+        tshock.get_status()
+        tshock.get_status()
+        self.assertEqual(transport.paths, ["/v2/bans/list", "/status", "/status"])
+        time.sleep(0.06)
+        tshock.get_ban_list()
+        self.assertEqual(transport.paths.count("/v2/bans/list"), 2)
+        self.assertEqual(tshock.cache.stats(), {"hits": 1, "misses": 2, "evictions": 0, "size": 1})
+
+    def test_write_evicts_changed_endpoints(self):
+        transport = FakeTransport({"/v2/bans/list": bans("old"),
+                                   "/v2/groups/list": {"status": "200", "groups": []}})
+        tshock = client(transport=transport, cache=ResponseCache())
+        tshock.get_ban_list()
+        tshock.get_group_list()
+        tshock.do_create_ban("1.2.3.4", "griefer", "grief")
+        self.assertEqual(len(tshock.cache), 1)
+        tshock.get_ban_list()
+        tshock.get_group_list()
+        self.assertEqual(transport.paths.count("/v2/bans/list"), 2)
+        self.assertEqual(transport.paths.count("/v2/groups/list"), 1)
+
+    def test_least_recently_used_dropped(self):
+        cache = ResponseCache({"/v2/bans/read": 60}, max_entries=2)
+        for name in ("a", "b"):
+            cache.store("/v2/bans/read", name, {"status": "200"})
+        cache.get("/v2/bans/read", "a")
+        cache.store("/v2/bans/read", "c", {"status": "200"})
+        self.assertIsNone(cache.get("/v2/bans/read", "b"))
+        self.assertIsNotNone(cache.get("/v2/bans/read", "a"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_reply_fetched_during_eviction_is_dropped(self):
+        cache = ResponseCache()
+
+        def listed(url):
+            # A ban created while the list is on its way makes the reply out of date.
+            cache.invalidate("/v2/bans/list")
+            return bans("old")
+
+        transport = FakeTransport({"/v2/bans/list": listed})
+        tshock = client(transport=transport, cache=cache)
+        tshock.get_ban_list()
+        self.assertEqual(len(cache), 0)
+        transport.routes["/v2/bans/list"] = bans("new")
+        tshock.get_ban_list()
+        self.assertEqual(tshock.get_ban_list()["bans"][0]["name"], "new")
+        self.assertEqual(transport.paths.count("/v2/bans/list"), 2)
+
+    def test_failed_write_evicts(self):
+        transport = FakeTransport({"/v2/bans/list": bans("old")})
+        tshock = client(transport=transport, cache=ResponseCache())
+        tshock.get_ban_list()
+        transport.fail(TimeoutException("The server did not answer in time."))
+        self.assertRaises(TimeoutException, tshock.do_create_ban, "1.2.3.4", "griefer", "grief")
+        transport.routes["/v2/bans/list"] = bans("old", "griefer")
+        self.assertEqual(len(tshock.get_ban_list()["bans"]), 2)
+
+    def test_failed_read_keeps_entries(self):
+        transport = FakeTransport({"/v2/bans/list": bans("old")})
+        tshock = client(transport=transport, cache=ResponseCache())
+        tshock.get_ban_list()
+        transport.fail(TimeoutException("The server did not answer in time."))
+        self.assertRaises(TimeoutException, tshock.get_group_list)
+        self.assertEqual(len(tshock.cache), 1)
+
+if __name__ == "__main__":
+    unittest.main()
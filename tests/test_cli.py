@@ -0,0 +1,43 @@
+import contextlib
+import inspect
+import io
+import json
+import unittest
+from unittest import mock
+from pyshock import cli
+from pyshock.endpoints import ENDPOINTS
+from pyshock.tshock import TShock
+from support import FakeTransport, fleet
+
+class CliTest(unittest.TestCase):
+    def test_subcommands_match_functions(self):
+        for endpoint in ENDPOINTS.values():
+            parameters = inspect.signature(getattr(TShock, endpoint.name)).parameters
+            names = [param.name for param in cli._params(endpoint)]
+            required = [name for name, parameter in parameters.items()
+                        if name != "self" and parameter.default is inspect.Parameter.empty]
+            self.assertLessEqual(set(names), set(parameters), endpoint.name)
+            self.assertLessEqual(set(required), set(names), endpoint.name)
+
+    def test_destroy_token_takes_no_argument(self):
+        parser = cli.build_parser()
+        self.assertEqual(parser.parse_args(["do_destroy_token"]).function, "do_destroy_token")
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertRaises(SystemExit, parser.parse_args, ["do_destroy_token", "abc"])
+
+    def test_unexpected_exception_is_reported_per_server(self):
+        servers = fleet(good=FakeTransport(default={"status": "200", "playercount": 2}),
+                        bad=FakeTransport(default=RuntimeError("bug")))
+        output = io.StringIO()
+        with mock.patch.object(cli, "_connect", return_value=servers), contextlib.redirect_stdout(output):
+            status = cli.main(["get_status"])
+        self.assertEqual(status, 1)
+        records = {record["server"]: record for record in map(json.loads, output.getvalue().splitlines())}
+        self.assertEqual(records["good"]["reply"]["playercount"], 2)
+        self.assertEqual(records["bad"], {"server": "bad", "error": "bug", "type": "RuntimeError"})
+
+    def test_fleet_helpers_skip_failed_servers(self):
+        servers = fleet(good=FakeTransport(default={"status": "200", "playercount": 2}),
+                        bad=FakeTransport(default=ValueError("bug")))
+        self.assertEqual(servers.get_total_player_count(), 2)
+        self.assertIsInstance(servers.call("get_status")["bad"], ValueError)
@@ -0,0 +1,89 @@
+import unittest
+from urllib.parse import parse_qs, urlencode, urljoin, urlsplit
+from pyshock.endpoints import ENDPOINTS
+from pyshock.enums import BanLookupType, UserLookupType
+from support import FakeTransport, client
+
+def baseline_url(token, *args, **kwargs):
+    """Builds a url the way the hand-written RequestBuilder.get_url did before the endpoint table."""
+    kwargs["token"] = token
+    return "{0}?{1}".format(urljoin("http://127.0.0.1:7878", "/" + "/".join(args)), urlencode(kwargs))
+
+# function, arguments, then the path segments and query parameters the original function sent.
+# Booleans and lookup types are given as sent on the wire.
+CASES = [
+    ("get_token", ("Ijwu", "secret"), ("v2", "token", "create", "secret"), {"username": "Ijwu"}),
+    ("get_status", (), ("status",), {}),
+    ("get_token_status", (), ("tokentest",), {}),
+    ("get_server_status_v2", (True, False, {"team": "1"}), ("v2", "server", "status"),
+     {"players": "true", "rules": "false", "team": "1"}),
+    ("get_active_user_list", (), ("v2", "users", "activelist"), {}),
+    ("get_user_list", (), ("v2", "users", "list"), {}),
+    ("get_user_info", (UserLookupType.Name, "Ijwu"), ("v2", "users", "read"), {"type": "name", "user": "Ijwu"}),
+    ("get_ban_information", (BanLookupType.IP, "1.2.3.4"), ("v2", "bans", "read"), {"type": "ip", "ban": "1.2.3.4"}),
+    ("get_ban_list", (), ("v2", "bans", "list"), {}),
+    ("get_player_list", (), ("v2", "players", "list"), {}),
+    ("get_player_info", ("Ijwu",), ("v2", "players", "read"), {"player": "Ijwu"}),
+    ("get_world_info", (), ("world", "read"), {}),
+    ("get_group_list", (), ("v2", "groups", "list"), {}),
+    ("get_group_info", ("mod",), ("v2", "groups", "read"), {"group": "mod"}),
+    ("get_server_motd", (), ("v3", "server", "motd"), {}),
+    ("get_server_rules", (), ("v3", "server", "rules"), {}),
+    ("do_destroy_token", (), ("token", "destroy", "TOKEN"), {}),
+    ("do_destroy_all_tokens", (), ("v3", "token", "destroy", "all"), {}),
+    ("do_server_broadcast", ("Hello & bye",), ("v2", "server", "broadcast"), {"msg": "Hello & bye"}),
+    ("do_server_reload", (), ("v3", "server", "reload"), {}),
+    ("do_server_off", (), ("v2", "server", "off"), {}),
+    ("do_server_restart", (), ("v3", "server", "restart"), {}),
+    ("do_server_rawcmd_v2", ("/time noon",), ("v2", "server", "rawcmd"), {"cmd": "/time noon"}),
+    ("do_server_rawcmd_v3", ("/time noon",), ("v3", "server", "rawcmd"), {"cmd": "/time noon"}),
+    ("do_create_ban", ("1.2.3.4", "griefer", "grief"), ("bans", "create"),
+     {"ip": "1.2.3.4", "name": "griefer", "reason": "grief"}),
+    ("do_delete_ban", (BanLookupType.Name, "griefer"), ("v2", "bans", "destroy"), {"type": "name", "ban": "griefer"}),
+    ("do_world_meteor", (), ("world", "meteor"), {}),
+    ("do_world_save", (), ("v2", "world", "save"), {}),
+    ("do_world_butcher", (True,), ("v2", "world", "butcher"), {"killfriendly": "true"}),
+    ("do_kick_player", ("Ijwu", "spam"), ("v2", "players", "kick"), {"player": "Ijwu", "reason": "spam"}),
+    ("do_ban_player", ("Ijwu", "spam"), ("v2", "players", "ban"), {"player": "Ijwu", "reason": "spam"}),
+    ("do_kill_player", ("Ijwu", "Server"), ("v2", "players", "kill"), {"player": "Ijwu", "from": "Server"}),
+    ("do_mute_player", ("Ijwu",), ("v2", "players", "mute"), {"player": "Ijwu"}),
+    ("do_unmute_player", ("Ijwu",), ("v2", "players", "unmute"), {"player": "Ijwu"}),
+    ("do_group_delete", ("mod",), ("v2", "groups", "destroy"), {"group": "mod"}),
+    ("do_group_create", ("mod",), ("v2", "groups", "create"),
+     {"group": "mod", "parent": "", "permissions": "", "chatcolor": "255,255,255"}),
+    ("set_update_user", ("Ijwu", UserLookupType.Name, "secret", "mod"), ("v2", "users", "update"),
+     {"user": "Ijwu", "type": "name", "password": "secret", "group": "mod"}),
+    ("set_world_bloodmoon", (True,), ("world", "bloodmoon", "true"), {}),
+    ("set_world_autosaving", (False,), ("v2", "world", "autosave", "state", "false"), {}),
+    ("set_group_update", ("mod", "default", "255,0,0", "tshock.admin.kick"), ("v2", "groups", "update"),
+     {"group": "mod", "parent": "default", "chatcolor": "255,0,0", "permissions": "tshock.admin.kick"}),
+]
+
+def parts(url):
+    split = urlsplit(url)
+    return split.path, parse_qs(split.query, keep_blank_values=True)
+
+class EndpointTest(unittest.TestCase):
+    def test_urls_match_original_functions(self):
+        self.assertEqual({case[0] for case in CASES}, set(ENDPOINTS))
+        for name, args, path, params in CASES:
+            # get_token is called before there is a token.
+            token = "" if name == "get_token" else "TOKEN"
+            transport = FakeTransport(default={"status": "200", "token": "TOKEN"})
+            tshock = client(transport=transport)
+            tshock.token = token
+            getattr(tshock, name)(*args)
+            self.assertEqual(parts(transport.urls[0]), parts(baseline_url(token, *path, **params)), name)
+
+    def test_unset_update_arguments_left_out(self):
+        transport = FakeTransport()
+        client(transport=transport).set_group_update("mod", permissions="tshock.admin.kick")
+        self.assertEqual(transport.params(), {"group": "mod", "permissions": "tshock.admin.kick", "token": ""})
+
+    def test_path_arguments_quoted(self):
+        transport = FakeTransport(default={"status": "200", "token": "TOKEN"})
+        client(transport=transport).get_token("Ijwu", "a/b c")
+        self.assertEqual(urlsplit(transport.urls[0]).path, "/v2/token/create/a%2Fb%20c")
+
+if __name__ == "__main__":
+    unittest.main()
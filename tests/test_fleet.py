@@ -0,0 +1,38 @@
+import time
+import unittest
+from pyshock.exceptions import ConnectionException
+from pyshock.fleet import TShockFleet
+from pyshock.resilience import CircuitBreaker
+from support import FakeTransport, fleet
+
+def status(*players):
+    return {"status": "200", "playercount": len(players), "players": [{"nickname": name} for name in players]}
+
+class TShockFleetTest(unittest.TestCase):
+    def test_fan_out_with_partial_failure(self):
+        servers = fleet(eu=FakeTransport(default=status("a", "b"), latency=0.2),
+                        us=FakeTransport(default=status("c"), latency=0.2),
+                        asia=FakeTransport(default=status(), latency=0.2),
+                        down=FakeTransport(default=ConnectionException("Could not connect to the server.")))
+        started = time.perf_counter()
+        replies = list(servers.map("get_server_status_v2", players=True))
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual(replies[0][0], "down")
+        self.assertIsInstance(replies[0][1], ConnectionException)
+        self.assertEqual({name: reply["playercount"] for name, reply in replies[1:]}, {"eu": 2, "us": 1, "asia": 0})
+        self.assertEqual(servers.get_player_map(), {"a": "eu", "b": "eu", "c": "us"})
+        self.assertEqual(servers.get_total_player_count(), 3)
+
+    def test_servers_get_breakers_of_their_own(self):
+        with TShockFleet({"eu": ("127.0.0.1", 7878), "us": ("127.0.0.1", 7879, "token")},
+                         breaker=CircuitBreaker(failure_threshold=1)) as servers:
+            eu, us = servers.servers["eu"], servers.servers["us"]
+            self.assertIsNot(eu.breaker, us.breaker)
+            eu.breaker.record_failure()
+            self.assertEqual(us.breaker.state, CircuitBreaker.CLOSED)
+            self.assertEqual(us.token, "token")
+            servers.remove_server("eu")
+            self.assertEqual(list(servers.servers), ["us"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+from pyshock.groups import GroupIndex
+from support import FakeTransport, client
+
+def build():
+    return GroupIndex({"default": {"parent": "", "permissions": ["tshock.world.modify"], "negatedpermissions": []},
+                       "mod": {"parent": "default", "permissions": ["tshock.admin.kick"],
+                               "negatedpermissions": []}})
+
+class GroupIndexTest(unittest.TestCase):
+    def test_inheritance(self):
+        groups = build()
+        self.assertTrue(groups.has_permission("default", "tshock.world.modify"))
+        self.assertTrue(groups.has_permission("mod", "tshock.admin.kick"))
+        self.assertTrue(groups.has_permission(GroupIndex.SUPERADMIN, "anything"))
+
+    def test_partial_update_keeps_other_fields(self):
+        groups = build()
+        groups.update_group("default", permissions="tshock.world.*")
+        self.assertTrue(groups.has_permission("mod", "tshock.world.settle"))
+        self.assertEqual(groups.get_parents("mod"), ["default"])
+        groups.update_group("mod", parent="")
+        self.assertEqual(groups.get_parents("mod"), [])
+        self.assertTrue(groups.has_permission("mod", "tshock.admin.kick"))
+
+    def test_recreated_parent_is_inherited_again(self):
+        groups = build()
+        groups.remove_group("default")
+        self.assertFalse(groups.has_permission("mod", "tshock.world.modify"))
+        groups.set_group("default", permissions="tshock.world.settle")
+        self.assertEqual(groups.get_parents("mod"), ["default"])
+        self.assertTrue(groups.has_permission("mod", "tshock.world.settle"))
+        self.assertTrue(groups.has_permission("mod", "tshock.admin.kick"))
+
+    def test_followed_update_keeps_other_fields(self):
+        groups = build()
+        transport = FakeTransport()
+        tshock = client(transport=transport)
+        tshock.add_listener(groups.on_reply)
+        tshock.set_group_update("mod", chatcolor="255,0,0")
+        self.assertNotIn("parent", transport.params())
+        self.assertNotIn("permissions", transport.params())
+        self.assertEqual(groups.get_parents("mod"), ["default"])
+        self.assertTrue(groups.has_permission("mod", "tshock.admin.kick"))
+        tshock.set_group_update("mod", permissions="tshock.admin.ban")
+        self.assertFalse(groups.has_permission("mod", "tshock.admin.kick"))
+        self.assertTrue(groups.has_permission("mod", "tshock.world.modify"))
@@ -0,0 +1,53 @@
+import unittest
+from pyshock.exceptions import TimeoutException
+from pyshock.instrumentation import RequestHook, RequestMetrics
+from support import FakeTransport, client
+
+class Order(RequestHook):
+    def __init__(self):
+        self.calls = []
+
+    def before_request(self, info):
+        self.calls.append(("before", info.endpoint, info.duration))
+
+    def after_request(self, info):
+        self.calls.append(("after", info.endpoint, info.status))
+
+class RequestMetricsTest(unittest.TestCase):
+    def test_counts_per_endpoint(self):
+        transport = FakeTransport({"/v2/bans/list": {"status": "200", "bans": []}},
+                                  default={"status": "200", "playercount": 0})
+        metrics = RequestMetrics(buckets=(0.5, 1.0), labels={"server": "eu"})
+        order = Order()
+        tshock = client(transport=transport)
+        tshock.add_hook(metrics)
+        tshock.add_hook(order)
+        tshock.get_status()
+        tshock.get_status()
+        tshock.get_ban_list()
+        transport.fail(TimeoutException("The server did not answer in time."))
+        self.assertRaises(TimeoutException, tshock.get_status)
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["get_status"]["requests"], 3)
+        self.assertEqual(snapshot["get_status"]["errors"], 1)
+        self.assertEqual(snapshot["get_status"]["statuses"], {"200": 2, "error": 1})
+        self.assertEqual(snapshot["get_status"]["histogram"], [3, 0, 0])
+        self.assertEqual(snapshot["get_ban_list"]["bytes"], len(b'{"status": "200", "bans": []}'))
+        self.assertEqual(order.calls[:2], [("before", "get_status", None), ("after", "get_status", "200")])
+        text = metrics.to_prometheus()
+        self.assertIn('pyshock_requests_total{server="eu",endpoint="get_status",status="200"} 2', text)
+        self.assertIn('pyshock_request_duration_seconds_bucket{server="eu",endpoint="get_status",le="+Inf"} 3', text)
+        metrics.reset()
+        self.assertEqual(metrics.snapshot(), {})
+
+    def test_no_hooks_no_timing(self):
+        transport = FakeTransport()
+        tshock = client(transport=transport)
+        metrics = RequestMetrics()
+        tshock.add_hook(metrics)
+        tshock.remove_hook(metrics)
+        tshock.get_status()
+        self.assertEqual(metrics.snapshot(), {})
+
+if __name__ == "__main__":
+    unittest.main()
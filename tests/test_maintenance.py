@@ -0,0 +1,62 @@
+import threading
+import time
+import unittest
+from pyshock.maintenance import MaintenanceScheduler
+from support import FakeTransport, client
+
+class Server():
+    """A TShock whose status reports ``players`` and whose world saves run ``action``."""
+    def __init__(self, players=0, action=None, latency=0.0):
+        self.players = players
+        self.action = action
+        self.saved_with = []
+        transport = FakeTransport({"/status": self.status, "/v2/world/save": self.save}, latency=latency)
+        self.tshock = client(transport=transport)
+
+    def status(self, url):
+        return {"status": "200", "playercount": self.players}
+
+    def save(self, url):
+        self.saved_with.append(self.players)
+        if self.action is not None:
+            self.action()
+        return {"status": "200", "response": "World saved."}
+
+class MaintenanceSchedulerTest(unittest.TestCase):
+    def test_held_only_when_busy(self):
+        server = Server(latency=0.05)
+        result, = MaintenanceScheduler({"a": server.tshock}, jitter=0, max_players=4).run("do_world_save")
+        self.assertEqual(result.held, 0.0)
+        self.assertFalse(result.skipped)
+
+    def test_players_checked_once_the_slot_is_free(self):
+        late = Server()
+
+        def save():
+            # The second server fills up while it waits for the only slot.
+            time.sleep(0.1)
+            late.players = 10
+            threading.Timer(0.15, setattr, (late, "players", 0)).start()
+
+        servers = {"first": Server(action=save).tshock, "late": late.tshock}
+        maintenance = MaintenanceScheduler(servers, stagger=0.02, jitter=0, max_players=4, hold_interval=0.05)
+        first, second = maintenance.run("do_world_save")
+        self.assertEqual(late.saved_with, [0])
+        self.assertGreater(second.held, 0.0)
+        self.assertFalse(second.skipped)
+
+    def test_unexpected_exception_does_not_stop_the_daemon(self):
+        def fail():
+            raise RuntimeError("bug")
+
+        maintenance = MaintenanceScheduler({"a": Server(action=fail).tshock}, stagger=0, jitter=0)
+        result, = maintenance.run("do_world_save")
+        self.assertIsInstance(result.exception, RuntimeError)
+        maintenance.servers = {"a": Server(action=fail).tshock, "b": None}
+        maintenance.start("do_world_save", 0.01)
+        try:
+            time.sleep(0.1)
+            self.assertTrue(maintenance._thread.is_alive())
+            self.assertIsNotNone(maintenance.last_error)
+        finally:
+            maintenance.stop()
@@ -0,0 +1,84 @@
+import asyncio
+import unittest
+from pyshock.async_tshock import AsyncTShock
+from pyshock.models import Ban, Group, Player, ServerStatus, parse_inventory, parse_position
+from support import FakeTransport, client
+
+PLAYER = {"status": "200", "nickname": "alice", "username": "alice", "ip": "10.0.0.1", "group": "default",
+          "active": True, "state": 10, "team": 1, "position": "4200.5,1200", "buffs": "1, 5, 11",
+          "inventory": "Copper Shortsword:1, Dirt Block:250, Torch"}
+GROUP = {"status": "200", "name": "vip", "parent": "default", "chatcolor": "255,128,0",
+         "permissions": ["tshock.tp"], "negatedpermissions": [], "totalpermissions": ["tshock.tp", "tshock.chat"]}
+
+def typed(cls = None):
+    return client(transport=FakeTransport({
+        "/v2/players/read": PLAYER,
+        "/v2/groups/read": GROUP,
+        "/v2/bans/list": {"status": "200", "bans": [{"name": "bob", "ip": "10.0.0.2", "reason": "grief"}]},
+        "/status": {"status": "200", "name": "world", "playercount": 2, "players": "alice, bob"},
+        "/v2/server/status": {"status": "200", "playercount": 1, "players": [PLAYER]},
+    }), typed=True, **({} if cls is None else {"cls": cls}))
+
+class ModelTest(unittest.TestCase):
+    def test_lazy_fields_parsed_once(self):
+        player = Player.from_reply(PLAYER)
+        self.assertEqual(player._raw_position, "4200.5,1200")
+        self.assertEqual(player.position, (4200, 1200))
+        self.assertIsNone(player._raw_position)
+        self.assertIs(player.inventory, player.inventory)
+        self.assertEqual(player.buffs, (1, 5, 11))
+        self.assertIsNone(player._raw_inventory)
+
+    def test_read_like_a_dict(self):
+        player = Player.from_reply(PLAYER)
+        self.assertFalse(hasattr(player, "__dict__"))
+        self.assertEqual(player["nickname"], "alice")
+        self.assertIn("position", player)
+        self.assertNotIn("status", player)
+        self.assertRaises(KeyError, player.__getitem__, "status")
+        self.assertEqual(player.get("team"), 1)
+        self.assertEqual(Player(nickname="bob").get("team", 0), 0)
+        self.assertIsNone(Player(nickname="bob").position)
+        self.assertEqual(Player.from_reply(PLAYER), Player.from_reply(dict(PLAYER)))
+        self.assertEqual(Player.from_reply(PLAYER).to_dict()["inventory"], player.inventory)
+
+    def test_parsers(self):
+        self.assertEqual(parse_inventory("Copper Shortsword:1, Dirt Block:250, Torch"),
+                         (("Copper Shortsword", 1), ("Dirt Block", 250), ("Torch", 1)))
+        self.assertEqual(parse_inventory(""), ())
+        self.assertIsNone(parse_position(None))
+        group = Group.from_reply(GROUP)
+        self.assertEqual(group.chatcolor, (255, 128, 0))
+        self.assertEqual(group.permissions, ("tshock.tp",))
+        self.assertEqual(group.totalpermissions, frozenset({"tshock.tp", "tshock.chat"}))
+
+class TypedClientTest(unittest.TestCase):
+    def test_replies_are_models(self):
+        tshock = typed()
+        player = tshock.get_player_info("alice")
+        self.assertIsInstance(player, Player)
+        self.assertEqual(player.position, (4200, 1200))
+        self.assertIsInstance(tshock.get_group_info("vip"), Group)
+        bans = tshock.get_ban_list()
+        self.assertIsInstance(bans, dict)
+        self.assertEqual(bans["bans"], [Ban(name="bob", ip="10.0.0.2", reason="grief")])
+        self.assertEqual(tshock.get_status().players, ("alice", "bob"))
+        status = tshock.get_server_status_v2(players=True)
+        self.assertIsInstance(status, ServerStatus)
+        self.assertEqual(status.players[0].nickname, "alice")
+
+    def test_streamed_items_are_models(self):
+        self.assertEqual(list(typed().iter_bans()), [Ban(name="bob", ip="10.0.0.2", reason="grief")])
+
+    def test_untyped_replies_stay_dicts(self):
+        tshock = client(transport=FakeTransport({"/v2/players/read": PLAYER}))
+        self.assertEqual(tshock.get_player_info("alice"), PLAYER)
+
+    def test_async(self):
+        async def run():
+            return await typed(AsyncTShock).get_player_info("alice")
+
+        self.assertEqual(asyncio.run(run()).buffs, (1, 5, 11))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+from pyshock.recorder import _SAMPLE, Aggregate, Recorder, _Segment
+
+STATUS = {"playercount": 1, "maxplayers": 8, "players": [{"nickname": "a"}]}
+WORLD = {"time": 100.0, "daytime": True, "bloodmoon": False, "invasionsize": 0}
+
+class RecorderTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_reading_missing_segment(self):
+        path = os.path.join(self.directory.name, "missing.samples")
+        self.assertRaises(FileNotFoundError, _Segment, path, _SAMPLE)
+        self.assertFalse(os.path.exists(path))
+        with Recorder(self.directory.name) as recorder:
+            recorder.record(STATUS, WORLD, timestamp=10)
+            os.remove(os.path.join(self.directory.name, "00000000.roster"))
+            self.assertEqual(list(recorder.scan()), [])
+            self.assertFalse(os.path.exists(os.path.join(self.directory.name, "00000000.roster")))
+
+    def test_clock_set_back(self):
+        with Recorder(self.directory.name) as recorder:
+            recorder.record(STATUS, WORLD, timestamp=20)
+            self.assertEqual(recorder.record(STATUS, WORLD, timestamp=10).time, 20)
+            recorder.record(STATUS, WORLD, timestamp=30)
+        with Recorder(self.directory.name) as recorder:
+            self.assertEqual(recorder.record(STATUS, WORLD, timestamp=5).time, 30)
+            self.assertEqual([sample.time for sample in recorder.scan(start=20, end=31)], [20, 20, 30, 30])
+
+    def test_rotation_and_scan(self):
+        with Recorder(self.directory.name, segment_size=4, roster_size=6) as recorder:
+            for second in range(10):
+                online = [{"nickname": "p{0}".format(n)} for n in range(second % 3)]
+                recorder.record({"playercount": len(online), "players": online}, WORLD, timestamp=100 + second)
+        self.assertEqual(sorted(os.listdir(self.directory.name)),
+                         ["00000000.roster", "00000000.samples", "00000001.roster", "00000001.samples",
+                          "00000002.roster", "00000002.samples", "names.jsonl"])
+        with Recorder(self.directory.name, segment_size=4, roster_size=6) as recorder:
+            self.assertEqual(recorder.names, ["p0", "p1"])
+            samples = list(recorder.scan(start=102, end=107, players=True))
+            self.assertEqual([sample.time for sample in samples], [102, 103, 104, 105, 106])
+            self.assertEqual([sample.players for sample in samples],
+                             [("p0", "p1"), (), ("p0",), ("p0", "p1"), ()])
+            self.assertIsNone(next(recorder.scan()).players)
+            self.assertEqual(list(recorder.scan(start=200)), [])
+
+    def test_downsample(self):
+        with Recorder(self.directory.name, segment_size=4) as recorder:
+            for second, count in enumerate((1, 3, 2, 0, 5)):
+                world = dict(WORLD, bloodmoon=second == 1, invasionsize=second)
+                recorder.record(dict(STATUS, playercount=count), world, timestamp=98 + second)
+            self.assertEqual(recorder.downsample(2), [
+                Aggregate(98, 2, 1, 3, 2.0, 0.5, 1),
+                Aggregate(100, 2, 0, 2, 1.0, 0.0, 3),
+                Aggregate(102, 1, 5, 5, 5.0, 0.0, 4)])
+            self.assertEqual(recorder.downsample(10, start=100), [Aggregate(100, 3, 0, 5, 7 / 3, 0.0, 4)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pyshock.async_tshock import AsyncTShock
+from pyshock.exceptions import ApiException, CircuitOpenException, ResponseException
+from pyshock.resilience import CircuitBreaker
+from pyshock.tshock import TShock
+from support import HANG, FakeTransport, client
+
+class ErrorServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+class ErrorHandler(BaseHTTPRequestHandler):
+    """Answers every request with HTTP 503."""
+    def do_GET(self):
+        body = b'{"status": "503", "error": "overloaded"}'
+        self.send_response(503)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def half_open(breaker):
+    breaker.record_failure()
+    breaker._opened -= breaker.reset_timeout
+
+class CircuitBreakerTest(unittest.TestCase):
+    def test_opens_and_closes(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.before_request()
+        breaker.record_failure()
+        self.assertRaises(CircuitOpenException, breaker.before_request)
+        breaker._opened -= 60
+        breaker.before_request()
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertRaises(CircuitOpenException, breaker.before_request)
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_abandoned_trial_expires(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        half_open(breaker)
+        breaker.before_request()
+        self.assertRaises(CircuitOpenException, breaker.before_request)
+        time.sleep(0.06)
+        breaker.before_request()
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertEqual(breaker.failures, 2)
+
+    def test_only_server_failures_count(self):
+        breaker = CircuitBreaker(failure_threshold=1)
+        transport = FakeTransport()
+        transport.fail(RuntimeError("bug"), ApiException("No recorded reply."), ResponseException("denied", "403"))
+        tshock = client(transport=transport, breaker=breaker)
+        for exception in (RuntimeError, ApiException, ResponseException):
+            self.assertRaises(exception, tshock.get_status)
+        self.assertEqual((breaker.state, breaker.failures), (CircuitBreaker.CLOSED, 0))
+        transport.fail(ResponseException("failed", "503"))
+        self.assertRaises(ResponseException, tshock.get_status)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+    def test_http_5xx_is_a_failure(self):
+        server = ErrorServer(("127.0.0.1", 0), ErrorHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        breaker = CircuitBreaker(failure_threshold=1)
+        try:
+            with TShock("127.0.0.1", server.server_address[1], breaker=breaker) as tshock:
+                with self.assertRaises(ResponseException) as raised:
+                    tshock.get_status()
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual((raised.exception.status, raised.exception.error), ("503", "overloaded"))
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+    def test_trial_raising_other_exception(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        transport = FakeTransport()
+        transport.fail(RuntimeError("bug"))
+        tshock = client(transport=transport, breaker=breaker)
+        half_open(breaker)
+        self.assertRaises(RuntimeError, tshock.get_status)
+        self.assertEqual((breaker.state, breaker.failures), (CircuitBreaker.OPEN, 1))
+        self.assertEqual(tshock.get_status()["status"], "200")
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_trial_interrupted(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        transport = FakeTransport()
+        transport.fail(KeyboardInterrupt())
+        tshock = client(transport=transport, breaker=breaker)
+        half_open(breaker)
+        self.assertRaises(KeyboardInterrupt, tshock.get_status)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(tshock.get_status()["status"], "200")
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_async_trial_cancelled(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        transport = FakeTransport()
+        transport.fail(HANG)
+        tshock = client(AsyncTShock, transport, breaker=breaker)
+        half_open(breaker)
+
+        async def run():
+            trial = asyncio.ensure_future(tshock.get_status())
+            await asyncio.sleep(0.01)
+            trial.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await trial
+            self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+            self.assertEqual((await tshock.get_status())["status"], "200")
+            self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+        asyncio.run(run())
@@ -0,0 +1,116 @@
+import asyncio
+import time
+import unittest
+from pyshock.batch import run_batch
+from pyshock.enums import RequestPriority
+from pyshock.groups import GroupIndex
+from pyshock.scheduler import RequestScheduler, current_priority, priority
+from support import FakeTransport, fleet
+
+def recording(priorities):
+    """Returns a FakeTransport answering group and status requests that keeps the priority of each."""
+    def reply(body):
+        return lambda url: priorities.append(current_priority()) or body
+    return FakeTransport({"/v2/groups/list": reply({"status": "200", "groups": [{"name": "a"}, {"name": "b"}]}),
+                          "/v2/groups/read": reply({"status": "200", "parent": "", "permissions": [],
+                                                    "negatedpermissions": []})},
+                         default=reply({"status": "200", "playercount": 0}))
+
+def queue(scheduler, priorities, order):
+    """Starts a task per priority that waits for a slot of ``scheduler`` and appends its priority to ``order``."""
+    async def request(value):
+        async with scheduler.slot_async(value):
+            order.append(value)
+    return [asyncio.ensure_future(request(value)) for value in priorities]
+
+class RequestSchedulerTest(unittest.TestCase):
+    def test_most_urgent_first(self):
+        scheduler = RequestScheduler(max_in_flight=1)
+        order = []
+
+        async def run():
+            scheduler.acquire(RequestPriority.Interactive)
+            tasks = queue(scheduler, [RequestPriority.Background, RequestPriority.Interactive,
+                                      RequestPriority.Moderation, RequestPriority.Interactive], order)
+            await asyncio.sleep(0)
+            scheduler.release()
+            await asyncio.gather(*tasks)
+
+        asyncio.run(run())
+        self.assertEqual(order, [RequestPriority.Moderation, RequestPriority.Interactive,
+                                 RequestPriority.Interactive, RequestPriority.Background])
+        stats = scheduler.stats()
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertEqual(stats["priorities"]["Interactive"]["requests"], 3)
+        self.assertEqual(stats["priorities"]["Interactive"]["max_queued"], 2)
+        self.assertEqual(stats["priorities"]["Background"]["queued"], 0)
+        self.assertGreater(stats["priorities"]["Background"]["max_wait"], 0)
+
+    def test_waiting_raises_priority(self):
+        scheduler = RequestScheduler(max_in_flight=1, aging=0.01)
+        order = []
+
+        async def run():
+            scheduler.acquire(RequestPriority.Interactive)
+            tasks = queue(scheduler, [RequestPriority.Background], order)
+            await asyncio.sleep(0)
+            time.sleep(0.05)
+            tasks += queue(scheduler, [RequestPriority.Moderation], order)
+            await asyncio.sleep(0)
+            scheduler.release()
+            await asyncio.gather(*tasks)
+
+        asyncio.run(run())
+        self.assertEqual(order, [RequestPriority.Background, RequestPriority.Moderation])
+
+    def test_in_flight_cap(self):
+        scheduler = RequestScheduler(max_in_flight=2)
+        in_flight = []
+
+        async def request():
+            async with scheduler.slot_async(RequestPriority.Interactive):
+                in_flight.append(scheduler.stats()["in_flight"])
+                await asyncio.sleep(0.01)
+
+        async def run():
+            await asyncio.gather(*[request() for _ in range(6)])
+
+        asyncio.run(run())
+        self.assertEqual(max(in_flight), 2)
+        self.assertEqual(scheduler.stats()["in_flight"], 0)
+
+    def test_cancelled_waiter_gives_slot_back(self):
+        scheduler = RequestScheduler(max_in_flight=1)
+
+        async def run():
+            scheduler.acquire(RequestPriority.Interactive)
+            waiting, granted = queue(scheduler, [RequestPriority.Background, RequestPriority.Background], [])
+            await asyncio.sleep(0)
+            waiting.cancel()
+            await asyncio.gather(waiting, return_exceptions=True)
+            self.assertEqual(scheduler.stats()["priorities"]["Background"]["queued"], 1)
+            # The slot is handed over, but the task is cancelled before it runs again.
+            scheduler.release()
+            granted.cancel()
+            await asyncio.gather(granted, return_exceptions=True)
+
+        asyncio.run(run())
+        self.assertTrue(all(value["queued"] == 0 for value in scheduler.stats()["priorities"].values()))
+        self.assertEqual(scheduler.stats()["in_flight"], 0)
+
+class PriorityTest(unittest.TestCase):
+    def test_run_batch_keeps_priority(self):
+        with priority(RequestPriority.Background):
+            batch = run_batch(lambda item: current_priority(), range(8), max_in_flight=4)
+        self.assertEqual([item.reply for item in batch], [RequestPriority.Background] * 8)
+
+    def test_fleet_and_groups_keep_priority(self):
+        first, second = [], []
+        servers = fleet(first=recording(first), second=recording(second))
+        with priority(RequestPriority.Moderation):
+            servers.call("get_status")
+            GroupIndex.build(servers.servers["first"], follow=False)
+        self.assertEqual(second, [RequestPriority.Moderation])
+        self.assertEqual(first, [RequestPriority.Moderation] * 4)
+        servers.call("get_status")
+        self.assertEqual(second[-1], RequestPriority.Interactive)
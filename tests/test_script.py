@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import time
+import unittest
+from urllib.parse import parse_qsl, urlsplit
+from pyshock.async_tshock import AsyncTShock
+from pyshock.exceptions import ResponseException, TimeoutException
+from pyshock.script import Command, Script
+from support import FakeTransport, client
+
+SCRIPT = """# Kick the cheaters, then save.
+/say bye
+
+& /kick slow
+& /kick fast
+/save"""
+
+class Server():
+    """Answers rawcmd after ``delays[cmd]`` seconds and keeps when every command started and ended."""
+    def __init__(self, delays : dict = None):
+        self.delays = delays or {}
+        self.events = []
+        self._lock = threading.Lock()
+        self.transport = FakeTransport({"/v3/server/rawcmd": self.rawcmd})
+
+    def rawcmd(self, url):
+        cmd = dict(parse_qsl(urlsplit(url).query))["cmd"]
+        self._event("start", cmd)
+        time.sleep(self.delays.get(cmd, 0))
+        self._event("end", cmd)
+        if cmd.startswith("/fail"):
+            return {"status": "400", "error": "Invalid command"}
+        return {"status": "200", "response": ["Executed " + cmd]}
+
+    def when(self, event : str, cmd : str) -> int:
+        return self.events.index((event, cmd))
+
+    def _event(self, event, cmd):
+        with self._lock:
+            self.events.append((event, cmd))
+
+class ScriptTest(unittest.TestCase):
+    def test_parse(self):
+        script = Script.parse(SCRIPT)
+        self.assertEqual(script.commands, [Command(2, "/say bye", False), Command(4, "/kick slow", True),
+                                           Command(5, "/kick fast", True), Command(6, "/save", False)])
+
+    def test_independent_commands_overlap_between_barriers(self):
+        server = Server({"/kick slow": 0.1})
+        results = list(Script.parse(SCRIPT).run(client(transport=server.transport)))
+        self.assertEqual([result.line for result in results], [2, 4, 5, 6])
+        self.assertEqual(results[1].output, ["Executed /kick slow"])
+        self.assertLess(server.when("end", "/say bye"), server.when("start", "/kick slow"))
+        self.assertLess(server.when("start", "/kick fast"), server.when("end", "/kick slow"))
+        self.assertLess(server.when("end", "/kick slow"), server.when("start", "/save"))
+
+    def test_max_in_flight(self):
+        server = Server({"/a": 0.05, "/b": 0.05})
+        list(Script(["& /a", "& /b", "& /c"]).run(client(transport=server.transport), max_in_flight=2))
+        self.assertGreater(server.when("start", "/c"), min(server.when("end", "/a"), server.when("end", "/b")))
+
+    def test_failures_do_not_stop_the_script(self):
+        server = Server()
+        server.transport.fail(TimeoutException("The server did not answer in time."))
+        results = list(Script(["/lost", "/fail", "/save"]).run(client(transport=server.transport)))
+        self.assertIsInstance(results[0].exception, TimeoutException)
+        self.assertIsInstance(results[1].exception, ResponseException)
+        self.assertIsNone(results[1].output)
+        self.assertEqual(results[2].output, ["Executed /save"])
+
+    def test_run_async(self):
+        server = Server()
+        server.transport.latency = 0.01
+
+        async def run():
+            results = []
+            async for result in Script.parse(SCRIPT + "\n/fail").run_async(client(AsyncTShock, server.transport)):
+                results.append(result)
+            return results
+
+        results = asyncio.run(run())
+        self.assertEqual([result.line for result in results], [2, 4, 5, 6, 7])
+        self.assertIsInstance(results[-1].exception, ResponseException)
+        self.assertLess(server.when("end", "/kick fast"), server.when("start", "/save"))
+
+if __name__ == "__main__":
+    unittest.main()
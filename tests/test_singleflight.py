@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pyshock.async_tshock import AsyncTShock
+from pyshock.exceptions import TimeoutException
+from pyshock.singleflight import SingleFlight
+from support import FakeTransport, client
+
+def together(function, count : int = 8) -> list:
+    """Calls ``function`` on ``count`` threads at once and returns the results or exceptions."""
+    started = threading.Barrier(count)
+
+    def call(_):
+        started.wait()
+        try:
+            return function()
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(count) as pool:
+        return list(pool.map(call, range(count)))
+
+class SingleFlightTest(unittest.TestCase):
+    def setUp(self):
+        self.transport = FakeTransport(latency=0.1)
+        self.flights = SingleFlight()
+        self.tshock = client(transport=self.transport, single_flight=self.flights)
+
+    def test_identical_reads_share_one_request(self):
+        replies = together(self.tshock.get_status)
+        self.assertEqual(self.transport.paths, ["/status"])
+        self.assertTrue(all(reply is replies[0] for reply in replies))
+        self.assertEqual(self.flights.stats(), {"requests": 1, "coalesced": 7, "in_flight": 0})
+
+    def test_exception_shared(self):
+        self.transport.fail(TimeoutException("The server did not answer in time."))
+        errors = together(self.tshock.get_status, 4)
+        self.assertEqual(len(self.transport.urls), 1)
+        self.assertTrue(all(isinstance(error, TimeoutException) for error in errors))
+        # The failure is not remembered.
+        self.tshock.get_status()
+        self.assertEqual(len(self.transport.urls), 2)
+
+    def test_writes_and_other_parameters_not_shared(self):
+        together(lambda: self.tshock.do_server_broadcast("hello"), 3)
+        self.assertEqual(self.transport.paths.count("/v2/server/broadcast"), 3)
+        names = iter(["a", "b", "a", "b"])
+        lock = threading.Lock()
+
+        def read():
+            with lock:
+                name = next(names)
+            return self.tshock.get_player_info(name)
+
+        together(read, 4)
+        self.assertEqual(sorted(self.transport.params(index)["player"] for index in range(3, 5)), ["a", "b"])
+        self.assertEqual(self.flights.stats()["coalesced"], 2)
+
+    def test_async_tasks_share_one_request(self):
+        tshock = client(AsyncTShock, self.transport, single_flight=self.flights)
+
+        async def run():
+            waiters = [asyncio.ensure_future(tshock.get_status()) for _ in range(5)]
+            await asyncio.sleep(0.01)
+            # A cancelled waiter does not cancel the request of the others.
+            waiters[0].cancel()
+            return await asyncio.gather(*waiters[1:])
+
+        replies = asyncio.run(run())
+        self.assertEqual(self.transport.paths, ["/status"])
+        self.assertEqual(replies, [replies[0]] * 4)
+        self.assertEqual(self.flights.stats(), {"requests": 1, "coalesced": 4, "in_flight": 0})
+
+    def test_event_loops_do_not_share_calls(self):
+        flights = SingleFlight()
+        started = threading.Barrier(2)
+        results = {}
+
+        async def call(name):
+            async def fetch():
+                await asyncio.sleep(0.05)
+                return name
+            started.wait()
+            results[name] = await asyncio.gather(*[flights.do_async("/v2/server/status", fetch) for _ in range(3)])
+
+        threads = [threading.Thread(target=asyncio.run, args=(call(name),)) for name in ("first", "second")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, {"first": ["first"] * 3, "second": ["second"] * 3})
+        self.assertEqual(flights.stats(), {"requests": 2, "coalesced": 4, "in_flight": 0})
+
+if __name__ == "__main__":
+    unittest.main()
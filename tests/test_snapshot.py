@@ -0,0 +1,88 @@
+import unittest
+from urllib.parse import parse_qsl, urlsplit
+from pyshock.snapshot import ItemVocabulary, PlayerSnapshot
+from support import FakeTransport, client, fleet
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+PLAYERS = [
+    {"nickname": "alice", "group": "admin", "position": "100,200", "buffs": "1, 5",
+     "inventory": "Zenith:1, Dirt Block:250, Dirt Block:500"},
+    {"nickname": "bob", "group": "default", "position": "130,240", "buffs": "",
+     "inventory": "Dirt Block:20"},
+    {"nickname": "carol", "group": "default", "position": "", "buffs": "5", "inventory": ""},
+]
+
+def server(*players):
+    """Returns a transport listing ``players`` and answering their info, except for ``gone``."""
+    def read(url):
+        name = dict(parse_qsl(urlsplit(url).query))["player"]
+        found = [player for player in players if player["nickname"] == name]
+        if not found:
+            return {"status": "404", "error": "Player {0} was not found".format(name)}
+        return dict(found[0], status="200")
+    names = [player["nickname"] for player in players] + ["gone"]
+    return FakeTransport({"/v2/players/list": {"status": "200", "players": ", ".join(names)},
+                          "/v2/players/read": read})
+
+@unittest.skipUnless(numpy, "numpy is not installed")
+class PlayerSnapshotTest(unittest.TestCase):
+    def test_columns(self):
+        snapshot = PlayerSnapshot.from_replies(PLAYERS, "eu")
+        self.assertEqual(list(snapshot.nickname), ["alice", "bob", "carol"])
+        self.assertEqual(snapshot.items.shape, (3, 3))
+        self.assertEqual(snapshot.items[2].tolist(), [-1, -1, -1])
+        self.assertEqual(snapshot.stacks[1].tolist(), [20, 0, 0])
+        self.assertEqual(snapshot.buffs.tolist(), [[1, 5], [-1, -1], [5, -1]])
+        self.assertTrue(numpy.isnan(snapshot.x[2]))
+        self.assertEqual(snapshot.vocabulary.names, ["Zenith", "Dirt Block"])
+
+    def test_queries(self):
+        snapshot = PlayerSnapshot.from_replies(PLAYERS, "eu")
+        # Stacks of one item in several slots add up.
+        self.assertEqual(snapshot.count("Dirt Block").tolist(), [750, 20, 0])
+        self.assertEqual(snapshot.count("Copper Coin").tolist(), [0, 0, 0])
+        self.assertEqual(snapshot.holding("Dirt Block", more_than=100).tolist(), [True, False, False])
+        self.assertEqual(snapshot.has_buff(5).tolist(), [True, False, True])
+        self.assertEqual(snapshot.within(100, 200, radius=50).tolist(), [True, True, False])
+        self.assertEqual(snapshot.within(100, 200, radius=49).tolist(), [True, False, False])
+        self.assertEqual(list(snapshot.select(snapshot.has_buff(5)).nickname), ["alice", "carol"])
+
+    def test_merge_translates_item_ids(self):
+        first = PlayerSnapshot.from_replies(PLAYERS[:1], "eu")
+        second = PlayerSnapshot.from_replies([{"nickname": "dave", "position": "100,200",
+                                               "inventory": "Torch:3, Dirt Block:1, Torch:1, Zenith:2"}], "us")
+        merged = PlayerSnapshot.merge([first, second])
+        self.assertEqual(merged.servers, ("eu", "us"))
+        self.assertEqual(merged.server.tolist(), [0, 1])
+        self.assertEqual(merged.items.shape, (2, 4))
+        self.assertEqual(merged.count("Zenith").tolist(), [1, 2])
+        self.assertEqual(merged.count("Torch").tolist(), [0, 4])
+        self.assertEqual(merged.within(100, 200, radius=1, server="us").tolist(), [False, True])
+        self.assertEqual(merged.within(100, 200, radius=1, server="asia").tolist(), [False, False])
+        self.assertEqual(len(PlayerSnapshot.merge([])), 0)
+
+    def test_snapshot_players(self):
+        snapshot = client(transport=server(*PLAYERS)).snapshot_players()
+        self.assertEqual(list(snapshot.nickname), ["alice", "bob", "carol"])
+        self.assertEqual(snapshot.servers, ("127.0.0.1:7878",))
+
+    def test_fleet_shares_vocabulary(self):
+        snapshot = fleet(eu=server(*PLAYERS[1:]), us=server(*PLAYERS[:1]),
+                         down=FakeTransport(default=ConnectionError("refused"))).snapshot_players()
+        self.assertEqual(sorted(snapshot.servers), ["eu", "us"])
+        self.assertEqual(snapshot.count("Dirt Block").sum(), 770)
+        self.assertEqual(snapshot.nickname[snapshot.holding("Zenith")].tolist(), ["alice"])
+
+    def test_vocabulary(self):
+        vocabulary = ItemVocabulary(["Zenith"])
+        self.assertEqual(vocabulary.id("Torch"), 1)
+        self.assertEqual(vocabulary.id("Zenith"), 0)
+        self.assertEqual(vocabulary.get("Wood"), -1)
+        self.assertEqual(len(vocabulary), 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import unittest
+from urllib.parse import parse_qsl, urlsplit
+from pyshock.async_tshock import AsyncTShock
+from pyshock.exceptions import ConnectionException
+from pyshock.resilience import RetryPolicy
+from pyshock.scheduler import RequestScheduler
+from pyshock.streaming import ArrayParser
+from pyshock.tshock import TShock
+from support import CollectHook, FakeTransport, client
+
+BANS = {"status": "200", "bans": [{"name": "a", "ip": "1.1.1.1", "reason": ""},
+                                  {"name": "b", "ip": "2.2.2.2", "reason": ""}]}
+
+def streaming(cls, failures=0):
+    """Returns a client listing BANS after ``failures`` failed connections, and the hook it reports to."""
+    transport = FakeTransport({"/v2/bans/list": BANS})
+    transport.fail(*[ConnectionException("down") for _ in range(failures)])
+    hook = CollectHook()
+    tshock = client(cls, transport, retry=RetryPolicy(retries=2, backoff=0), scheduler=RequestScheduler(1))
+    tshock.add_hook(hook)
+    return tshock, hook
+
+REPLY = {"status": "200", "bans": [{"name": "Jörð 🌍", "ip": "1.1.1.1", "reason": "a ] \" \\ , }"},
+                                   [1, [2.5e3, -7]], 12345, True, None, "", {}],
+         "count": 7, "error": ""}
+
+def parse(body : bytes, size : int) -> tuple:
+    """Feeds a body to a parser ``size`` bytes at a time and returns the elements and the other members."""
+    parser = ArrayParser("bans")
+    items = []
+    for start in range(0, len(body), size):
+        items.extend(parser.feed(body[start:start + size]))
+    return items, parser.close()
+
+class ArrayParserTest(unittest.TestCase):
+    def test_any_chunk_boundary(self):
+        body = json.dumps(REPLY, ensure_ascii=False, indent=1).encode("utf-8")
+        for size in range(1, 12):
+            self.assertEqual(parse(body, size), (REPLY["bans"], {"status": "200", "count": 7, "error": ""}))
+        for split in range(len(body) + 1):
+            parser = ArrayParser("bans")
+            items = parser.feed(body[:split]) + parser.feed(body[split:])
+            self.assertEqual(items, REPLY["bans"], split)
+            self.assertEqual(parser.close()["count"], 7)
+
+    def test_elements_returned_as_completed(self):
+        parser = ArrayParser("bans")
+        self.assertEqual(parser.feed(b'{"bans": [12'), [])
+        # A number at the end of a chunk may go on in the next one.
+        self.assertEqual(parser.feed(b'3, "a'), [123])
+        self.assertEqual(parser.feed(b'"'), ["a"])
+        self.assertEqual(parser.feed(b"]}"), [])
+        self.assertEqual(parser.close(), {})
+
+    def test_missing_or_empty_array(self):
+        self.assertEqual(parse(b'{"bans": [], "status": "200"}', 3), ([], {"status": "200"}))
+        # A reply rejecting the token has no array.
+        self.assertEqual(parse(b'{"status": "401", "error": "Not authorized."}', 5),
+                         ([], {"status": "401", "error": "Not authorized."}))
+        self.assertEqual(parse(b"{}", 1), ([], {}))
+
+    def test_invalid(self):
+        for body in (b'{"bans": [1, 2', b'{"bans": [1 2]}', b'[1, 2]', b'{"bans": []} {}', b'{"a": tru'):
+            self.assertRaises(ValueError, parse, body, 4)
+
+class StreamTest(unittest.TestCase):
+    def check(self, tshock, hook, names):
+        self.assertEqual(names, ["a", "b"])
+        self.assertEqual(tshock.scheduler.stats()["in_flight"], 0)
+        info, = hook.infos
+        self.assertEqual((info.endpoint, info.status, info.exception), ("get_ban_list", "200", None))
+        self.assertGreater(info.size, 0)
+
+    def test_stream_holds_slot_and_retries(self):
+        tshock, hook = streaming(TShock, failures=2)
+        names, in_flight = [], []
+        for ban in tshock.iter_bans():
+            names.append(ban["name"])
+            in_flight.append(tshock.scheduler.stats()["in_flight"])
+        self.assertEqual(in_flight, [1, 1])
+        self.check(tshock, hook, names)
+
+    def test_closed_stream_releases_slot(self):
+        tshock, hook = streaming(TShock)
+        bans = tshock.iter_bans()
+        next(bans)
+        bans.close()
+        self.assertEqual(tshock.scheduler.stats()["in_flight"], 0)
+        self.assertEqual(len(hook.infos), 1)
+
+    def test_async_stream_holds_slot_and_retries(self):
+        tshock, hook = streaming(AsyncTShock, failures=2)
+
+        async def run():
+            names, in_flight = [], []
+            async for ban in tshock.iter_bans():
+                names.append(ban["name"])
+                in_flight.append(tshock.scheduler.stats()["in_flight"])
+            return names, in_flight
+
+        names, in_flight = asyncio.run(run())
+        self.assertEqual(in_flight, [1, 1])
+        self.check(tshock, hook, names)
+
+    def test_failure_after_retries_reaches_hooks(self):
+        tshock, hook = streaming(TShock, failures=3)
+        self.assertRaises(ConnectionException, list, tshock.iter_bans())
+        self.assertEqual(tshock.scheduler.stats()["in_flight"], 0)
+        self.assertIsInstance(hook.infos[0].exception, ConnectionException)
+        self.assertEqual(tshock.transport.paths, ["/v2/bans/list"] * 3)
+
+    def test_rejected_token_renewed_once(self):
+        def bans(url):
+            if dict(parse_qsl(urlsplit(url).query))["token"] != "new":
+                return {"status": "401", "error": "Not authorized. The specified API endpoint requires a token."}
+            return BANS
+
+        transport = FakeTransport({"/v2/token/create/secret": {"status": "200", "token": "new"}, "/v2/bans/list": bans})
+        tshock = client(transport=transport, user="admin", password="secret")
+        tshock.token = "expired"
+        self.assertEqual([ban["name"] for ban in tshock.iter_bans(chunk_size=8)], ["a", "b"])
+        self.assertEqual(transport.paths, ["/v2/bans/list", "/v2/token/create/secret", "/v2/bans/list"])
+
+if __name__ == "__main__":
+    unittest.main()
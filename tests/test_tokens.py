@@ -0,0 +1,81 @@
+import asyncio
+import itertools
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+from pyshock.async_tshock import AsyncTShock
+from pyshock.exceptions import ResponseException
+from support import FakeTransport, client
+
+class Server():
+    """Answers with a fake transport that issues tokens and rejects every other one."""
+    def __init__(self, latency=0.0):
+        self.tokens = ("token{0}".format(i) for i in itertools.count())
+        self.valid = None
+        self.transport = FakeTransport({"/v2/players/list": self.players}, latency=latency)
+        self.transport.default = self.create
+
+    def create(self, url):
+        if not urlsplit(url).path.startswith("/v2/token/create/"):
+            return {"status": "200", "response": "ok"}
+        self.valid = next(self.tokens)
+        return {"status": "200", "token": self.valid}
+
+    def players(self, url):
+        if dict(parse_qsl(urlsplit(url).query, keep_blank_values=True)).get("token") != self.valid:
+            return {"status": "401", "error": "Not authorized. The specified API endpoint requires a token."}
+        return {"status": "200", "players": "a, b"}
+
+    @property
+    def creates(self):
+        return sum(path.startswith("/v2/token/create/") for path in self.transport.paths)
+
+class TokenTest(unittest.TestCase):
+    def test_first_request_gets_token(self):
+        server = Server()
+        tshock = client(transport=server.transport, user="admin", password="secret")
+        self.assertEqual(tshock.get_player_list()["players"], "a, b")
+        self.assertEqual(server.transport.paths, ["/v2/token/create/secret", "/v2/players/list"])
+        self.assertNotIn("/tokentest", server.transport.paths)
+
+    def test_threads_share_one_renewal(self):
+        server = Server(latency=0.01)
+        tshock = client(transport=server.transport, user="admin", password="secret")
+        tshock.get_player_list()
+        server.valid = "expired"
+        with ThreadPoolExecutor(8) as pool:
+            replies = list(pool.map(lambda _: tshock.get_player_list()["status"], range(16)))
+        self.assertEqual(set(replies), {"200"})
+        self.assertEqual(server.creates, 2)
+
+    def test_tasks_share_one_renewal(self):
+        server = Server(latency=0.01)
+        tshock = client(AsyncTShock, server.transport, user="admin", password="secret")
+
+        async def run():
+            await tshock.get_player_list()
+            server.valid = "expired"
+            return await asyncio.gather(*[tshock.get_player_list() for _ in range(16)])
+
+        self.assertEqual({reply["status"] for reply in asyncio.run(run())}, {"200"})
+        self.assertEqual(server.creates, 2)
+
+    def test_without_credentials_token_errors_raise(self):
+        server = Server()
+        self.assertRaises(ResponseException, client(transport=server.transport).get_player_list)
+        self.assertEqual(server.creates, 0)
+
+    def test_obtained_token_destroyed_on_close(self):
+        server = Server()
+        tshock = client(transport=server.transport)
+        tshock.get_token("admin", "secret")
+        tshock.close()
+        self.assertEqual(server.transport.paths[-1], "/token/destroy/token0")
+        self.assertEqual(tshock.token, "")
+        tshock = client(transport=server.transport)
+        tshock.token = "given"
+        tshock.close()
+        self.assertEqual(server.transport.paths[-1], "/token/destroy/token0")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from benchmarks.mock_server import TOKEN, MockTShockServer
+from pyshock.exceptions import ApiException, ConnectionException, TimeoutException
+from pyshock.transport import RecordingTransport, ReplayTransport, redact
+from pyshock.tshock import TShock
+
+URL = "http://127.0.0.1:7878/v2/server/status?players=true&token=secret"
+
+def server(*outcomes):
+    """Returns a send function answering with ``outcomes`` in turn: bodies, or exceptions to raise."""
+    outcomes = list(outcomes)
+
+    def send(url, timeout):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    return send
+
+class RecordingTransportTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "session.pysa")
+
+    def test_url_too_long_is_not_sent(self):
+        sent = []
+
+        def send(url, timeout):
+            sent.append(url)
+            return b'{"status": "200"}'
+
+        with RecordingTransport(self.path) as transport:
+            transport.send("http://127.0.0.1:7878/v2/server/status", None, send)
+            with self.assertRaises(ValueError):
+                transport.send("http://127.0.0.1:7878/v3/server/rawcmd?cmd=" + "a" * 70000, None, send)
+        self.assertEqual(len(sent), 1)
+        replay = ReplayTransport(self.path)
+        self.assertEqual(replay.send("http://localhost:7878/v2/server/status", None, None), b'{"status": "200"}')
+
+    def test_round_trip(self):
+        with MockTShockServer(players=3) as mock, RecordingTransport(self.path) as recorder:
+            with TShock("127.0.0.1", mock.port, user="admin", password="hunter2", transport=recorder) as tshock:
+                status = tshock.get_server_status_v2(players=True)
+                world = tshock.get_world_info()
+        with open(self.path, "rb") as file:
+            archive = file.read()
+        self.assertNotIn(b"hunter2", archive)
+        self.assertNotIn(TOKEN.encode("utf-8"), archive)
+        # Replayed on another address with other credentials, without a server.
+        replay = ReplayTransport(self.path)
+        with TShock("10.0.0.1", 7878, user="admin", password="other", transport=replay) as tshock:
+            self.assertEqual(tshock.get_server_status_v2(players=True), status)
+            self.assertEqual(tshock.get_world_info(), world)
+        self.assertEqual(replay.stats(), {"replies": len(replay), "missing": 0})
+
+    def test_replies_replayed_in_order(self):
+        with RecordingTransport(self.path) as recorder:
+            send = server(b"1", TimeoutException("The server did not answer in time."), b"3",
+                          ConnectionException("The server refused the connection."))
+            recorder.send(URL, None, send)
+            self.assertRaises(TimeoutException, recorder.send, URL, None, send)
+            recorder.send(URL, None, send)
+            self.assertRaises(ConnectionException, recorder.send, "http://127.0.0.1:7878/status", None, send)
+        replay = ReplayTransport(self.path)
+        self.assertEqual(replay.urls, [redact(URL), "/status"])
+        self.assertEqual(replay.send(URL, None, None), b"1")
+        self.assertRaisesRegex(TimeoutException, "did not answer", replay.send, URL, None, None)
+        self.assertEqual(asyncio.run(replay.send_async(URL, None, None)), b"3")
+        # The last reply is repeated once they run out.
+        self.assertEqual(replay.send(URL.replace("secret", "new"), None, None), b"3")
+        self.assertRaises(ConnectionException, replay.send, "http://10.0.0.1:7878/status", None, None)
+        self.assertRaises(ApiException, replay.send, "http://127.0.0.1:7878/world/read", None, None)
+        self.assertEqual(replay.stats(), {"replies": 5, "missing": 1})
+        replay.rewind()
+        self.assertEqual(replay.send(URL, None, None), b"1")
+
+    def test_recording_appends_and_interrupted_record_ignored(self):
+        for body in (b"first", b"second"):
+            with RecordingTransport(self.path) as recorder:
+                recorder.send(URL, None, server(body))
+        with open(self.path, "ab") as file:
+            file.write(b"\x00\x05")
+        replay = ReplayTransport(self.path)
+        self.assertEqual(len(replay), 2)
+        self.assertEqual([replay.send(URL, None, None) for _ in range(2)], [b"first", b"second"])
+        with open(self.path, "wb") as file:
+            file.write(b"not an archive")
+        self.assertRaises(ValueError, ReplayTransport, self.path)
+
+class RedactTest(unittest.TestCase):
+    def test_secrets_replaced(self):
+        self.assertEqual(redact("http://127.0.0.1:7878/v2/token/create/secret?username=Ijwu&token="),
+                         "/v2/token/create/REDACTED?username=Ijwu&token=REDACTED")
+        self.assertEqual(redact("http://127.0.0.1:7878/v2/users/create?user=a&password=b&group=c"),
+                         "/v2/users/create?user=a&password=REDACTED&group=c")
+        self.assertEqual(redact("http://127.0.0.1:7878/token/destroy/secret"), "/token/destroy/REDACTED")
+        self.assertEqual(redact("http://127.0.0.1:7878/status"), "/status")
+
+if __name__ == "__main__":
+    unittest.main()
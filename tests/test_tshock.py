@@ -0,0 +1,58 @@
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pyshock.tshock import TShock
+
+class KeepAliveServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), KeepAliveHandler)
+        self.clients = []
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """Answers every request with a status reply, keeping the connection open."""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.clients.append(self.client_address)
+        body = json.dumps({"status": "200", "playercount": 0}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class SessionTest(unittest.TestCase):
+    def setUp(self):
+        self.server = KeepAliveServer()
+        self.addCleanup(self.server.stop)
+
+    def test_requests_reuse_connection(self):
+        with TShock("127.0.0.1", self.server.server_address[1]) as tshock:
+            for _ in range(5):
+                self.assertEqual(tshock.get_status()["status"], "200")
+        self.assertEqual(len(self.server.clients), 5)
+        self.assertEqual(len(set(self.server.clients)), 1)
+
+    def test_pool_holds_concurrent_connections(self):
+        with TShock("127.0.0.1", self.server.server_address[1], pool_size=4) as tshock:
+            threads = [threading.Thread(target=lambda: [tshock.get_status() for _ in range(10)]) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(self.server.clients), 40)
+        self.assertLessEqual(len(set(self.server.clients)), 4)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import itertools
+import unittest
+from pyshock.watch import (GroupChanged, PlayerJoined, PlayerLeft, PollInterval, TeamChanged, diff_players,
+                           index_players)
+from support import FakeTransport, client
+
+def player(nickname, group="default", team=0, username=""):
+    return {"nickname": nickname, "username": username, "group": group, "team": team}
+
+class WatchTest(unittest.TestCase):
+    def test_diff(self):
+        previous = index_players([player("a"), player("b"), player("c", team=1)])
+        current = index_players([player("b", group="mod", username="b"), player("c", team=2), player("d")])
+        self.assertEqual(diff_players(previous, current), [
+            PlayerLeft("a", ""),
+            GroupChanged("b", "default", "mod"),
+            TeamChanged("c", 1, 2),
+            PlayerJoined("d", "", "default", 0),
+        ])
+        self.assertEqual(diff_players(current, current), [])
+
+    def test_interval_adapts(self):
+        interval = PollInterval(1.0, 4.0, factor=2.0)
+        self.assertEqual([interval.next(changed) for changed in (False, False, False, True, False)],
+                         [2.0, 4.0, 4.0, 1.0, 2.0])
+
+    def test_watch_polls(self):
+        polls = iter([[player("a")], [player("a"), player("b")], [player("b")]])
+        transport = FakeTransport({"/v2/server/status": lambda url: {"status": "200", "players": next(polls)}})
+        events = list(itertools.islice(client(transport=transport).watch(0, 0, initial=True), 3))
+        self.assertEqual(events, [PlayerJoined("a", "", "default", 0), PlayerJoined("b", "", "default", 0),
+                                  PlayerLeft("a", "")])
+        self.assertEqual(transport.params()["players"], "true")
+
+if __name__ == "__main__":
+    unittest.main()